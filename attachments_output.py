@@ -35,6 +35,8 @@ from html.parser import HTMLParser
 from pathlib import Path
 import sys
 
+from src.stored_files import has_code, list_codes, list_files, logical_stem, read_text
+
 class XBRLTextExtractor(HTMLParser):
     """XBRL HTMLファイルからテキストを抽出するパーサー"""
     
@@ -373,10 +375,9 @@ def convert_to_markdown(sections, title="決算短信添付資料"):
 def extract_xbrl_text(input_file, output_file=None, output_format='markdown', silent=False):
     """XBRL HTMLファイルからテキストを抽出"""
     
-    # ファイル読み込み
+    # ファイル読み込み（圧縮保存された *.htm.gz / *.htm.zst は展開）
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+        html_content = read_text(input_file)
     except Exception as e:
         print(f"エラー: ファイルを読み込めません: {e}")
         return None
@@ -396,7 +397,7 @@ def extract_xbrl_text(input_file, output_file=None, output_format='markdown', si
         print(f"  - 段落数: {total_paragraphs}")
     
     # 形式に応じて変換
-    file_name = Path(input_file).stem
+    file_name = logical_stem(input_file)
     title = f"{file_name} - 決算短信添付資料"
     
     if output_format.lower() == 'json':
@@ -466,13 +467,13 @@ def find_security_code_folders(attachments_dir):
     if not attachments_path.exists():
         return folders
     
-    # 5桁の英数字パターンにマッチするフォルダを検索
+    # 5桁の英数字パターンにマッチするフォルダ（企業ごとのアーカイブを含む）を検索
     import re
     pattern = re.compile(r'^[A-Za-z0-9]{5}$')
     
-    for item in attachments_path.iterdir():
-        if item.is_dir() and pattern.match(item.name):
-            folders.append(item.name)
+    for code in list_codes(attachments_path):
+        if pattern.match(code):
+            folders.append(code)
     
     return sorted(folders)
 
@@ -482,16 +483,16 @@ def process_security_code_folder(security_code, input_base_dir, output_base_dir,
     input_dir = Path(input_base_dir) / security_code
     output_dir = Path(output_base_dir) / security_code
     
-    # 入力フォルダの存在確認
-    if not input_dir.exists():
+    # 入力フォルダ（または企業ごとのアーカイブ）の存在確認
+    if not has_code(input_base_dir, security_code):
         print(f"エラー: フォルダが見つかりません: {input_dir}")
         return False
     
     # 出力フォルダの作成
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # HTMファイルを検索
-    htm_files = list(input_dir.glob("*.htm"))
+    # HTMファイルを検索（圧縮保存されたものを含む）
+    htm_files = list_files(input_dir, "*.htm")
     if not htm_files:
         print(f"警告: {security_code} フォルダにHTMファイルが見つかりません")
         return False
@@ -512,12 +513,13 @@ def process_security_code_folder(security_code, input_base_dir, output_base_dir,
         for output_format in output_formats:
             try:
                 # 出力ファイル名を決定
+                stem = logical_stem(htm_file)
                 if output_format == 'json':
-                    output_file = output_dir / (htm_file.stem + '.json')
+                    output_file = output_dir / (stem + '.json')
                 elif output_format == 'txt':
-                    output_file = output_dir / (htm_file.stem + '.txt')
+                    output_file = output_dir / (stem + '.txt')
                 else:  # markdown
-                    output_file = output_dir / (htm_file.stem + '.md')
+                    output_file = output_dir / (stem + '.md')
                 
                 # 抽出実行
                 result = extract_xbrl_text(str(htm_file), str(output_file), output_format, silent)
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+一括ダウンロード（download_all_files_batch）のエンドツーエンド性能計測
+
+ローカルのモックJPXサイト（benchmarks/mock_jpx.py、別プロセス）に対して、
+合成したcodelist（10/100/1,000社など）で一括ダウンロードを実行し、以下を計測する。
+計測ごとに別プロセスで実行するため、ピークメモリは規模ごとの値になる。
+
+- スループット: ファイル数/秒、企業数/分、バイト数/秒
+- リクエスト応答時間の p50 / p95
+- 待機時間（レートリミッター・企業間待機・再試行のバックオフ、全スレッド合計）と
+  作業時間（リクエスト応答待ち合計 + CPU時間）
+- ピークRSS
+
+結果は benchmarks/results/crawler_YYYYMMDD_HHMMSS.json に保存し、バージョン間で比較できる。
+
+使用例:
+    uv run python benchmarks/bench_crawler.py
+    uv run python benchmarks/bench_crawler.py --sizes=10,100 --workers=2 --concurrency=4 --rate=20 --label=workers2
+    uv run python benchmarks/bench_crawler.py --sizes=100 --latency=0.05 --delay=0.5 --types=xbrl,html,attachments
+    uv run python benchmarks/bench_crawler.py --sizes=100 --types=xbrl,html,attachments --from-zip=1 --label=from-zip
+    uv run python benchmarks/bench_crawler.py --sizes=10 --compress=gzip --label=gzip
+
+保存したHTMLサマリー・添付資料がすべて stored_files.list_files で列挙されることも確認し、
+列挙されないファイル（出力処理で読まれないファイル名）があれば失敗として終了する。
+"""
+
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from statistics import quantiles
+from typing import Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_DIR))
+
+DEFAULT_OPTIONS = {
+    'sizes': '10,100,1000',
+    'types': 'html,attachments',
+    'rows': 5,
+    'file_size': 20_000,
+    'latency': 0.01,
+    'workers': 1,
+    'concurrency': 4,
+    'rate': 100.0,
+    'delay': 0.0,
+    'from_zip': 0,
+    'dedup': 0,
+    'compress': '',
+    'label': '',
+}
+
+
+def parse_options(argv: List[str]) -> Dict:
+    options = dict(DEFAULT_OPTIONS)
+    for arg in argv:
+        if not arg.startswith('--') or '=' not in arg:
+            continue
+        key, value = arg[2:].split('=', 1)
+        key = key.replace('-', '_')
+        if key not in DEFAULT_OPTIONS and key != 'run_one':
+            print(f"不明なオプション: {arg}")
+            sys.exit(1)
+        default = DEFAULT_OPTIONS.get(key, '')
+        options[key] = type(default)(value) if not isinstance(default, str) else value
+    return options
+
+
+def write_codelist(path: str, size: int):
+    """合成したcodelist（codelist.csv と同じ列構成）"""
+    with open(path, 'w', encoding='utf-8-sig') as f:
+        f.write('date,銘柄名,コード,業種,TOPIXに占める個別銘柄のウエイト,ニューインデックス区分,code\n')
+        for i in range(size):
+            code = f"{1300 + i:04d}0"
+            f.write(f",ベンチ{i},{code[:4]},業種{i % 10},0.0001,TOPIX Small 1,{code}\n")
+
+
+def start_mock(options: Dict) -> (subprocess.Popen, str):
+    """モックJPXサイトを別プロセスで起動し、base_url を返す"""
+    process = subprocess.Popen(
+        [sys.executable, str(BENCH_DIR / 'mock_jpx.py'), '--port=0',
+         f"--rows={options['rows']}", f"--file-size={options['file_size']}", f"--latency={options['latency']}"],
+        stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline()
+    return process, line.strip().split('=', 1)[1]
+
+
+def unlisted_files(downloads_dir: Path) -> List[str]:
+    """保存したHTMLのうち list_files（出力処理の入力の列挙）に含まれないファイル"""
+    from src.stored_files import list_codes, list_files
+
+    unlisted = []
+    for kind in ('html_summary', 'attachments'):
+        base_dir = downloads_dir / kind
+        for code in list_codes(base_dir):
+            code_dir = base_dir / code
+            stored = {f.name for f in code_dir.iterdir() if f.is_file() and not f.name.startswith('.')}
+            listed = {f.name for f in list_files(code_dir, "*.htm")}
+            unlisted.extend(f"{kind}/{code}/{name}" for name in sorted(stored - listed))
+    return unlisted
+
+
+def run_one(size: int, options: Dict) -> Dict:
+    """1規模分の計測（子プロセスで実行）"""
+    from src import scraper as scraper_module
+    from src.download_engine import HostRateLimiter
+    from src.transport import HttpTransport
+
+    # 計測用のフック（応答時間・待機時間を全スレッドから収集）
+    latencies = []
+    sleep_totals = {'all': 0.0, 'rate_limiter': 0.0}
+    lock = threading.Lock()
+
+    original_send = HttpTransport._send
+    def timed_send(self, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original_send(self, method, url, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - started)
+    HttpTransport._send = timed_send
+
+    original_acquire = HostRateLimiter.acquire
+    def timed_acquire(self, url):
+        waited = original_acquire(self, url)
+        with lock:
+            sleep_totals['rate_limiter'] += waited
+        return waited
+    HostRateLimiter.acquire = timed_acquire
+
+    original_sleep = time.sleep
+    def timed_sleep(seconds):
+        with lock:
+            sleep_totals['all'] += max(0.0, seconds)
+        original_sleep(seconds)
+    time.sleep = timed_sleep
+
+    mock, base_url = start_mock(options)
+    workdir = tempfile.mkdtemp(prefix='bench_crawler_')
+    os.chdir(workdir)
+    try:
+        write_codelist('codelist.csv', size)
+        scraper = scraper_module.JPXScraper(
+            max_workers=options['concurrency'], rate_limit=options['rate'], base_url=base_url,
+            dedup=bool(options['dedup']), compression=options['compress'] or None
+        )
+
+        cpu_started = time.process_time()
+        wall_started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = scraper.download_all_files_batch(
+                codelist_csv='codelist.csv',
+                download_types=options['types'].split(','),
+                delay_seconds=options['delay'],
+                delay_min=options['delay'],
+                delay_max=options['delay'],
+                company_workers=options['workers'],
+                from_zip=bool(options['from_zip']),
+            )
+        wall = time.perf_counter() - wall_started
+        cpu = time.process_time() - cpu_started
+    finally:
+        time.sleep = original_sleep
+        mock.terminate()
+        mock.wait()
+
+    # 受信・保存したバイト数（重複排除時のストア .blobs は二重に数えない）
+    total_bytes = sum(
+        f.stat().st_size for f in Path(workdir, 'downloads').rglob('*')
+        if f.is_file() and '.blobs' not in f.parts
+    )
+    files = results['statistics']['total_files_downloaded']
+    unlisted = unlisted_files(Path(workdir, 'downloads'))
+    if unlisted:
+        print(f"❌ list_files で列挙されないファイルがあります（{len(unlisted)}件）: {', '.join(unlisted[:5])}",
+              file=sys.stderr)
+        sys.exit(1)
+    cuts = quantiles(latencies, n=100) if len(latencies) >= 2 else [latencies[0] if latencies else 0.0] * 99
+
+    return {
+        'companies': size,
+        'successful_companies': results['successful_companies'],
+        'files': files,
+        'bytes': total_bytes,
+        'requests': len(latencies),
+        'wall_seconds': round(wall, 3),
+        'files_per_sec': round(files / wall, 2),
+        'companies_per_min': round(size / wall * 60, 2),
+        'bytes_per_sec': round(total_bytes / wall),
+        'latency_p50_ms': round(cuts[49] * 1000, 2),
+        'latency_p95_ms': round(cuts[94] * 1000, 2),
+        'sleep_seconds': round(sleep_totals['all'], 3),
+        'rate_limiter_wait_seconds': round(sleep_totals['rate_limiter'], 3),
+        'request_seconds': round(sum(latencies), 3),
+        'cpu_seconds': round(cpu, 3),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'connection_stats': results.get('connection_stats'),
+        'dedup': results.get('dedup'),
+        'timings': results.get('timings'),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def main():
+    options = parse_options(sys.argv[1:])
+
+    if 'run_one' in options:
+        print(json.dumps(run_one(int(options['run_one']), options)))
+        return
+
+    sizes = [int(s) for s in options['sizes'].split(',') if s]
+    print(f"🚀 クローラー性能計測: {', '.join(map(str, sizes))} 社")
+    print(f"   種類: {options['types']} / 開示 {options['rows']}件/社 / ファイル {options['file_size']:,} bytes / "
+          f"応答遅延 {options['latency']}秒")
+    print(f"   並列企業数 {options['workers']} / 同時ダウンロード {options['concurrency']} / "
+          f"レート {options['rate']}件/秒 / 企業間待機 {options['delay']}秒"
+          f"{' / XBRL ZIPから取り出し' if options['from_zip'] else ''}{' / 重複排除' if options['dedup'] else ''}"
+          f"{' / ' + options['compress'] + ' 圧縮' if options['compress'] else ''}")
+
+    runs = []
+    for size in sizes:
+        print(f"\n⏳ {size} 社を処理中...")
+        child = subprocess.run(
+            [sys.executable, __file__, f'--run-one={size}', *sys.argv[1:]],
+            capture_output=True, text=True
+        )
+        if child.returncode != 0:
+            print(f"❌ 計測に失敗しました:\n{child.stderr}")
+            sys.exit(1)
+        run = json.loads(child.stdout.strip().splitlines()[-1])
+        runs.append(run)
+        print(f"  ⏱️  {run['wall_seconds']:.1f}秒 / {run['files_per_sec']:.1f} ファイル/秒 / "
+              f"{run['companies_per_min']:.1f} 社/分 / {run['bytes_per_sec'] / 1024:.0f} KiB/秒")
+        print(f"  📶 応答時間 p50 {run['latency_p50_ms']:.1f}ms / p95 {run['latency_p95_ms']:.1f}ms "
+              f"（{run['requests']} リクエスト）")
+        print(f"  💤 待機 {run['sleep_seconds']:.1f}秒（うちレートリミッター {run['rate_limiter_wait_seconds']:.1f}秒） / "
+              f"作業 {run['request_seconds'] + run['cpu_seconds']:.1f}秒（応答待ち {run['request_seconds']:.1f}秒 + "
+              f"CPU {run['cpu_seconds']:.1f}秒） ※全スレッド合計")
+        print(f"  🧠 ピークRSS {run['peak_rss_mb']:.1f} MB")
+
+    report = {
+        'label': options['label'],
+        'git_revision': git_revision(),
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'options': {k: v for k, v in options.items() if k != 'run_one'},
+        'runs': runs,
+    }
+    results_dir = BENCH_DIR / 'results'
+    results_dir.mkdir(exist_ok=True)
+    output = results_dir / f"crawler_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n📄 計測結果を保存しました: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+開示情報テーブル解析のマイクロベンチマーク
+
+従来の BeautifulSoup + CSSセレクター（td:nth-of-type）による抽出と、
+src/disclosure_parser.py（lxml）による抽出を同じ基本情報ページで比較し、
+結果が一致することを確認した上で1ページあたりの処理時間を表示する。
+
+使用例:
+    # debug/ に保存された基本情報ページ（--debug 実行時の *_step3_basic_info.html）で計測
+    uv run python benchmarks/bench_disclosure_parser.py
+
+    # ファイル/ディレクトリを指定して計測（繰り返し回数の指定）
+    uv run python benchmarks/bench_disclosure_parser.py debug/ --repeat=50
+
+    # 保存済みページがない場合は、実ページと同じ構造の合成ページで計測
+    uv run python benchmarks/bench_disclosure_parser.py --synthetic=120
+"""
+
+import re
+import sys
+import time
+import urllib.parse
+from pathlib import Path
+from statistics import median
+from typing import Dict, List
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.disclosure_parser import parse_disclosures
+
+
+def legacy_extract(html: str) -> List[Dict]:
+    """従来の抽出処理（BeautifulSoup + CSSセレクター）"""
+    soup = BeautifulSoup(html, 'lxml')
+    disclosure_list = []
+
+    table_elms = soup.select('div.pagecontents > table')
+    if not table_elms:
+        table_elms = soup.find_all('table')
+    target_tables = [
+        t for t in table_elms
+        if t.get('id', '') and ('KaiJi' in t.get('id', '') or 'Fili' in t.get('id', '')) and 'open' not in t.get('id', '')
+    ]
+
+    for table_elm in target_tables:
+        inner_table = table_elm.select_one('table')
+        if not inner_table:
+            continue
+        for tr_elm in inner_table.select('tr'):
+            if not tr_elm.get('id'):
+                continue
+            info = {'date': '', 'title': '', 'pdf_url': '', 'xbrl_url': '', 'html_summary_url': '', 'attachments': []}
+
+            date_td = tr_elm.select_one('td:nth-of-type(1)')
+            if date_td:
+                info['date'] = date_td.get_text(strip=True)
+
+            title_td = tr_elm.select_one('td:nth-of-type(2)')
+            if title_td:
+                a_elm = title_td.select_one('a')
+                if a_elm:
+                    info['title'] = a_elm.get_text(strip=True)
+                    pdf_href = a_elm.get('href', '')
+                    if pdf_href:
+                        info['pdf_url'] = urllib.parse.urljoin('https://www2.jpx.co.jp', pdf_href.strip())
+
+            xbrl_td = tr_elm.select_one('td:nth-of-type(3)')
+            if xbrl_td:
+                img_elm = xbrl_td.select_one('img')
+                if img_elm:
+                    onclick = img_elm.get('onclick', '')
+                    if onclick:
+                        parts = onclick.replace('\n', '').strip().split(',')
+                        if len(parts) >= 3:
+                            xbrl_path = parts[-1].strip().replace("'", '').replace(');', '')
+                            if xbrl_path and xbrl_path.startswith('/'):
+                                info['xbrl_url'] = f'https://www2.jpx.co.jp/disc{xbrl_path}'
+                if not info['xbrl_url']:
+                    xbrl_link = xbrl_td.select_one('a')
+                    if xbrl_link:
+                        href = xbrl_link.get('href', '')
+                        if href and ('.zip' in href.lower() or 'xbrl' in href.lower()):
+                            info['xbrl_url'] = urllib.parse.urljoin('https://www2.jpx.co.jp', href)
+
+            html_td = tr_elm.select_one('td:nth-of-type(4)')
+            if html_td:
+                html_link = html_td.select_one('a')
+                if html_link:
+                    href = html_link.get('href', '')
+                    if href and '.htm' in href.lower():
+                        info['html_summary_url'] = urllib.parse.urljoin('https://www2.jpx.co.jp', href)
+                else:
+                    img_elm = html_td.select_one('img')
+                    if img_elm:
+                        onclick = img_elm.get('onclick', '')
+                        url_match = re.search(r"window\.open\('([^']+)'", onclick) if 'window.open' in onclick else None
+                        if url_match:
+                            info['html_summary_url'] = urllib.parse.urljoin('https://www2.jpx.co.jp', url_match.group(1))
+
+            attach_td = tr_elm.select_one('td:nth-of-type(5)')
+            if attach_td:
+                for link in attach_td.select('a'):
+                    attach_url = link.get('href', '')
+                    if attach_url:
+                        info['attachments'].append(urllib.parse.urljoin('https://www2.jpx.co.jp', attach_url))
+
+            if info['title']:
+                disclosure_list.append(info)
+
+    return disclosure_list
+
+
+def synthetic_page(rows: int, code: str = '99840') -> str:
+    """実際の基本情報ページと同じテーブル構造（テーブル構造.md 参照）の合成ページ"""
+    def row(table: str, i: int) -> str:
+        doc_id = f"0812202508{9 if 'Fili' in table else 0}{i:07d}"
+        day = 28 - (i % 28)
+        return f"""
+        <tr id="{table}_{i}">
+          <td align="center">2025/08/{day:02d}</td>
+          <td><div class="txtLink2"><div class="txtLink2_InnerDiv">
+            <a href="/disc/{code}/1401{doc_id}.pdf" target="linkWin9_{i}">
+              2026年３月期 第１四半期決算短信〔ＩＦＲＳ〕（連結） {i}
+            </a></div></div></td>
+          <td align="center"><img src="/common/images/icon_xbrl.gif" class="cursorHand" alt="XBRL"
+               onclick="doDownload(document.forms['JJK010040Form'],
+                       document.forms['JJK010040Form'].XBRLDownload,
+                       '/{code}/{doc_id}.zip');"/></td>
+          <td align="center"><a href="/disc/{code}/{doc_id}_tse-qcedifsm-{code}-ixbrl.htm" target="linkWin7_{i}">
+               <img src="/common/images/icon_html_03.gif" alt="HTMLファイル" /></a></td>
+          <td align="center"><a href="/disc/{code}/{doc_id}_qualitative.htm" target="linkWin8_{i}">
+               <img src="/common/images/icon_html_03.gif" alt="HTMLファイル" /></a></td>
+        </tr>"""
+
+    def table(table_id: str, n: int) -> str:
+        header = """<tr><th rowspan="2">開示日</th><th rowspan="2">表題</th><th rowspan="2">XBRL</th><th colspan="2">HTML</th></tr>
+                    <tr><th>サマリー</th><th>添付資料</th></tr>"""
+        body = ''.join(row(table_id, i) for i in range(n))
+        return f'<table id="{table_id}"><tr><td><table>{header}{body}</table></td></tr></table>'
+
+    info_rows = ''.join(f'<tr><th>項目{i}</th><td>値{i}</td></tr>' for i in range(60))
+    return f"""<html><head><title>基本情報</title></head><body>
+      <div class="pagecontents">
+        <table class="fontsizeS"><tr><th>会社名</th><td>サンプル株式会社</td></tr>{info_rows}</table>
+        {table('closeUpKaiJi0_open', 5)}
+        {table('closeUpKaiJi117', rows)}
+        {table('closeUpFili0', rows // 4)}
+      </div></body></html>"""
+
+
+def load_pages(paths: List[str]) -> List[str]:
+    files = []
+    for path in paths:
+        p = Path(path)
+        if p.is_dir():
+            files.extend(sorted(p.glob('*_step3_basic_info.html')))
+        elif p.exists():
+            files.append(p)
+    return [f.read_text(encoding='utf-8') for f in files]
+
+
+def bench(func, pages: List[str], repeat: int) -> float:
+    """1ページあたりの処理時間（ミリ秒、repeat回の中央値）"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for html in pages:
+            func(html)
+        timings.append((time.perf_counter() - started) / len(pages) * 1000)
+    return median(timings)
+
+
+def main():
+    repeat = 20
+    synthetic_rows = None
+    paths = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--repeat='):
+            repeat = int(arg.split('=')[1])
+        elif arg.startswith('--synthetic='):
+            synthetic_rows = int(arg.split('=')[1])
+        else:
+            paths.append(arg)
+
+    pages = [] if synthetic_rows else load_pages(paths or ['debug'])
+    if not pages:
+        rows = synthetic_rows or 120
+        print(f"保存済みの基本情報ページがないため、合成ページ（{rows}行）で計測します")
+        pages = [synthetic_page(rows)]
+
+    # 結果が一致することを確認
+    for html in pages:
+        if legacy_extract(html) != parse_disclosures(html):
+            print("❌ 従来の抽出処理と結果が一致しません")
+            sys.exit(1)
+
+    rows = sum(len(parse_disclosures(html)) for html in pages)
+    print(f"ページ数: {len(pages)} / 開示情報: {rows} 件 / 繰り返し: {repeat} 回")
+
+    legacy_ms = bench(legacy_extract, pages, repeat)
+    lxml_ms = bench(parse_disclosures, pages, repeat)
+    print(f"BeautifulSoup + CSSセレクター: {legacy_ms:8.2f} ms/ページ")
+    print(f"lxml (disclosure_parser):      {lxml_ms:8.2f} ms/ページ")
+    print(f"高速化: {legacy_ms / lxml_ms:.1f} 倍")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+インラインXBRL（決算短信サマリー）の値取り出しのマイクロベンチマーク
+
+従来の BeautifulSoup による全体の木の構築 + find_all(nonNumeric / nonFraction) と、
+src/ixbrl_reader.py（lxmlパーサーのターゲットによる逐次解析）を同じファイルで比較し、
+結果が一致することを確認した上で1ファイルあたりの処理時間とピークメモリを表示する。
+あわせて、解析済みの値のキャッシュ（src/fact_cache.py）から取り出す場合の処理時間も表示する。
+
+使用例:
+    # downloads/html_summary 配下のサマリー（圧縮保存・アーカイブ格納分を含む）で計測
+    uv run python benchmarks/bench_ixbrl_reader.py
+
+    # ディレクトリを指定して計測（ファイル数・繰り返し回数の指定）
+    uv run python benchmarks/bench_ixbrl_reader.py downloads/html_summary/13010 --files=50 --repeat=10
+
+    # 保存済みファイルがない場合は、実ファイルと同じ構造の合成サマリーで計測
+    uv run python benchmarks/bench_ixbrl_reader.py --synthetic=400
+"""
+
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+from statistics import median
+from typing import Dict, List
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.fact_cache import FactCache
+from src.ixbrl_reader import read_ixbrl_facts
+from src.stored_files import list_codes, list_files, read_text
+
+# 合成サマリーはXML宣言付きのXHTMLのため、HTMLパーサーで解析する旨の警告を抑止
+warnings.filterwarnings('ignore', message='.*XML.*')
+
+
+def legacy_extract(content: str) -> List[Dict]:
+    """従来の抽出処理（BeautifulSoup + find_all、html_summary_output.py の旧実装と同じ判定）"""
+    soup = BeautifulSoup(content, 'lxml')
+    facts = []
+    for tag in soup.find_all(re.compile(r'.*nonNumeric', re.I)) + soup.find_all(re.compile(r'.*nonFraction', re.I)):
+        is_nil = False
+        for attr_name, attr_value in tag.attrs.items():
+            if attr_name.endswith(':nil') or attr_name == 'nil':
+                if attr_value == 'true':
+                    is_nil = True
+                    break
+        value = ''
+        if not is_nil:
+            value = tag.get_text(strip=True)
+            if tag.get('sign') == '-' and value:
+                value = '-' + value
+        facts.append({'name': tag.get('name', ''), 'value': value, 'is_nil': is_nil})
+    return facts
+
+
+def synthetic_summary(facts: int, code: str = '99840') -> str:
+    """決算短信サマリー（tse-qcedifsm-*-ixbrl.htm）と同じ構成の合成ファイル"""
+    rows = []
+    for i in range(facts):
+        if i % 9 == 0:
+            cell = f'<ix:nonFraction name="tse-ed-t:Item{i}" contextRef="CurrentYTD" unitRef="JPY" xsi:nil="true"></ix:nonFraction>'
+        else:
+            sign = ' sign="-"' if i % 7 == 0 else ''
+            cell = (f'<ix:nonFraction name="tse-ed-t:Item{i}" contextRef="CurrentYTD" unitRef="JPY" '
+                    f'decimals="-6" scale="6" format="ixt:num-dot-decimal"{sign}>{i * 1234:,}</ix:nonFraction>')
+        rows.append(f'<tr><td class="label"><span>項目{i}</span></td><td class="value">{cell}</td>'
+                    f'<td class="note"><span style="font-family:MS Mincho">百万円</span></td></tr>')
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:ix="http://www.xbrl.org/2013/inlineXBRL"
+      xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:tse-ed-t="http://www.xbrl.tdnet.info/taxonomy/jp/tse/tdnet/ed/t/2014-01-12">
+<head><title>決算短信</title><style>td {{ padding: 0 }}</style></head>
+<body><div style="display:none"><ix:header><ix:hidden>
+  <ix:nonNumeric name="tse-ed-t:DocumentName" contextRef="CurrentYTD">決算短信</ix:nonNumeric>
+</ix:hidden></ix:header></div>
+<div class="page">
+  <p>会社名 <ix:nonNumeric name="tse-ed-t:CompanyName" contextRef="CurrentYTD">サンプル株式会社</ix:nonNumeric></p>
+  <p>コード番号 <ix:nonNumeric name="tse-ed-t:SecuritiesCode" contextRef="CurrentYTD">{code}</ix:nonNumeric></p>
+  <p>提出日 <ix:nonNumeric name="tse-ed-t:FilingDate" contextRef="CurrentYTD" format="ixt:date-year-month-day-cjk">2025年8月7日</ix:nonNumeric></p>
+  <ix:nonNumeric name="tse-ed-t:NotesForecasts" contextRef="CurrentYTD" escape="true"><p>業績予想は <b>現時点</b> の情報に基づく
+  <br/>ものです。</p></ix:nonNumeric>
+  <table>{''.join(rows)}</table>
+</div></body></html>"""
+
+
+def load_files(paths: List[str], limit: int) -> List[str]:
+    """ファイル、証券コードのディレクトリ、または html_summary ディレクトリからサマリーを読み込む"""
+    files = []
+    for path in paths:
+        p = Path(path)
+        if p.is_file():
+            files.append(p)
+            continue
+        files.extend(list_files(p, "*.htm"))
+        for code in list_codes(p):
+            if len(files) >= limit:
+                break
+            files.extend(list_files(p / code, "*.htm"))
+    return [read_text(f) for f in files[:limit]]
+
+
+def bench(func, contents: List[str], repeat: int) -> float:
+    """1ファイルあたりの処理時間（ミリ秒、repeat回の中央値）"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for content in contents:
+            func(content)
+        timings.append((time.perf_counter() - started) / len(contents) * 1000)
+    return median(timings)
+
+
+def peak_memory(func, contents: List[str]) -> float:
+    """1ファイルの処理中に確保したメモリのピーク（KiB、ファイル間の最大値）"""
+    peaks = []
+    for content in contents:
+        tracemalloc.start()
+        func(content)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return max(peaks) / 1024
+
+
+def main():
+    repeat = 10
+    limit = 100
+    synthetic_facts = None
+    paths = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--repeat='):
+            repeat = int(arg.split('=')[1])
+        elif arg.startswith('--files='):
+            limit = int(arg.split('=')[1])
+        elif arg.startswith('--synthetic='):
+            synthetic_facts = int(arg.split('=')[1])
+        else:
+            paths.append(arg)
+
+    contents = [] if synthetic_facts else load_files(paths or ['downloads/html_summary'], limit)
+    if not contents:
+        facts = synthetic_facts or 400
+        print(f"保存済みのサマリーがないため、合成サマリー（{facts}項目）で計測します")
+        contents = [synthetic_summary(facts)]
+
+    # 結果が一致することを確認
+    for content in contents:
+        if legacy_extract(content) != read_ixbrl_facts(content):
+            print("❌ 従来の抽出処理と結果が一致しません")
+            sys.exit(1)
+
+    facts = sum(len(read_ixbrl_facts(content)) for content in contents)
+    size = sum(len(content.encode('utf-8')) for content in contents)
+    print(f"ファイル数: {len(contents)} / 合計 {size:,} bytes / 値: {facts} 件 / 繰り返し: {repeat} 回")
+
+    legacy_ms = bench(legacy_extract, contents, repeat)
+    reader_ms = bench(read_ixbrl_facts, contents, repeat)
+    legacy_kib = peak_memory(legacy_extract, contents)
+    reader_kib = peak_memory(read_ixbrl_facts, contents)
+    print(f"BeautifulSoup + find_all:   {legacy_ms:8.2f} ms/ファイル / ピークメモリ {legacy_kib:9.1f} KiB")
+    print(f"逐次解析 (ixbrl_reader):    {reader_ms:8.2f} ms/ファイル / ピークメモリ {reader_kib:9.1f} KiB")
+    print(f"高速化: {legacy_ms / reader_ms:.1f} 倍 / メモリ: {legacy_kib / reader_kib:.1f} 分の1")
+
+    # キャッシュに保存済みの場合（2回目以降の実行・他のスクリプトからの参照）
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = FactCache(Path(tmp_dir) / 'fact_cache.sqlite3')
+        for content in contents:
+            cache.facts(content)
+        cached_ms = bench(cache.facts, contents, repeat)
+        cache.close()
+    print(f"キャッシュ (fact_cache):    {cached_ms:8.2f} ms/ファイル（逐次解析の {reader_ms / cached_ms:.1f} 倍）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+JPX適時開示サイトのローカルモック（ベンチマーク用）
+
+検索ページ・検索POST・基本情報ページ・開示ファイル（XBRL/HTMLサマリー/添付資料）を
+任意の証券コードについて合成して返す。記録不要で任意の社数のcodelistを処理できる。
+XBRL ZIPは実物と同じく XBRLData/Summary・XBRLData/Attachment にサマリーと添付資料を含む。
+
+使用例:
+    # 単体で起動（Ctrl+Cで終了）
+    uv run python benchmarks/mock_jpx.py --port=8790 --rows=5 --file-size=50000 --latency=0.02
+"""
+
+import io
+import re
+import sys
+import threading
+import time
+import urllib.parse
+import zipfile
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bench_disclosure_parser import synthetic_page
+
+
+SEARCH_RESULT = """<html><body><form name="JJK010010Form">
+<input type="hidden" name="BaseJh" value="mock-{code}"/>
+<input type="hidden" name="lstDspPg" value="1"/>
+<input type="hidden" name="dspGs" value="10"/>
+<input type="hidden" name="souKnsu" value="1"/>
+<input type="hidden" name="sniMtGmnId" value="JJK010010"/>
+<input type="hidden" name="dspJnKbn" value=""/>
+<input type="hidden" name="dspJnKmkNo" value=""/>
+<input type="hidden" name="jjHisiFlg" value=""/>
+<input type="hidden" name="ccJjCrpSelKekkLst_st[0].eqMgrCd" value="{code}"/>
+<input type="hidden" name="ccJjCrpSelKekkLst_st[0].eqMgrNm" value="モック{code}"/>
+</form></body></html>"""
+
+
+class MockJPXServer:
+    """合成したJPXサイトを返すローカルHTTPサーバー"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, rows: int = 5,
+                 file_size: int = 50_000, latency: float = 0.0):
+        """
+        Args:
+            host: 待ち受けアドレス
+            port: 待ち受けポート（0で空きポートを自動選択）
+            rows: 1社あたりの開示件数
+            file_size: 開示ファイル1件のサイズ（バイト）
+            latency: 応答前の待機秒数
+        """
+        self.rows = rows
+        self.file_size = file_size
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._payload = (b'<html><body>' + b'x' * max(0, file_size - 26) + b'</body></html>')[:max(file_size, 1)]
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/tseHpFront/"
+
+    def basic_info_page(self, code: str) -> str:
+        """基本情報ページ（開示情報テーブルのうち closeUpKaiJi を rows 件にする）"""
+        page = synthetic_page(self.rows * 4 // 5 or 1, code)
+        # 開示ファイル名を証券コードごとに一意にする
+        return page.replace('0812202508', f'08{code}')
+
+    def xbrl_zip(self, path: str) -> bytes:
+        """XBRL ZIP（/disc/{code}/{文書番号}.zip）: 開示ページのサマリー・添付資料と同じ内容を格納"""
+        code = path.rstrip('/').split('/')[-2]
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(f'XBRLData/Summary/tse-qcedifsm-{code}-ixbrl.htm', self._payload)
+            archive.writestr('XBRLData/Attachment/qualitative.htm', self._payload)
+        return buffer.getvalue()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, body, content_type='text/html; charset=utf-8'):
+                data = body.encode('utf-8') if isinstance(body, str) else body
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('ETag', f'"{zlib.crc32(data):08x}-{len(data):x}"')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _begin(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+            def do_GET(self):
+                self._begin()
+                if self.path.startswith('/tseHpFront/'):
+                    return self._send('<html><body>search</body></html>')
+                if self.path.endswith('.zip'):
+                    return self._send(server.xbrl_zip(self.path), 'application/zip')
+                self._send(server._payload)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0) or 0)
+                form = urllib.parse.parse_qs(self.rfile.read(length).decode('utf-8'))
+                self._begin()
+                if self.path.endswith('JJK010010Action.do'):
+                    return self._send(SEARCH_RESULT.format(code=form.get('eqMgrCd', [''])[0]))
+                if self.path.endswith('JJK010030Action.do'):
+                    return self._send(server.basic_info_page(form.get('mgrCd', [''])[0]))
+                self.send_error(404)
+
+        return Handler
+
+    def start(self) -> 'MockJPXServer':
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def main():
+    options = {}
+    for arg in sys.argv[1:]:
+        match = re.match(r'--(port|rows|file-size|latency)=(.+)', arg)
+        if match:
+            key = match.group(1).replace('-', '_')
+            options[key] = float(match.group(2)) if key == 'latency' else int(match.group(2))
+    options.setdefault('port', 8790)
+    server = MockJPXServer(**options)
+    print(f"🔗 --base-url={server.base_url}", flush=True)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
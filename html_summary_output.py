@@ -21,25 +21,76 @@ uv run python html_summary_output.py all
 # テスト用に任意銘柄数を処理
 uv run python html_summary_output.py all limit=10
 
+# 8プロセスで並列処理（all / codelist）
+uv run python html_summary_output.py all workers=8
+
+# 前回の出力を使わず全ファイルを解析し直す（既定では追加・変更されたファイルのみ解析）
+uv run python html_summary_output.py all full
+
+# 解析済みの値のキャッシュ（data/fact_cache.sqlite3）を使わずにHTMLを解析
+uv run python html_summary_output.py all full nocache
+
+# Parquet形式で出力（output/html_summary_parquet/{証券コード}.parquet、pyarrowが必要）
+uv run python html_summary_output.py all format=parquet
+
 """
 
+import io
 import os
 import re
 import sys
 import csv
 import codecs
+import queue
 import logging
+import logging.handlers
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
-from bs4 import BeautifulSoup
 import pandas as pd
 from tqdm import tqdm
 
+from src.ixbrl_reader import read_ixbrl_facts
+from src.extraction_manifest import ExtractionManifest, file_signature, mapping_digest
+from src.fact_cache import DEFAULT_DB_PATH, FactCache
+from src.parquet_output import output_path_for, read_rows, validate_output_format, write_rows
+from src.stored_files import has_code, list_codes, list_files, logical_name, read_text
+
+def load_tag_jp_mapping(indicators_csv_path: Path) -> Dict[str, str]:
+    """xbrl_financial_indicators.csvからタグと日本語名のマッピングを読み込む（全証券コードで共有）"""
+    indicators_csv_path = Path(indicators_csv_path)
+    tag_jp_mapping = {}
+    try:
+        if not indicators_csv_path.exists():
+            print(f"警告: {indicators_csv_path} が見つかりません。日本語名なしで処理を続けます。")
+            return tag_jp_mapping
+            
+        print(f"指標マッピングを読み込み中: {indicators_csv_path}")
+        
+        # UTF-8 BOM付きで読み込み
+        with open(indicators_csv_path, 'r', encoding='utf-8-sig') as file:
+            reader = csv.DictReader(file)
+            for row in reader:
+                xbrl_tag = row.get('xbrl_tag', '').strip()
+                japanese_name = row.get('japanese_name', '').strip()
+                if xbrl_tag:
+                    tag_jp_mapping[xbrl_tag] = japanese_name
+                    
+        print(f"  {len(tag_jp_mapping)}個のタグマッピングを読み込みました")
+        
+    except Exception as e:
+        print(f"エラー: 指標マッピングの読み込みに失敗しました: {e}")
+        
+    return tag_jp_mapping
+
+
 class XBRLTimeSeriesExtractor:
     """XBRLデータを時系列で抽出するクラス"""
     
-    def __init__(self, securities_code: str, html_summary_dir: str, indicators_csv_path: str):
+    def __init__(self, securities_code: str, html_summary_dir: str, indicators_csv_path: str,
+                 output_format: str = 'csv'):
         """
         初期化
         
@@ -47,15 +98,26 @@ class XBRLTimeSeriesExtractor:
             securities_code: 証券コード（5桁）
             html_summary_dir: html_summaryフォルダのパス
             indicators_csv_path: xbrl_financial_indicators.csvのパス
+            output_format: 出力形式（'csv' / 'parquet'）
         """
         self.securities_code = securities_code
         self.html_summary_dir = Path(html_summary_dir)
         self.indicators_csv_path = Path(indicators_csv_path)
         self.target_dir = self.html_summary_dir / securities_code
         
+        # 出力ファイル（output/html_summary/{証券コード}.csv または
+        # output/html_summary_parquet/{証券コード}.parquet）と抽出マニフェスト
+        self.output_dir = Path(__file__).parent / "output"
+        self.output_format = output_format
+        self.output_path = output_path_for(self.output_dir, securities_code, output_format)
+        self.manifest = ExtractionManifest(ExtractionManifest.path_for(self.output_path))
+        
         # XBRLタグと日本語名のマッピング
         self.tag_jp_mapping = {}
         
+        # 解析済みの値のキャッシュ（Noneなら毎回HTMLを解析）
+        self.fact_cache: Optional[FactCache] = None
+        
         # 基本情報タグ（これらは別扱い）
         self.basic_info_tags = {
             'tse-ed-t:FilingDate',
@@ -71,28 +133,15 @@ class XBRLTimeSeriesExtractor:
         # エラーファイルのリスト
         self.error_files = []
         
+        # 出力したファイルの記録（抽出マニフェストに保存）
+        self.file_records = []
+        
+        # 前回の出力から変更がないか（差分処理時）
+        self.unchanged = False
+        
     def load_indicators_mapping(self):
         """xbrl_financial_indicators.csvからタグと日本語名のマッピングを読み込む"""
-        try:
-            if not self.indicators_csv_path.exists():
-                print(f"警告: {self.indicators_csv_path} が見つかりません。日本語名なしで処理を続けます。")
-                return
-                
-            print(f"指標マッピングを読み込み中: {self.indicators_csv_path}")
-            
-            # UTF-8 BOM付きで読み込み
-            with open(self.indicators_csv_path, 'r', encoding='utf-8-sig') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    xbrl_tag = row.get('xbrl_tag', '').strip()
-                    japanese_name = row.get('japanese_name', '').strip()
-                    if xbrl_tag:
-                        self.tag_jp_mapping[xbrl_tag] = japanese_name
-                        
-            print(f"  {len(self.tag_jp_mapping)}個のタグマッピングを読み込みました")
-            
-        except Exception as e:
-            print(f"エラー: 指標マッピングの読み込みに失敗しました: {e}")
+        self.tag_jp_mapping = load_tag_jp_mapping(self.indicators_csv_path)
             
     def validate_securities_code(self) -> bool:
         """証券コードの妥当性をチェック"""
@@ -101,28 +150,28 @@ class XBRLTimeSeriesExtractor:
             print(f"エラー: 証券コードは5桁の英数字である必要があります: {self.securities_code}")
             return False
             
-        # 対象ディレクトリの存在チェック
-        if not self.target_dir.exists():
+        # 対象ディレクトリ（または企業ごとのアーカイブ）の存在チェック
+        if not has_code(self.html_summary_dir, self.securities_code):
             print(f"エラー: 指定された証券コードのディレクトリが存在しません: {self.target_dir}")
             return False
             
         return True
         
     def get_html_files(self) -> List[Path]:
-        """対象ディレクトリからHTMLファイルを取得し、日付順にソート"""
-        html_files = list(self.target_dir.glob("*.htm"))
+        """対象ディレクトリからHTMLファイル（圧縮保存された *.htm.gz / *.htm.zst を含む）を取得し、日付順にソート"""
+        html_files = list_files(self.target_dir, "*.htm")
         
         if not html_files:
             print(f"警告: {self.target_dir} にHTMLファイルが見つかりません")
             return []
             
-        # ファイル名の日付でソート（YYYY-MM-DD形式）
+        # ファイル名の日付でソート（YYYY-MM-DD形式、同じ日付はファイル名順）
         def extract_date(file_path):
-            filename = file_path.name
+            filename = logical_name(file_path)
             date_match = re.match(r'^(\d{4}-\d{2}-\d{2})', filename)
             if date_match:
-                return date_match.group(1)
-            return '9999-99-99'  # 日付が取得できない場合は最後にソート
+                return date_match.group(1), filename
+            return '9999-99-99', filename  # 日付が取得できない場合は最後にソート
             
         html_files.sort(key=extract_date)
         
@@ -141,12 +190,11 @@ class XBRLTimeSeriesExtractor:
                 
             disclosure_date = date_match.group(1)
             
-            # HTMLファイルを読み込み
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                
-            # BeautifulSoupで解析（lxmlパーサーを使用）
-            soup = BeautifulSoup(content, 'lxml')
+            # HTMLファイルを読み込み（圧縮されていれば展開）
+            content = read_text(file_path)
+            
+            # ix:nonNumeric / ix:nonFraction の値（キャッシュがあれば解析済みの結果を使う）
+            facts = self.fact_cache.facts(content) if self.fact_cache else read_ixbrl_facts(content)
             
             # 基本情報の抽出
             basic_info = {
@@ -161,30 +209,14 @@ class XBRLTimeSeriesExtractor:
             # XBRLタグを抽出
             all_tags = {}
             
-            # ix:nonNumericタグとix:nonFractionタグを抽出
-            non_numeric_tags = soup.find_all(re.compile(r'.*nonNumeric', re.I))
-            non_fraction_tags = soup.find_all(re.compile(r'.*nonFraction', re.I))
-            
-            for tag in non_numeric_tags + non_fraction_tags:
-                tag_name = tag.get('name', '')
+            # ix:nonNumericタグとix:nonFractionタグを逐次解析で抽出（nil値は空文字、sign="-" はマイナス記号付き）
+            for fact in facts:
+                tag_name = fact['name']
                 if not tag_name:
                     continue
                     
-                # nil値チェック（修正版）
-                is_nil = False
-                for attr_name, attr_value in tag.attrs.items():
-                    if attr_name.endswith(':nil') or attr_name == 'nil':
-                        if attr_value == 'true':
-                            is_nil = True
-                            break
-                
-                if is_nil:
-                    tag_value = ''
-                else:
-                    tag_value = tag.get_text(strip=True) if tag else ''
-                    # sign属性がマイナスの場合、マイナス記号を付ける
-                    if tag and tag.get('sign') == '-' and tag_value:
-                        tag_value = '-' + tag_value
+                tag_value = fact['value']
+                is_nil = fact['is_nil']
                     
                 # 基本情報タグの処理
                 if tag_name == 'tse-ed-t:FilingDate':
@@ -225,59 +257,131 @@ class XBRLTimeSeriesExtractor:
             self.error_files.append((str(file_path), str(e)))
             return None
             
-    def process_all_files(self):
-        """全HTMLファイルを処理"""
+    def build_rows(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """1ファイル分の抽出結果からCSV行を作成"""
+        rows = []
+        basic_info = data['basic_info']
+        tags = data['tags']
+        
+        # 各タグについてCSV行を作成
+        for tag_name, tag_info in tags.items():
+            # タグ情報を取得
+            tag_value = tag_info['value']
+            is_nil = tag_info['is_nil']
+            
+            # 日本語名を取得
+            japanese_name = self.tag_jp_mapping.get(tag_name, '')
+            
+            # 追加メタデータの算出
+            has_value = bool(tag_value and tag_value.strip())
+            
+            # データ種別の判定
+            if is_nil:
+                data_type = 'nil'
+            elif not has_value and not is_nil:
+                data_type = 'empty'  # テキストが空だがnil属性もない
+            else:
+                data_type = 'value'
+            
+            # 改良版CSV行を作成
+            row = {
+                'date': basic_info['date'],
+                'filing_date': basic_info['filing_date'],
+                'code': basic_info['code'],
+                'company_name': basic_info['company_name'],
+                'fiscal_year_end': basic_info['fiscal_year_end'],
+                'quarterly_period': basic_info['quarterly_period'],
+                'factor_tag': tag_name,
+                'factor_jp': japanese_name,
+                'value': tag_value,
+                'has_value': has_value,
+                'is_nil': is_nil,
+                'data_type': data_type
+            }
+            
+            rows.append(row)
+            
+        return rows
+        
+    def load_previous_rows(self, records: List[Dict], signatures: Dict[str, Dict]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        変更のないファイルの行を既存の出力ファイルから取り出す
+        
+        Args:
+            records: 抽出マニフェストに記録済みのファイル一覧（出力順）
+            signatures: 現在のファイル名 -> 変更検知用の値
+        
+        Returns:
+            ファイル名 -> CSV行のリスト（出力ファイルの行数がマニフェストと合わない場合は空）
+        """
+        if not any(signatures.get(record['name']) == record['signature'] for record in records):
+            return {}
+        try:
+            if self.output_format == 'parquet':
+                rows = read_rows(self.output_path)
+            else:
+                with open(self.output_path, 'r', encoding='utf-8-sig', newline='') as csvfile:
+                    rows = list(csv.DictReader(csvfile))
+        except (OSError, ValueError, csv.Error):
+            return {}
+        if len(rows) != sum(record['rows'] for record in records):
+            return {}
+            
+        previous = {}
+        offset = 0
+        for record in records:
+            if signatures.get(record['name']) == record['signature']:
+                previous[record['name']] = rows[offset:offset + record['rows']]
+            offset += record['rows']
+        return previous
+        
+    def process_all_files(self, incremental: bool = False):
+        """
+        全HTMLファイルを処理
+        
+        incremental=True の場合は抽出マニフェストと比較し、追加・変更されたファイルのみ解析する。
+        変更のないファイルの行は既存の出力から引き継ぎ、ファイルの順（開示日順）に並べて結合する。
+        追加・変更・削除されたファイルがなければ unchanged を True にして何もしない。
+        """
         html_files = self.get_html_files()
         
         if not html_files:
             return
             
+        names = [logical_name(file_path) for file_path in html_files]
+        signatures = {name: file_signature(file_path) for name, file_path in zip(names, html_files)}
+        
+        previous = {}
+        if incremental:
+            records = self.manifest.load(self.output_path, mapping_digest(self.tag_jp_mapping)) or []
+            if [(record['name'], record['signature']) for record in records] == [(name, signatures[name]) for name in names]:
+                self.unchanged = True
+                self.file_records = records
+                print(f"  変更なし: {self.output_path.name} を更新しません")
+                return
+            previous = self.load_previous_rows(records, signatures)
+            
+        targets = [file_path for name, file_path in zip(names, html_files) if name not in previous]
         print(f"\n{self.securities_code}の決算短信を処理中...")
+        if incremental:
+            print(f"  解析: {len(targets)}ファイル / 既存の出力から引き継ぎ: {len(previous)}ファイル")
         
-        for file_path in tqdm(html_files, desc="ファイル処理中"):
+        parsed = {}
+        for file_path in tqdm(targets, desc="ファイル処理中"):
+            error_count = len(self.error_files)
             data = self.extract_xbrl_data(file_path)
             
-            if data:
-                basic_info = data['basic_info']
-                tags = data['tags']
+            # 解析に失敗したファイルはマニフェストに記録せず、次回も解析する
+            if len(self.error_files) == error_count:
+                parsed[logical_name(file_path)] = self.build_rows(data) if data else []
                 
-                # 各タグについてCSV行を作成
-                for tag_name, tag_info in tags.items():
-                    # タグ情報を取得
-                    tag_value = tag_info['value']
-                    is_nil = tag_info['is_nil']
-                    
-                    # 日本語名を取得
-                    japanese_name = self.tag_jp_mapping.get(tag_name, '')
-                    
-                    # 追加メタデータの算出
-                    has_value = bool(tag_value and tag_value.strip())
-                    
-                    # データ種別の判定
-                    if is_nil:
-                        data_type = 'nil'
-                    elif not has_value and not is_nil:
-                        data_type = 'empty'  # テキストが空だがnil属性もない
-                    else:
-                        data_type = 'value'
-                    
-                    # 改良版CSV行を作成
-                    row = {
-                        'date': basic_info['date'],
-                        'filing_date': basic_info['filing_date'],
-                        'code': basic_info['code'],
-                        'company_name': basic_info['company_name'],
-                        'fiscal_year_end': basic_info['fiscal_year_end'],
-                        'quarterly_period': basic_info['quarterly_period'],
-                        'factor_tag': tag_name,
-                        'factor_jp': japanese_name,
-                        'value': tag_value,
-                        'has_value': has_value,
-                        'is_nil': is_nil,
-                        'data_type': data_type
-                    }
-                    
-                    self.results.append(row)
+        # ファイルの順に行を結合し、出力したファイルを記録
+        for name in names:
+            rows = previous[name] if name in previous else parsed.get(name)
+            if rows is None:
+                continue
+            self.results.extend(rows)
+            self.file_records.append({'name': name, 'signature': signatures[name], 'rows': len(rows)})
                     
     def save_to_csv(self, output_path: Optional[str] = None):
         """結果をCSVファイルに保存"""
@@ -287,9 +391,8 @@ class XBRLTimeSeriesExtractor:
             
         if output_path is None:
             # output/html_summary階層に出力
-            output_dir = Path(__file__).parent / "output" / "html_summary"
-            output_dir.mkdir(parents=True, exist_ok=True)
-            output_path = output_dir / f"{self.securities_code}.csv"
+            output_path = output_path_for(self.output_dir, self.securities_code, 'csv')
+            output_path.parent.mkdir(parents=True, exist_ok=True)
         else:
             output_path = Path(output_path)
             
@@ -310,6 +413,41 @@ class XBRLTimeSeriesExtractor:
             
         print(f"  {len(self.results)}行のデータを出力しました")
         
+    def save_to_parquet(self, output_path: Optional[str] = None):
+        """
+        結果をParquetファイルに保存
+        
+        CSVと同じ列に加えて value を数値に変換した value_num を持ち、date は日付型、
+        has_value / is_nil は真偽値、繰り返しの多い文字列の列は辞書エンコードで保存する。
+        """
+        if not self.results:
+            print("警告: 出力するデータがありません")
+            return
+            
+        if output_path is None:
+            # output/html_summary_parquet階層に出力
+            output_path = output_path_for(self.output_dir, self.securities_code, 'parquet')
+        else:
+            output_path = Path(output_path)
+            
+        print(f"\nParquetファイルを出力中: {output_path}")
+        write_rows(self.results, output_path)
+        print(f"  {len(self.results)}行のデータを出力しました")
+        
+    def save_output(self):
+        """出力形式（csv / parquet）に応じて結果を保存"""
+        if self.output_format == 'parquet':
+            self.save_to_parquet()
+        else:
+            self.save_to_csv()
+        
+    def save_manifest(self):
+        """出力したファイルを抽出マニフェストに記録（出力ファイルを書き込まなかった場合は記録を削除）"""
+        if self.results:
+            self.manifest.save(self.output_path, mapping_digest(self.tag_jp_mapping), self.file_records)
+        else:
+            self.manifest.delete()
+            
     def print_summary(self):
         """処理結果のサマリーを表示"""
         print("\n" + "="*60)
@@ -317,6 +455,9 @@ class XBRLTimeSeriesExtractor:
         print("="*60)
         print(f"証券コード: {self.securities_code}")
         print(f"処理ファイル数: {len(self.get_html_files())}") 
+        if self.unchanged:
+            print(f"出力レコード数: {sum(record['rows'] for record in self.file_records)}（変更なし）")
+            return
         print(f"出力レコード数: {len(self.results)}")
         
         if self.error_files:
@@ -337,9 +478,17 @@ class XBRLTimeSeriesExtractor:
             print(f"データ期間: {dates[0]} 〜 {dates[-1]}")
 
 
-def process_single_code(securities_code: str, html_summary_dir: Path, indicators_csv_path: Path) -> bool:
+def process_single_code(securities_code: str, html_summary_dir: Path, indicators_csv_path: Path,
+                        tag_jp_mapping: Optional[Dict[str, str]] = None, incremental: bool = True,
+                        fact_cache: Optional[FactCache] = None, output_format: str = 'csv') -> bool:
     """単一の証券コードを処理
     
+    Args:
+        tag_jp_mapping: 読み込み済みの指標マッピング（省略時は indicators_csv_path から読み込む）
+        incremental: 抽出マニフェストを使い、追加・変更されたファイルのみ解析する（Falseなら全ファイルを解析）
+        fact_cache: 解析済みの値のキャッシュ（Noneならキャッシュを使わない）
+        output_format: 出力形式（'csv' / 'parquet'）
+    
     Returns:
         bool: 処理成功時True、失敗時False
     """
@@ -348,21 +497,28 @@ def process_single_code(securities_code: str, html_summary_dir: Path, indicators
         extractor = XBRLTimeSeriesExtractor(
             securities_code=securities_code,
             html_summary_dir=html_summary_dir,
-            indicators_csv_path=indicators_csv_path
+            indicators_csv_path=indicators_csv_path,
+            output_format=output_format
         )
         
         # 証券コードの妥当性チェック
         if not extractor.validate_securities_code():
             return False
             
-        # 指標マッピングの読み込み（初回のみ表示）
-        extractor.load_indicators_mapping()
+        # 指標マッピングの読み込み（一括処理では読み込み済みのものを共有）
+        if tag_jp_mapping is not None:
+            extractor.tag_jp_mapping = tag_jp_mapping
+        else:
+            extractor.load_indicators_mapping()
+        extractor.fact_cache = fact_cache
         
-        # 全ファイルの処理
-        extractor.process_all_files()
+        # 全ファイルの処理（差分処理では追加・変更されたファイルのみ解析）
+        extractor.process_all_files(incremental)
         
-        # CSVファイルに保存
-        extractor.save_to_csv()
+        # 出力ファイルと抽出マニフェストに保存（変更がなければ既存の出力をそのまま使う）
+        if not extractor.unchanged:
+            extractor.save_output()
+            extractor.save_manifest()
         
         # サマリーの表示
         extractor.print_summary()
@@ -375,8 +531,94 @@ def process_single_code(securities_code: str, html_summary_dir: Path, indicators
         return False
 
 
-def process_codelist(codelist_path: Path, html_summary_dir: Path, indicators_csv_path: Path):
-    """codelist.csvから全証券コードを処理"""
+# プロセスプールの各ワーカーで共有する指標マッピング（ワーカーごとに1回だけ読み込む）とキャッシュの接続
+_worker_tag_jp_mapping = None
+_worker_fact_cache = None
+# ワーカーのログレコード（銘柄ごとに結果と一緒に親プロセスへ返し、親のハンドラで出力する）
+_worker_log_records = queue.SimpleQueue()
+
+
+def _init_worker(indicators_csv_path: Path, fact_cache_path: Optional[Path], log_level: int):
+    global _worker_tag_jp_mapping, _worker_fact_cache
+    # fork で引き継いだ親のハンドラ（ログファイル・標準エラー）には直接書き込まない
+    root_logger = logging.getLogger()
+    root_logger.handlers = [logging.handlers.QueueHandler(_worker_log_records)]
+    root_logger.setLevel(log_level)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _worker_tag_jp_mapping = load_tag_jp_mapping(indicators_csv_path)
+    if fact_cache_path is not None:
+        _worker_fact_cache = FactCache(fact_cache_path)
+
+
+def _process_code_in_worker(securities_code: str, html_summary_dir: Path,
+                            indicators_csv_path: Path, incremental: bool,
+                            output_format: str) -> Tuple[bool, str, List[logging.LogRecord]]:
+    """ワーカープロセスで1銘柄を処理し、(成否, 処理中の出力, ログレコード) を返す（進捗バーは表示しない）"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+        success = process_single_code(securities_code, html_summary_dir, indicators_csv_path,
+                                      _worker_tag_jp_mapping, incremental, _worker_fact_cache, output_format)
+    records = []
+    while not _worker_log_records.empty():
+        records.append(_worker_log_records.get())
+    return success, output.getvalue(), records
+
+
+class CodeRunner:
+    """
+    一括処理で証券コードごとの処理を実行する
+    
+    workers が2以上の場合は、対象の証券コードを全てプロセスプールへ投入しておき、
+    run() では入力順に結果を受け取って、その銘柄の出力とログをまとめて表示する
+    （ワーカーのログは親プロセスのハンドラで出力するため、ログファイルにも残る）。
+    指標マッピングの読み込みとキャッシュの接続は、ワーカー（逐次処理では全体）ごとに1回だけ行う。
+    """
+    
+    def __init__(self, codes: List[str], html_summary_dir: Path, indicators_csv_path: Path, workers: int = 1,
+                 incremental: bool = True, fact_cache_path: Optional[Path] = None, output_format: str = 'csv'):
+        self.html_summary_dir = html_summary_dir
+        self.indicators_csv_path = indicators_csv_path
+        self.incremental = incremental
+        self.output_format = output_format
+        self.fact_cache = None
+        self.executor = None
+        self.futures = {}
+        if workers > 1:
+            print(f"並列処理: {workers}プロセス")
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                initargs=(indicators_csv_path, fact_cache_path, logging.getLogger().getEffectiveLevel())
+            )
+            for code in codes:
+                self.futures[code] = self.executor.submit(
+                    _process_code_in_worker, code, html_summary_dir, indicators_csv_path, incremental, output_format
+                )
+        else:
+            self.tag_jp_mapping = load_tag_jp_mapping(indicators_csv_path)
+            if fact_cache_path is not None:
+                self.fact_cache = FactCache(fact_cache_path)
+    
+    def run(self, securities_code: str) -> bool:
+        """証券コードを処理（並列時は投入済みの処理の完了を待つ）"""
+        if self.executor is None:
+            return process_single_code(securities_code, self.html_summary_dir, self.indicators_csv_path,
+                                       self.tag_jp_mapping, self.incremental, self.fact_cache, self.output_format)
+        success, output, records = self.futures.pop(securities_code).result()
+        print(output, end='')
+        for record in records:
+            logging.getLogger(record.name).handle(record)
+        return success
+    
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+        if self.fact_cache is not None:
+            self.fact_cache.close()
+
+
+def process_codelist(codelist_path: Path, html_summary_dir: Path, indicators_csv_path: Path, workers: int = 1,
+                     incremental: bool = True, fact_cache_path: Optional[Path] = None, output_format: str = 'csv'):
+    """codelist.csvから全証券コードを処理（workers >= 2 でプロセスプールによる並列処理）"""
     
     # ログ設定
     log_dir = Path(__file__).parent / "logs"
@@ -423,26 +665,30 @@ def process_codelist(codelist_path: Path, html_summary_dir: Path, indicators_csv
         failed_codes = []
         skipped_codes = []
         
-        # 各証券コードを処理
+        # 各証券コードを処理（ディレクトリのある証券コードのみワーカーへ投入）
+        targets = [code for code in codes if has_code(html_summary_dir, code)]
+        runner = CodeRunner(targets, html_summary_dir, indicators_csv_path, workers, incremental, fact_cache_path,
+                            output_format)
         for i, code in enumerate(codes, 1):
             print(f"\n[{i}/{len(codes)}] 証券コード {code} を処理中...")
             logging.info(f"[{i}/{len(codes)}] 証券コード {code} の処理開始")
             
             # html_summaryフォルダの存在チェック
             code_dir = html_summary_dir / code
-            if not code_dir.exists():
+            if not has_code(html_summary_dir, code):
                 logging.warning(f"証券コード {code} のディレクトリが存在しません: {code_dir}")
                 print(f"  スキップ: ディレクトリが存在しません")
                 skipped_codes.append(code)
                 continue
                 
             # 処理実行
-            if process_single_code(code, html_summary_dir, indicators_csv_path):
+            if runner.run(code):
                 success_codes.append(code)
                 logging.info(f"証券コード {code} の処理完了")
             else:
                 failed_codes.append(code)
                 logging.error(f"証券コード {code} の処理失敗")
+        runner.close()
                 
         # 最終サマリー
         print("\n" + "="*60)
@@ -467,8 +713,9 @@ def process_codelist(codelist_path: Path, html_summary_dir: Path, indicators_csv
         print(f"エラー: codelist.csv処理中にエラーが発生しました: {str(e)}")
 
 
-def process_all_codes(html_summary_dir: Path, indicators_csv_path: Path, limit: int = None):
-    """downloads/html_summaryフォルダの全証券コードを処理"""
+def process_all_codes(html_summary_dir: Path, indicators_csv_path: Path, limit: int = None, workers: int = 1,
+                      incremental: bool = True, fact_cache_path: Optional[Path] = None, output_format: str = 'csv'):
+    """downloads/html_summaryフォルダの全証券コードを処理（workers >= 2 でプロセスプールによる並列処理）"""
     
     # ログ設定
     log_dir = Path(__file__).parent / "logs"
@@ -494,9 +741,8 @@ def process_all_codes(html_summary_dir: Path, indicators_csv_path: Path, limit:
         print(f"エラー: html_summaryディレクトリが見つかりません: {html_summary_dir}")
         return
     
-    # 証券コードディレクトリを取得
-    code_dirs = [d for d in html_summary_dir.iterdir() if d.is_dir()]
-    code_dirs.sort()  # ソート
+    # 証券コードディレクトリを取得（企業ごとのアーカイブに格納された証券コードを含む）
+    code_dirs = [html_summary_dir / code for code in list_codes(html_summary_dir)]
     
     # limitが指定されている場合は制限
     if limit:
@@ -512,6 +758,8 @@ def process_all_codes(html_summary_dir: Path, indicators_csv_path: Path, limit:
     skipped_codes = []
     
     # 各証券コードを処理
+    runner = CodeRunner([code_dir.name for code_dir in code_dirs], html_summary_dir, indicators_csv_path, workers,
+                        incremental, fact_cache_path, output_format)
     for i, code_dir in enumerate(code_dirs, 1):
         securities_code = code_dir.name
         
@@ -519,7 +767,7 @@ def process_all_codes(html_summary_dir: Path, indicators_csv_path: Path, limit:
         logging.info(f"[{i}/{len(code_dirs)}] 証券コード {securities_code} 開始")
         
         try:
-            if process_single_code(securities_code, html_summary_dir, indicators_csv_path):
+            if runner.run(securities_code):
                 success_codes.append(securities_code)
                 logging.info(f"証券コード {securities_code} 処理成功")
             else:
@@ -530,6 +778,7 @@ def process_all_codes(html_summary_dir: Path, indicators_csv_path: Path, limit:
             failed_codes.append(securities_code)
             logging.error(f"証券コード {securities_code} 処理中に例外: {str(e)}")
             print(f"  エラー: {e}")
+    runner.close()
     
     # 処理結果サマリー
     print("\n" + "="*60)
@@ -558,15 +807,26 @@ def parse_arguments():
         print("  単一証券コード: python html_summary_output.py [証券コード]")
         print("  一括処理: python html_summary_output.py codelist")
         print("  全銘柄処理: python html_summary_output.py all [limit=数値]")
+        print("  並列処理（all / codelist）: workers=プロセス数")
+        print("  全ファイルを解析し直す: full（既定では追加・変更されたファイルのみ解析）")
+        print("  解析済みの値のキャッシュを使わない: nocache")
+        print("  出力形式: format=csv（既定） / format=parquet")
         print("\n例:")
         print("  python html_summary_output.py 13010")
         print("  python html_summary_output.py codelist")
         print("  python html_summary_output.py all")
         print("  python html_summary_output.py all limit=10")
+        print("  python html_summary_output.py all workers=8")
+        print("  python html_summary_output.py all full")
+        print("  python html_summary_output.py all format=parquet")
         sys.exit(1)
     
     command = sys.argv[1]
     limit = None
+    workers = 1
+    full = False
+    nocache = False
+    output_format = 'csv'
     
     # limit=x オプションの解析
     if len(sys.argv) > 2:
@@ -580,36 +840,66 @@ def parse_arguments():
                 except ValueError:
                     print("エラー: limit値は整数を指定してください（例: limit=10）")
                     sys.exit(1)
+            elif arg.startswith('workers='):
+                try:
+                    workers = int(arg.split('=')[1])
+                    if workers <= 0:
+                        print("エラー: workers値は1以上の整数を指定してください")
+                        sys.exit(1)
+                except ValueError:
+                    print("エラー: workers値は整数を指定してください（例: workers=8）")
+                    sys.exit(1)
+            elif arg == 'full':
+                full = True
+            elif arg == 'nocache':
+                nocache = True
+            elif arg.startswith('format='):
+                # 出力形式の検証（parquetは pyarrow パッケージが必要）
+                try:
+                    output_format = validate_output_format(arg.split('=', 1)[1])
+                except (ValueError, ImportError) as e:
+                    print(f"エラー: {e}")
+                    sys.exit(1)
             else:
                 print(f"エラー: 不明なオプション: {arg}")
                 sys.exit(1)
     
-    return command, limit
+    return command, limit, workers, full, nocache, output_format
 
 
 def main():
     """メイン処理"""
-    command, limit = parse_arguments()
+    command, limit, workers, full, nocache, output_format = parse_arguments()
     
     # パスの設定
     html_summary_dir = Path(__file__).parent / "downloads" / "html_summary"
     indicators_csv_path = Path(__file__).parent / "xbrl_financial_indicators.csv"
+    fact_cache_path = None if nocache else Path(__file__).parent / DEFAULT_DB_PATH
     
     if command.lower() == "codelist":
         if limit:
             print("警告: codelist処理ではlimitオプションは無視されます")
         # codelist.csv一括処理
         codelist_path = Path(__file__).parent / "codelist.csv"
-        process_codelist(codelist_path, html_summary_dir, indicators_csv_path)
+        process_codelist(codelist_path, html_summary_dir, indicators_csv_path, workers, not full, fact_cache_path,
+                         output_format)
     elif command.lower() == "all":
         # 全銘柄処理
-        process_all_codes(html_summary_dir, indicators_csv_path, limit)
+        process_all_codes(html_summary_dir, indicators_csv_path, limit, workers, not full, fact_cache_path,
+                          output_format)
     else:
         if limit:
             print("警告: 単一証券コード処理ではlimitオプションは無視されます")
+        if workers > 1:
+            print("警告: 単一証券コード処理ではworkersオプションは無視されます")
         # 単一証券コード処理
         securities_code = command
-        if process_single_code(securities_code, html_summary_dir, indicators_csv_path):
+        fact_cache = FactCache(fact_cache_path) if fact_cache_path else None
+        success = process_single_code(securities_code, html_summary_dir, indicators_csv_path,
+                                      incremental=not full, fact_cache=fact_cache, output_format=output_format)
+        if fact_cache is not None:
+            fact_cache.close()
+        if success:
             print("\n処理が完了しました。")
         else:
             sys.exit(1)
@@ -5,22 +5,25 @@
 """
 
 import os
-import re
 import csv
 import codecs
 from pathlib import Path
 from collections import defaultdict, Counter
-from typing import Dict, List, Any, Set
-from bs4 import BeautifulSoup
+from typing import Dict, List, Any, Optional, Set
 from tqdm import tqdm
 import pandas as pd
 
+from src.fact_cache import DEFAULT_DB_PATH, FactCache
+from src.ixbrl_reader import read_ixbrl_facts
+from src.stored_files import list_files, read_text
+
 class BulkXBRLAnalyzer:
     """全matomeファイルのXBRL一括解析クラス"""
     
-    def __init__(self, matome_dir: str, jpen_list_path: str = None):
+    def __init__(self, matome_dir: str, jpen_list_path: str = None, fact_cache: Optional[FactCache] = None):
         self.matome_dir = Path(matome_dir)
         self.jpen_list_path = jpen_list_path
+        self.fact_cache = fact_cache  # 解析済みの値のキャッシュ（Noneなら毎回HTMLを解析）
         self.jpen_mapping = {}  # XBRL tag -> {japanese_name, english_name} のマッピング
         self.all_tags = defaultdict(lambda: {
             'xbrl_tag': '',
@@ -73,8 +76,8 @@ class BulkXBRLAnalyzer:
         """全ファイルの一括解析"""
         print("matomeフォルダ内のファイル一覧取得中...")
         
-        # HTMLファイルのリストアップ
-        html_files = list(self.matome_dir.glob("*.htm"))
+        # HTMLファイルのリストアップ（圧縮保存された *.htm.gz / *.htm.zst を含む）
+        html_files = list_files(self.matome_dir, "*.htm")
         self.total_files = len(html_files)
         
         print(f"発見されたHTMLファイル: {self.total_files}個")
@@ -102,17 +105,19 @@ class BulkXBRLAnalyzer:
     def _analyze_single_file(self, file_path: Path):
         """個別ファイルの解析"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
+            content = read_text(file_path)
                 
-            # BeautifulSoupでXML解析
-            soup = BeautifulSoup(content, 'lxml-xml')
+            # ix:nonNumeric / ix:nonFraction の値と属性（キャッシュがあれば解析済みの結果を使う）
+            if self.fact_cache is not None:
+                facts = self.fact_cache.facts(content)
+            else:
+                facts = read_ixbrl_facts(content, attributes=True)
             
             # 会計基準の判定
             accounting_standard = self._determine_accounting_standard(file_path.name, content)
             
             # XBRLタグの抽出
-            xbrl_tags = self._extract_xbrl_tags(soup)
+            xbrl_tags = self._extract_xbrl_tags(facts)
             
             # 各タグの情報を集計
             for tag_info in xbrl_tags:
@@ -121,30 +126,28 @@ class BulkXBRLAnalyzer:
         except Exception as e:
             raise Exception(f"ファイル解析エラー: {e}")
             
-    def _extract_xbrl_tags(self, soup) -> List[Dict[str, Any]]:
-        """XBRLタグの抽出"""
+    def _extract_xbrl_tags(self, facts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """XBRLタグの抽出（read_ixbrl_facts(content, attributes=True) の結果から）"""
         tags = []
         
-        # ix:nonNumericタグとix:nonFractionタグを抽出
-        non_numeric_tags = soup.find_all(re.compile(r'.*nonNumeric', re.I))
-        non_fraction_tags = soup.find_all(re.compile(r'.*nonFraction', re.I))
-        
-        all_xbrl_tags = non_numeric_tags + non_fraction_tags
-        
-        for tag in all_xbrl_tags:
-            tag_name = tag.get('name', '')
+        for fact in facts:
+            tag_name = fact['name']
             if not tag_name:
                 continue
                 
-            # タグ情報の抽出
+            # タグ情報の抽出（サンプル値は sign 属性によるマイナス記号を付けない元の表記）
+            # is_nil は xsi:nil="true" の値で True になり、値は空文字（サンプル値に含めない）
+            value = fact['value']
+            if fact['sign'] == '-' and value:
+                value = value[1:]
             tag_info = {
                 'xbrl_tag': tag_name,
-                'value': tag.get_text(strip=True) if tag else '',
-                'context_ref': tag.get('contextRef', tag.get('contextref', '')),
-                'unit_ref': tag.get('unitRef', tag.get('unitref', '')),
-                'format': tag.get('format', ''),
-                'decimals': tag.get('decimals', ''),
-                'is_nil': tag.get(re.compile(r'.*nil', re.I)) == 'true'
+                'value': value,
+                'context_ref': fact['context_ref'],
+                'unit_ref': fact['unit_ref'],
+                'format': fact['format'],
+                'decimals': fact['decimals'],
+                'is_nil': fact['is_nil']
             }
             
             tags.append(tag_info)
@@ -350,11 +353,16 @@ class BulkXBRLAnalyzer:
 
 if __name__ == "__main__":
     # 実行
-    matome_dir = "/home/jptyf/workspace/jpx_kaiji_service/downloads/matome"
-    output_csv = "/home/jptyf/workspace/jpx_kaiji_service/xbrl_financial_indicators.csv"
-    jpen_list_csv = "/home/jptyf/workspace/jpx_kaiji_service/xbrl_financial_indicators_JPEN_list.csv"
+    project_dir = "/home/jptyf/workspace/jpx_kaiji_service"
+    matome_dir = os.path.join(project_dir, "downloads", "matome")
+    output_csv = os.path.join(project_dir, "xbrl_financial_indicators.csv")
+    jpen_list_csv = os.path.join(project_dir, "xbrl_financial_indicators_JPEN_list.csv")
+    fact_cache_db = os.path.join(project_dir, DEFAULT_DB_PATH)
     
-    analyzer = BulkXBRLAnalyzer(matome_dir, jpen_list_csv)
+    # html_summary_output.py と同じキャッシュを使い、解析済みのファイルはHTMLを解析し直さない
+    fact_cache = FactCache(fact_cache_db)
+    analyzer = BulkXBRLAnalyzer(matome_dir, jpen_list_csv, fact_cache)
     analyzer.analyze_all_files()
     analyzer.print_summary()
-    analyzer.export_to_csv(output_csv)
\ No newline at end of file
+    analyzer.export_to_csv(output_csv)
+    fact_cache.close()
\ No newline at end of file
@@ -17,6 +17,44 @@
     # 例3: 500行目から再開してHTMLと添付資料を収集
         uv run python kaiji_downloader.py batch-download codelist.csv --types=html,attachments --resume=500 --delay-min=2 --delay-max=5
 
+    # 例3b: 中断した一括ダウンロードを、チェックポイントから完了済み企業をスキップして再開
+        uv run python kaiji_downloader.py batch-download codelist.csv --types=html,attachments --resume=auto --delay-min=2 --delay-max=5
+
+    # 例4: 同時4ダウンロード・合計2リクエスト/秒で収集
+        uv run python kaiji_downloader.py batch-download codelist.csv --types=html,attachments --concurrency=4 --rate=2
+
+    # 例5: 前回以降に新しい開示があった企業のみ収集（夜間の差分更新）
+        uv run python kaiji_downloader.py batch-download codelist.csv --types=html,attachments --incremental
+
+    # 例6: 3社を並列に処理（各社は独立したセッション、レート上限は全体で共有）
+        uv run python kaiji_downloader.py batch-download codelist.csv --types=html,attachments --workers=3 --rate=2
+
+    # 例7: 固定待機の代わりに応答状況でレートを自動調整（0.5～4リクエスト/秒の範囲）
+        uv run python kaiji_downloader.py batch-download codelist.csv --types=html,attachments --adaptive --rate-min=0.5 --rate-max=4
+
+    # 例8: 実サイトとのやり取りをカセットに記録し、ローカルの代替サーバーで再生
+        uv run python kaiji_downloader.py batch-download codelist.csv --types=html,attachments --max=20 --record=data/cassette.sqlite3
+        uv run python kaiji_downloader.py standin-server data/cassette.sqlite3 --port=8790 --latency=0.2 --error-rate=0.05
+        uv run python kaiji_downloader.py batch-download codelist.csv --types=html,attachments --max=20 --base-url=http://127.0.0.1:8790/tseHpFront/
+
+    # 例9: XBRLと一緒に取得し、HTMLサマリー・添付資料はXBRL ZIPから取り出す（ZIPにないファイルのみHTTP）
+        uv run python kaiji_downloader.py batch-download codelist.csv --types=xbrl,html,attachments --from-zip
+
+    # 例10: 同じ内容のファイルを1つの実体にまとめて保存（既存のダウンロード先は dedup コマンドで移行）
+        uv run python kaiji_downloader.py batch-download codelist.csv --types=html,attachments --dedup
+        uv run python kaiji_downloader.py dedup downloads
+
+    # 例11: HTMLサマリー・添付資料をgzip圧縮で保存（既存ファイルは compress コマンドで変換）
+        uv run python kaiji_downloader.py batch-download codelist.csv --types=html,attachments --compress=gzip
+        uv run python kaiji_downloader.py compress downloads --method=gzip
+
+    # 例12: 企業ごとに1つのアーカイブ（downloads/packs/{証券コード}.zip）へ保存（既存ファイルは pack コマンドで格納）
+        uv run python kaiji_downloader.py batch-download codelist.csv --types=html,attachments --pack
+        uv run python kaiji_downloader.py pack downloads
+
+    # 例13: 決算短信の開示予定が近い企業、TOPIX Core30などウエイトの大きい企業から順に収集
+        uv run python kaiji_downloader.py batch-download codelist_newindex.csv --types=html,attachments --order=priority
+
 
 実行コマンド一覧
 
@@ -33,9 +71,14 @@ codelist.csvから取得する場合
 
 import json
 import csv
+import math
 import os
+import sys
 from datetime import datetime
+from src.blob_store import BlobStore
+from src.cassette import CassetteStore, StandInServer
 from src.scraper import JPXScraper
+from src.stored_files import validate_compression
 
 
 def test_single_company(stock_code: str = "9984", debug: bool = False, fetch_disclosure: bool = False, 
@@ -71,7 +114,7 @@ def test_single_company(stock_code: str = "9984", debug: bool = False, fetch_dis
         disclosure_docs = []
         if fetch_disclosure:
             print("\n【適時開示情報を取得中...】")
-            disclosure_docs = scraper.fetch_disclosure_documents(stock_code)
+            disclosure_docs = scraper.fetch_disclosure_documents(stock_code) or []
             
             if disclosure_docs:
                 print(f"\n【適時開示情報】 {len(disclosure_docs)}件")
@@ -159,11 +202,26 @@ def test_single_company(stock_code: str = "9984", debug: bool = False, fetch_dis
 def batch_download_all(
     csv_file: str = "codelist.csv",
     download_types: list = None,
-    resume_from: int = 0,
+    resume_from: int | str = 0,
     max_companies: int = None,
     delay_seconds: int = 3,
     delay_min: int | None = None,
     delay_max: int | None = None,
+    max_workers: int = 1,
+    rate_limit: float = 1.0,
+    incremental: bool = False,
+    company_workers: int = 1,
+    adaptive_rate: bool = False,
+    rate_min: float = 0.2,
+    rate_max: float = 5.0,
+    max_retries: int = 3,
+    record_path: str | None = None,
+    base_url: str | None = None,
+    from_zip: bool = False,
+    dedup: bool = False,
+    compression: str | None = None,
+    pack: bool = False,
+    order: str = 'file',
 ):
     """
     codelist.csvから全銘柄のデータを一括ダウンロード
@@ -171,16 +229,40 @@ def batch_download_all(
     Args:
         csv_file: 銘柄リストCSVファイル
         download_types: ダウンロード種類のリスト
-        resume_from: 再開する行番号
+        resume_from: 再開する行番号（"auto" でチェックポイントから自動再開）
         max_companies: 最大処理企業数
         delay_seconds: 企業間待機秒数
+        max_workers: ファイルダウンロードの同時実行数
+        rate_limit: ホストごとの最大リクエスト数/秒
+        incremental: 差分クロール（新しい開示がある企業のみダウンロード）
+        company_workers: 並列に処理する企業数
+        adaptive_rate: 応答状況に応じてレートを自動調整（企業間待機は行わない）
+        rate_min: 適応レート制御時のレート下限
+        rate_max: 適応レート制御時のレート上限
+        max_retries: GETリクエストの最大再試行回数
+        record_path: 全てのやり取りを記録するカセットのパス（記録モード）
+        base_url: 検索ページのベースURL（ローカルの代替サーバーで再生する場合に指定）
+        from_zip: HTMLサマリー・添付資料をXBRL ZIPから取り出す（XBRLも取得する場合のみ）
+        dedup: 同じ内容のファイルを内容アドレスのストアで1つにまとめる（ファイル名はハードリンク）
+        compression: HTMLサマリー・添付資料を圧縮して保存する方式（'gzip' / 'zstd'）
+        pack: 企業ごとのダウンロードファイルを1つのアーカイブ（downloads/packs/{証券コード}.zip）にまとめる
+        order: 処理順（'file': codelistの行順 / 'priority': 開示予定・指数区分・ウエイトの優先度順）
     """
     print(f"🚀 全銘柄一括ダウンロード開始")
     print(f"📋 対象ファイル: {csv_file}")
     print("-" * 50)
     
+    # 記録モード
+    cassette = CassetteStore(record_path) if record_path else None
+    if cassette:
+        print(f"📼 記録モード: {record_path}")
+    
     # スクレイパーのインスタンス作成
-    scraper = JPXScraper(debug=False)
+    scraper_options = {'base_url': base_url} if base_url else {}
+    scraper = JPXScraper(debug=False, max_workers=max_workers, rate_limit=rate_limit,
+                         adaptive_rate=adaptive_rate, rate_min=rate_min, rate_max=rate_max,
+                         max_retries=max_retries, cassette=cassette, dedup=dedup, compression=compression,
+                         pack=pack, **scraper_options)
     
     # バッチダウンロード実行
     results = scraper.download_all_files_batch(
@@ -191,11 +273,193 @@ def batch_download_all(
         delay_seconds=delay_seconds,
         delay_min=delay_min,
         delay_max=delay_max,
+        incremental=incremental,
+        company_workers=company_workers,
+        from_zip=from_zip,
+        order=order,
     )
     
+    if cassette:
+        print(f"📼 記録件数: {cassette.count()} 件")
+        cassette.close()
+    
     return results
 
 
+def run_standin_server(cassette_path: str = "data/cassette.sqlite3", port: int = 8790,
+                       latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                       error_status: int = 503, reset_rate: float = 0.0):
+    """
+    記録済みのやり取りを返すローカルの代替JPXサーバーを起動
+    
+    Args:
+        cassette_path: 再生するカセットのパス
+        port: 待ち受けポート
+        latency: 応答前の待機秒数
+        jitter: 待機秒数に加える一様乱数の幅（秒）
+        error_rate: エラー応答を返す割合（0〜1）
+        error_status: 注入するHTTPステータス
+        reset_rate: 応答せずに接続を切断する割合（0〜1）
+    """
+    if not os.path.exists(cassette_path):
+        print(f"❌ エラー: {cassette_path} が見つかりません")
+        return
+    
+    store = CassetteStore(cassette_path)
+    server = StandInServer(store, port=port, latency=latency, jitter=jitter,
+                           error_rate=error_rate, error_status=error_status, reset_rate=reset_rate)
+    print(f"📼 代替サーバー起動: {store.count()} 件のやり取りを再生")
+    print(f"🔗 --base-url={server.base_url}")
+    print(f"⏱️  遅延: {latency}秒（+0～{jitter}秒） / エラー注入: {error_rate * 100:.1f}%（HTTP {error_status}） / 切断: {reset_rate * 100:.1f}%")
+    print("Ctrl+Cで終了します")
+    server.serve_forever()
+    print(f"📊 リクエスト: {server.stats['requests']} 件（再生 {server.stats['hits']} / 未記録 {server.stats['misses']} / "
+          f"エラー注入 {server.stats['injected_errors']} / 切断 {server.stats['injected_resets']}）")
+    store.close()
+
+
+def dedup_downloads(download_root: str = "downloads"):
+    """
+    既存のダウンロードファイルを内容アドレスのストアに登録し、同じ内容のファイルをハードリンクにまとめる
+    
+    Args:
+        download_root: ダウンロード先のルートディレクトリ
+    """
+    import hashlib
+    
+    if not os.path.isdir(download_root):
+        print(f"❌ エラー: {download_root} が見つかりません")
+        return
+    
+    blob_store = BlobStore(os.path.join(download_root, ".blobs"))
+    print(f"🔗 重複排除: {download_root}")
+    scanned = 0
+    for directory, dirnames, filenames in os.walk(download_root):
+        # ストア自体と書き込み途中の一時ファイルは対象外
+        dirnames[:] = [d for d in dirnames if os.path.join(directory, d) != blob_store.root]
+        for filename in filenames:
+            if filename.endswith('.part'):
+                continue
+            path = os.path.join(directory, filename)
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            blob_store.adopt(path, digest.hexdigest())
+            scanned += 1
+    
+    stats = blob_store.snapshot()
+    print(f"📊 {scanned} ファイル: 新規 {stats['stored']} 件 / 同一内容 {stats['deduplicated']} 件、"
+          f"削減 {stats['deduplicated_bytes']:,} bytes")
+
+
+def compress_downloads(target_dir: str = "downloads", method: str = "gzip"):
+    """
+    保存済みのHTMLファイル（*.htm）を圧縮形式（*.htm.gz / *.htm.zst）に変換
+    
+    変換後のファイルは html_summary_output.py などの読み込み処理でそのまま扱える。
+    マニフェストの保存先も更新する（マニフェストには実行ディレクトリからの相対パスで記録されているため、
+    target_dir が絶対パスでも同じ形式に揃えて照合する）。
+    
+    Args:
+        target_dir: 対象ディレクトリ（配下を再帰的に処理）
+        method: 圧縮方式（'gzip' / 'zstd'）
+    """
+    from pathlib import Path
+    from src.download_engine import copy_to_file
+    from src.manifest import DownloadManifest
+    from src.stored_files import COMPRESSION_SUFFIXES
+    
+    # ファイルの変換を始める前に圧縮方式を検証（zstdは zstandard パッケージが必要）
+    try:
+        method = validate_compression(method)
+    except (ValueError, ImportError) as e:
+        print(f"❌ エラー: {e}")
+        return
+    if not os.path.isdir(target_dir):
+        print(f"❌ エラー: {target_dir} が見つかりません")
+        return
+    
+    manifest = DownloadManifest()
+    print(f"💾 圧縮変換: {target_dir} → *.htm{COMPRESSION_SUFFIXES[method]}")
+    converted = 0
+    unmatched = 0
+    before_bytes = 0
+    after_bytes = 0
+    for path in sorted(Path(target_dir).rglob("*.htm")):
+        if ".blobs" in path.parts:
+            continue
+        compressed_path = f"{path}{COMPRESSION_SUFFIXES[method]}"
+        with open(path, 'rb') as f:
+            size, sha256 = copy_to_file(f, compressed_path, compression=method)
+        before_bytes += path.stat().st_size
+        after_bytes += size
+        # 相対パス（通常の記録形式）→ 絶対パスの順に、マニフェストの記録と同じ形式で照合
+        for old_path in dict.fromkeys((os.path.relpath(path), os.path.abspath(path))):
+            new_path = f"{old_path}{COMPRESSION_SUFFIXES[method]}"
+            if manifest.relocate(old_path, new_path, size, sha256):
+                break
+        else:
+            unmatched += 1
+        path.unlink()
+        converted += 1
+    manifest.close()
+    
+    ratio = before_bytes / after_bytes if after_bytes else 0
+    print(f"📊 {converted} ファイル: {before_bytes:,} → {after_bytes:,} bytes（{ratio:.1f}倍）")
+    if unmatched:
+        print(f"⚠️ マニフェストに記録が見つからなかったファイル: {unmatched} 件（保存先を更新していません）")
+
+
+def pack_downloads(download_root: str = "downloads"):
+    """
+    既存のダウンロードファイルを証券コードごとのアーカイブ（downloads/packs/{証券コード}.zip）にまとめる
+    
+    Args:
+        download_root: ダウンロード先のルートディレクトリ
+    """
+    from src.manifest import DownloadManifest
+    from src.pack_store import KIND_DIRS, PackWriter
+    
+    if not os.path.isdir(download_root):
+        print(f"❌ エラー: {download_root} が見つかりません")
+        return
+    
+    codes = set()
+    for kind_dir in KIND_DIRS:
+        kind_path = os.path.join(download_root, kind_dir)
+        if os.path.isdir(kind_path):
+            codes.update(d for d in os.listdir(kind_path) if os.path.isdir(os.path.join(kind_path, d)))
+    
+    manifest = DownloadManifest()
+    writer = PackWriter(download_root)
+    print(f"📦 アーカイブへの格納: {download_root}（{len(codes)} 社）")
+    for i, code in enumerate(sorted(codes), 1):
+        packed = writer.pack_company(code, manifest)
+        print(f"[{i}/{len(codes)}] {code}: {packed} ファイル")
+    manifest.close()
+    
+    stats = writer.snapshot()
+    print(f"📊 {stats['packed_companies']} 社 / {stats['packed_files']} ファイルを格納しました")
+
+
+def parse_rate_option(arg: str) -> float:
+    """
+    レート指定（--rate / --rate-min / --rate-max、件/秒）を正の数として解析
+
+    数値でない・0以下の値はエラーメッセージを表示して終了する。
+    """
+    name, value = arg.split("=", 1)
+    try:
+        rate = float(value)
+    except ValueError:
+        rate = math.nan
+    if not (math.isfinite(rate) and rate > 0):
+        print(f"❌ エラー: {name} には正の数（件/秒）を指定してください: {value}")
+        sys.exit(1)
+    return rate
+
+
 def process_batch(csv_file: str = "codelist.csv"):
     """
     CSVファイルから証券コードを読み込んでバッチ処理
@@ -317,6 +581,21 @@ if __name__ == "__main__":
         delay_seconds = 3
         delay_min = None
         delay_max = None
+        max_workers = 1
+        rate_limit = 1.0
+        incremental = False
+        company_workers = 1
+        adaptive_rate = False
+        rate_min = 0.2
+        rate_max = 5.0
+        max_retries = 3
+        record_path = None
+        base_url = None
+        from_zip = False
+        dedup = False
+        compression = None
+        pack = False
+        order = 'file'
         
         # コマンドライン引数の解析
         for i, arg in enumerate(sys.argv[3:], 3):
@@ -324,7 +603,8 @@ if __name__ == "__main__":
                 types_str = arg.split("=")[1]
                 download_types = types_str.split(",")
             elif arg.startswith("--resume="):
-                resume_from = int(arg.split("=")[1])
+                value = arg.split("=")[1]
+                resume_from = value if value == "auto" else int(value)
             elif arg.startswith("--max="):
                 max_companies = int(arg.split("=")[1])
             elif arg.startswith("--delay="):
@@ -333,6 +613,52 @@ if __name__ == "__main__":
                 delay_min = float(arg.split("=")[1])
             elif arg.startswith("--delay-max="):
                 delay_max = float(arg.split("=")[1])
+            elif arg.startswith("--concurrency="):
+                max_workers = max(1, int(arg.split("=")[1]))
+            elif arg.startswith("--rate="):
+                rate_limit = parse_rate_option(arg)
+            elif arg == "--incremental":
+                incremental = True
+            elif arg.startswith("--workers="):
+                company_workers = max(1, int(arg.split("=")[1]))
+            elif arg == "--adaptive":
+                adaptive_rate = True
+            elif arg.startswith("--rate-min="):
+                rate_min = parse_rate_option(arg)
+            elif arg.startswith("--rate-max="):
+                rate_max = parse_rate_option(arg)
+            elif arg.startswith("--retries="):
+                max_retries = max(0, int(arg.split("=")[1]))
+            elif arg.startswith("--record="):
+                record_path = arg.split("=", 1)[1]
+            elif arg.startswith("--base-url="):
+                base_url = arg.split("=", 1)[1]
+            elif arg == "--from-zip":
+                from_zip = True
+            elif arg == "--dedup":
+                dedup = True
+            elif arg.startswith("--compress="):
+                compression = arg.split("=", 1)[1]
+            elif arg == "--pack":
+                pack = True
+            elif arg.startswith("--order="):
+                order = arg.split("=", 1)[1]
+        if rate_min > rate_max:
+            print(f"❌ エラー: --rate-min（{rate_min}）は --rate-max（{rate_max}）以下にしてください")
+            sys.exit(1)
+        if order not in ('file', 'priority'):
+            print(f"❌ エラー: 不明な処理順: {order}（file / priority）")
+            sys.exit(1)
+        # 圧縮方式の検証（zstdは zstandard パッケージが必要）
+        try:
+            compression = validate_compression(compression)
+        except (ValueError, ImportError) as e:
+            print(f"❌ エラー: {e}")
+            sys.exit(1)
+        # アーカイブ格納時はファイルがアーカイブへ移るため、ハードリンクによる重複排除は行わない
+        if pack and dedup:
+            print("⚠️  --pack 指定時は --dedup を無効にします")
+            dedup = False
         # 範囲指定の正規化
         if delay_min is None and delay_max is None:
             # 旧オプション(--delay)のみ指定時は固定待機
@@ -354,7 +680,62 @@ if __name__ == "__main__":
             delay_seconds,
             delay_min,
             delay_max,
+            max_workers,
+            rate_limit,
+            incremental,
+            company_workers,
+            adaptive_rate,
+            rate_min,
+            rate_max,
+            max_retries,
+            record_path,
+            base_url,
+            from_zip,
+            dedup,
+            compression,
+            pack,
+            order,
         )
+    elif len(sys.argv) > 1 and sys.argv[1] == "standin-server":
+        # 記録済みのやり取りを返すローカルの代替サーバー
+        cassette_path = sys.argv[2] if len(sys.argv) > 2 else "data/cassette.sqlite3"
+        server_options = {}
+        for arg in sys.argv[3:]:
+            if arg.startswith("--port="):
+                server_options['port'] = int(arg.split("=")[1])
+            elif arg.startswith("--latency="):
+                server_options['latency'] = float(arg.split("=")[1])
+            elif arg.startswith("--jitter="):
+                server_options['jitter'] = float(arg.split("=")[1])
+            elif arg.startswith("--error-rate="):
+                server_options['error_rate'] = float(arg.split("=")[1])
+            elif arg.startswith("--error-status="):
+                server_options['error_status'] = int(arg.split("=")[1])
+            elif arg.startswith("--reset-rate="):
+                server_options['reset_rate'] = float(arg.split("=")[1])
+        run_standin_server(cassette_path, **server_options)
+    elif len(sys.argv) > 1 and sys.argv[1] == "dedup":
+        # 既存のダウンロードファイルの重複排除
+        download_root = sys.argv[2] if len(sys.argv) > 2 else "downloads"
+        dedup_downloads(download_root)
+    elif len(sys.argv) > 1 and sys.argv[1] == "compress":
+        # 保存済みHTMLファイルの圧縮変換
+        target_dir = sys.argv[2] if len(sys.argv) > 2 else "downloads"
+        method = "gzip"
+        for arg in sys.argv[3:]:
+            if arg.startswith("--method="):
+                method = arg.split("=", 1)[1]
+        # 圧縮方式の検証（zstdは zstandard パッケージが必要、不足時は何も変換せずに終了）
+        try:
+            method = validate_compression(method)
+        except (ValueError, ImportError) as e:
+            print(f"❌ エラー: {e}")
+            sys.exit(1)
+        compress_downloads(target_dir, method)
+    elif len(sys.argv) > 1 and sys.argv[1] == "pack":
+        # 既存のダウンロードファイルを企業ごとのアーカイブへ格納
+        download_root = sys.argv[2] if len(sys.argv) > 2 else "downloads"
+        pack_downloads(download_root)
     elif len(sys.argv) > 1 and sys.argv[1] == "batch-download-test":
         # テスト用：最初の5社のみ処理
         csv_file = sys.argv[2] if len(sys.argv) > 2 else "codelist.csv"
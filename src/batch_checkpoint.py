@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class BatchCheckpoint:
+    """
+    一括ダウンロードの企業ごとの処理結果を記録する追記型チェックポイント（JSONL）
+
+    1社の処理が終わるたびに1行追記してfsyncするため、途中でプロセスが
+    停止しても完了済み企業の結果は失われない。再開時はこのログを読み込み、
+    完了済み企業をスキップする。最終レポートもこのログから組み立てる。
+
+    行の形式:
+        {"event": "start", "time": ..., "codelist": ..., "download_types": [...]}
+        {"event": "company", "time": ..., "result": {...}}
+    """
+
+    # 再開時にスキップする（再処理不要な）ステータス
+    # （開示情報の取得に失敗した企業は 'error' のため、no_disclosure_data は取得できた上で開示がない企業のみ）
+    # （no_new_files は全ファイルが取得済みでエラーのなかった企業）
+    COMPLETED_STATUSES = ('success', 'up_to_date', 'no_new_files', 'no_disclosure_data')
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: チェックポイントファイルのパス
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def path_for(codelist_csv: str, directory: str = "data") -> str:
+        """銘柄リストCSVごとのチェックポイントファイルのパス"""
+        stem = os.path.splitext(os.path.basename(codelist_csv))[0]
+        return os.path.join(directory, f"batch_checkpoint_{stem}.jsonl")
+
+    def read_events(self) -> List[Dict]:
+        """
+        ログの全イベントを読み込み
+
+        書き込み途中で停止した末尾の不完全な行は無視する。
+        """
+        events = []
+        if not os.path.exists(self.path):
+            return events
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return events
+
+    def start_time(self) -> Optional[str]:
+        """ログ上の最初の開始時刻（ログがなければNone）"""
+        for event in self.read_events():
+            if event.get('event') == 'start':
+                return event.get('time')
+        return None
+
+    def company_results(self) -> Dict[int, Dict]:
+        """
+        記録済みの企業別結果を取得（同じ行番号は後の記録を優先）
+
+        Returns:
+            行番号 -> 企業別処理結果 のマッピング
+        """
+        results = {}
+        for event in self.read_events():
+            if event.get('event') == 'company':
+                result = event['result']
+                results[result['row_number']] = result
+        return results
+
+    def completed_rows(self) -> Dict[int, Dict]:
+        """再処理不要な企業（行番号 -> 結果）を取得"""
+        return {
+            row: result for row, result in self.company_results().items()
+            if result.get('status') in self.COMPLETED_STATUSES
+        }
+
+    def reset(self):
+        """ログを破棄して新しい実行を開始（再開しない通常実行時）"""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def record_start(self, codelist_csv: str, download_types: List[str]):
+        """実行（または再開）の開始を記録"""
+        self._append({
+            'event': 'start',
+            'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'codelist': codelist_csv,
+            'download_types': download_types
+        })
+
+    def record_company(self, company_result: Dict):
+        """1社分の処理結果を記録"""
+        self._append({
+            'event': 'company',
+            'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'result': company_result
+        })
+
+    def _append(self, event: Dict):
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
@@ -0,0 +1,103 @@
+import os
+import threading
+from typing import Dict
+
+
+class BlobStore:
+    """
+    内容アドレス（sha256）でファイルの実体を保存するストア
+
+    実体は downloads/.blobs/{sha256の先頭2文字}/{sha256} に1つだけ置き、
+    証券コードごとのわかりやすいファイル名（{開示日}_{証券コード}_{表題}_*.htm 等）は
+    その実体へのハードリンクにする。訂正開示などで同じ内容が複数の名前で保存されても
+    ディスク使用量は1ファイル分になる。
+
+    ハードリンクを作成できないファイルシステムでは、通常のファイルのまま保存する。
+    """
+
+    def __init__(self, root: str = "downloads/.blobs"):
+        """
+        Args:
+            root: 実体の保存先ディレクトリ（ハードリンクのため保存先と同じファイルシステムに置く）
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._link_supported = True
+        self.stats = {'stored': 0, 'deduplicated': 0, 'deduplicated_bytes': 0, 'linked_without_download': 0}
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def has(self, sha256: str) -> bool:
+        return bool(sha256) and os.path.exists(self.blob_path(sha256))
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _replace_with_link(self, blob: str, local_file: str):
+        """local_file を blob へのハードリンクにアトミックに置き換える"""
+        tmp_path = f"{local_file}.link.part"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        os.link(blob, tmp_path)
+        os.replace(tmp_path, local_file)
+
+    def adopt(self, local_file: str, sha256: str) -> bool:
+        """
+        保存したファイルをストアに登録
+
+        同じ内容の実体が既にあれば local_file をそのハードリンクに置き換え（重複分のディスクを解放）、
+        なければ local_file を新しい実体として登録する。
+
+        Returns:
+            既存の実体と重複していた場合True
+        """
+        if not self._link_supported:
+            return False
+        blob = self.blob_path(sha256)
+        try:
+            if os.path.exists(blob):
+                if os.path.samefile(blob, local_file):
+                    return False
+                size = os.path.getsize(local_file)
+                self._replace_with_link(blob, local_file)
+                self._count('deduplicated')
+                self._count('deduplicated_bytes', size)
+                return True
+
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            try:
+                os.link(local_file, blob)
+                self._count('stored')
+                return False
+            except FileExistsError:
+                # 別スレッドが同じ内容を先に登録した
+                return self.adopt(local_file, sha256)
+        except OSError as e:
+            # ハードリンク非対応（別ファイルシステム・権限など）の場合は重複排除を無効化
+            self._link_supported = False
+            print(f"⚠️  ハードリンクを作成できないため重複排除を無効にします: {e}")
+            return False
+
+    def link(self, sha256: str, local_file: str) -> bool:
+        """
+        既存の実体へのハードリンクとして local_file を作成（ダウンロードを省略する場合に使用）
+
+        Returns:
+            作成できた場合True（実体がない・ハードリンク非対応の場合はFalse）
+        """
+        if not self._link_supported or not self.has(sha256):
+            return False
+        try:
+            self._replace_with_link(self.blob_path(sha256), local_file)
+        except OSError:
+            return False
+        self._count('linked_without_download')
+        self._count('deduplicated_bytes', os.path.getsize(local_file))
+        return True
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self.stats)
@@ -0,0 +1,251 @@
+import hashlib
+import io
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from urllib3 import HTTPResponse
+
+
+# 再生時にそのまま返さないヘッダー（本文は展開済みで保存するため長さ・符号化は付け直す）
+_HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'transfer-encoding', 'content-encoding', 'content-length'
+}
+
+
+def interaction_key(method: str, url: str, body: Optional[bytes]) -> str:
+    """
+    リクエストを識別するキー（メソッド + パス?クエリ + 本文のハッシュ）
+
+    ホスト名は含めないため、記録したやり取りを別ホスト（ローカルの代替サーバー）で再生できる。
+    """
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    digest = hashlib.sha1(body or b'').hexdigest()
+    return f"{method.upper()} {target} {digest}"
+
+
+class CassetteStore:
+    """
+    HTTPのリクエスト/レスポンスを記録するSQLiteストア
+
+    検索POST・基本情報ページ・ダウンロードファイルを含む全てのやり取りを、
+    本文をzlib圧縮して1ファイルに保存する。同じリクエストは後の記録で上書きする。
+    """
+
+    def __init__(self, db_path: str = "data/cassette.sqlite3"):
+        """
+        Args:
+            db_path: 記録先DBのパス
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS interactions (
+                    key TEXT PRIMARY KEY,
+                    method TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    status INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    recorded_at TEXT NOT NULL
+                )
+            """)
+            self._conn.commit()
+
+    def put(self, method: str, url: str, request_body: Optional[bytes], status: int,
+            headers: Dict[str, str], content: bytes):
+        """やり取りを1件記録"""
+        key = interaction_key(method, url, request_body)
+        recorded_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO interactions (key, method, url, status, headers, body, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, method.upper(), url, status, json.dumps(headers, ensure_ascii=False),
+                 zlib.compress(content), recorded_at)
+            )
+            self._conn.commit()
+
+    def get(self, method: str, url: str, request_body: Optional[bytes]) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        """
+        記録済みのレスポンスを取得
+
+        Returns:
+            (ステータス, ヘッダー, 本文) のタプル（未記録ならNone）
+        """
+        key = interaction_key(method, url, request_body)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body FROM interactions WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, headers, body = row
+        return status, json.loads(headers), zlib.decompress(body)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM interactions").fetchone()[0]
+
+    def record_response(self, request, response):
+        """
+        requests の送信結果を記録（HTTPAdapter.send の直後に呼び出す）
+
+        stream=True のレスポンスも本文を読み切って記録し、呼び出し側が従来どおり
+        raw から読み出せるよう、読み切った本文で raw を差し替える。
+        """
+        content = response.content
+        body = request.body.encode('utf-8') if isinstance(request.body, str) else request.body
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _HOP_BY_HOP_HEADERS}
+        self.put(request.method, request.url, body, response.status_code, headers, content)
+
+        headers['Content-Length'] = str(len(content))
+        response.raw = HTTPResponse(
+            body=io.BytesIO(content), headers=headers, status=response.status_code,
+            preload_content=False, decode_content=False
+        )
+        response.headers.update({'Content-Length': str(len(content))})
+        response.headers.pop('Content-Encoding', None)
+        response._content_consumed = False
+        response._content = False
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class StandInServer:
+    """
+    記録済みのやり取りを返すローカルの代替JPXサーバー
+
+    JPXScraper の base_url を http://127.0.0.1:{port}/tseHpFront/ に向けると、
+    実サイトにアクセスせずにクローラー全体を再現性のある形で実行できる。
+    応答遅延とエラー（HTTPエラー・接続断）を注入できる。
+    """
+
+    def __init__(self, store: CassetteStore, host: str = "127.0.0.1", port: int = 8790,
+                 latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503, reset_rate: float = 0.0):
+        """
+        Args:
+            store: 再生するカセット
+            host: 待ち受けアドレス
+            port: 待ち受けポート（0で空きポートを自動選択）
+            latency: 応答前の待機秒数
+            jitter: 待機秒数に加える一様乱数の幅（秒）
+            error_rate: error_status を返す割合（0〜1）
+            error_status: 注入するHTTPステータス
+            reset_rate: 応答せずに接続を切断する割合（0〜1）
+        """
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.reset_rate = reset_rate
+        self.stats = {'requests': 0, 'hits': 0, 'misses': 0, 'injected_errors': 0, 'injected_resets': 0}
+        self._stats_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self._httpd.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        """JPXScraper.base_url に設定するURL"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/tseHpFront/"
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _serve(self, method: str):
+                length = int(self.headers.get('Content-Length', 0) or 0)
+                body = self.rfile.read(length) if length else None
+                server._count('requests')
+
+                delay = server.latency + (random.uniform(0, server.jitter) if server.jitter else 0.0)
+                if delay > 0:
+                    time.sleep(delay)
+
+                if server.reset_rate and random.random() < server.reset_rate:
+                    server._count('injected_resets')
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                if server.error_rate and random.random() < server.error_rate:
+                    server._count('injected_errors')
+                    return self._send(server.error_status, {'Content-Type': 'text/plain'}, b'injected error')
+
+                recorded = server.store.get(method, self.path, body)
+                if recorded is None:
+                    server._count('misses')
+                    return self._send(404, {'Content-Type': 'text/plain'}, b'not recorded')
+                server._count('hits')
+                status, headers, content = recorded
+                self._send(status, headers, content)
+
+            def _send(self, status: int, headers: Dict[str, str], content: bytes):
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(content)
+
+            def do_GET(self):
+                self._serve('GET')
+
+            def do_POST(self):
+                self._serve('POST')
+
+        return Handler
+
+    def start(self) -> 'StandInServer':
+        """バックグラウンドスレッドで待ち受けを開始"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """現在のスレッドで待ち受け（Ctrl+Cで終了）"""
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,166 @@
+import re
+import urllib.parse
+from typing import Dict, List, Optional, Union
+
+import lxml.html
+
+from .manifest import disclosure_key
+
+
+# 開示情報の相対URLを解決する基準（サイトのルート）
+SITE_ROOT = 'https://www2.jpx.co.jp'
+
+# XBRLアイコンの onclick からZIPパスを取り出す
+# 例: doDownload(document.forms['JJK010040Form'], ..., '/99840/081220250805531214.zip');
+_XBRL_PATH_RE = re.compile(r"'(/[^']+)'\s*\)")
+
+# HTMLサマリーアイコンの onclick（後方互換）からURLを取り出す
+_WINDOW_OPEN_RE = re.compile(r"window\.open\('([^']+)'")
+
+# 開示情報テーブル（closeUpKaiJi* / closeUpFili*、open* は除外）
+_TABLES_XPATH = "//div[contains(concat(' ', normalize-space(@class), ' '), ' pagecontents ')]/table"
+
+
+def is_known_disclosure(disclosure_info: Dict, since: Dict) -> bool:
+    """前回のクロールで確認済みの開示（またはそれより古い開示）かどうか"""
+    date = disclosure_info['date']
+    if date < since['latest_date']:
+        return True
+    return date == since['latest_date'] and disclosure_key(disclosure_info) in since['latest_keys']
+
+
+def element_text(elm) -> str:
+    """BeautifulSoup の get_text(strip=True) 相当（各テキスト片をstripして連結）"""
+    return ''.join(s.strip() for s in elm.itertext())
+
+
+def _first(elm, tag: str):
+    """子孫要素のうち最初の tag 要素（なければNone）"""
+    found = elm.iterdescendants(tag)
+    return next(found, None)
+
+
+def _disclosure_tables(root) -> List:
+    tables = root.xpath(_TABLES_XPATH)
+    if not tables:
+        tables = root.iter('table')
+    return [
+        table for table in tables
+        if table.get('id') and ('KaiJi' in table.get('id') or 'Fili' in table.get('id'))
+        and 'open' not in table.get('id')
+    ]
+
+
+def _parse_row(tr, site_root: str) -> Dict:
+    """開示情報テーブルの1行（td: 開示日/表題/XBRL/HTMLサマリー/添付資料）を解析"""
+    disclosure_info = {
+        'date': '',
+        'title': '',
+        'pdf_url': '',
+        'xbrl_url': '',
+        'html_summary_url': '',
+        'attachments': []
+    }
+
+    cells = [child for child in tr if child.tag == 'td']
+    cells += [None] * (5 - len(cells))
+    date_td, title_td, xbrl_td, html_td, attach_td = cells[:5]
+
+    # 1列目: 開示日
+    if date_td is not None:
+        disclosure_info['date'] = element_text(date_td)
+
+    # 2列目: 表題とPDF URL
+    if title_td is not None:
+        a_elm = _first(title_td, 'a')
+        if a_elm is not None:
+            disclosure_info['title'] = element_text(a_elm)
+            pdf_href = a_elm.get('href', '')
+            if pdf_href:
+                disclosure_info['pdf_url'] = urllib.parse.urljoin(site_root, pdf_href.strip())
+
+    # 3列目: XBRL URL（imgのonclick、なければaのhref）
+    if xbrl_td is not None:
+        img_elm = _first(xbrl_td, 'img')
+        if img_elm is not None:
+            onclick = img_elm.get('onclick', '')
+            matches = _XBRL_PATH_RE.findall(onclick) if onclick.count(',') >= 2 else []
+            if matches:
+                disclosure_info['xbrl_url'] = f'{site_root}/disc{matches[-1].strip()}'
+
+        if not disclosure_info['xbrl_url']:
+            xbrl_link = _first(xbrl_td, 'a')
+            if xbrl_link is not None:
+                href = xbrl_link.get('href', '')
+                if href and ('.zip' in href.lower() or 'xbrl' in href.lower()):
+                    disclosure_info['xbrl_url'] = urllib.parse.urljoin(site_root, href)
+
+    # 4列目: HTMLサマリー（aのhref、なければimgのonclick）
+    if html_td is not None:
+        html_link = _first(html_td, 'a')
+        if html_link is not None:
+            href = html_link.get('href', '')
+            if href and '.htm' in href.lower():
+                disclosure_info['html_summary_url'] = urllib.parse.urljoin(site_root, href)
+        else:
+            img_elm = _first(html_td, 'img')
+            if img_elm is not None:
+                onclick = img_elm.get('onclick', '')
+                if onclick and 'window.open' in onclick:
+                    url_match = _WINDOW_OPEN_RE.search(onclick)
+                    if url_match:
+                        disclosure_info['html_summary_url'] = urllib.parse.urljoin(site_root, url_match.group(1))
+
+    # 5列目: 添付資料
+    if attach_td is not None:
+        for link in attach_td.iterdescendants('a'):
+            attach_url = link.get('href', '')
+            if attach_url:
+                disclosure_info['attachments'].append(urllib.parse.urljoin(site_root, attach_url))
+
+    return disclosure_info
+
+
+def parse_disclosures(document: Union[str, bytes, 'lxml.html.HtmlElement'], since: Optional[Dict] = None,
+                      site_root: str = SITE_ROOT, debug: bool = False) -> List[Dict]:
+    """
+    基本情報ページのHTMLから適時開示情報（適時開示・縦覧書類）を抽出
+
+    Args:
+        document: 基本情報ページのHTML、または解析済みのlxml要素
+        since: 前回のクロール状態（各テーブルは新しい順のため、既知の行に到達したら打ち切る）
+        site_root: 相対URLを解決する基準URL
+        debug: 抽出過程を表示する
+
+    Returns:
+        開示情報のリスト
+    """
+    root = lxml.html.fromstring(document) if isinstance(document, (str, bytes)) else document
+
+    disclosure_list = []
+    for table_elm in _disclosure_tables(root):
+        if debug:
+            print(f"開示情報テーブル発見: {table_elm.get('id')}")
+
+        # 入れ子になっているテーブル要素の行を処理
+        inner_table = _first(table_elm, 'table')
+        if inner_table is None:
+            continue
+
+        for tr_elm in inner_table.iterdescendants('tr'):
+            if not tr_elm.get('id'):
+                continue
+
+            disclosure_info = _parse_row(tr_elm, site_root)
+
+            # 既知の開示に到達したら、このテーブルの残り（より古い行）は処理しない
+            if since and disclosure_info['title'] and is_known_disclosure(disclosure_info, since):
+                break
+
+            # 情報が含まれている場合のみリストに追加
+            if disclosure_info['title']:
+                disclosure_list.append(disclosure_info)
+                if debug:
+                    print(f"開示情報抽出: {disclosure_info['title'][:30]}...")
+
+    return disclosure_list
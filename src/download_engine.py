@@ -0,0 +1,323 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .stored_files import compress_chunks
+
+
+class TokenBucket:
+    """トークンバケット方式のレートリミッター（スレッドセーフ）"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: 1秒あたりに補充されるトークン数（= 許容リクエスト数/秒）
+            capacity: バケット容量（瞬間的に許容するバースト数）
+        """
+        if rate <= 0:
+            raise ValueError("rate は正の値を指定してください")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else 1.0
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last
+        self._last = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def acquire(self) -> float:
+        """
+        トークンを1つ取得する（取得できるまでブロック）
+
+        Returns:
+            待機した秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def set_rate(self, rate: float):
+        """補充レートを変更する"""
+        if rate <= 0:
+            raise ValueError("rate は正の値を指定してください")
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+
+class HostRateLimiter:
+    """ホストごとに1つのトークンバケットを持つグローバルレートリミッター"""
+
+    def __init__(self, rate: float = 1.0, burst: float = 1.0):
+        """
+        Args:
+            rate: ホストごとの許容リクエスト数/秒
+            burst: ホストごとの瞬間最大リクエスト数
+        """
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        """ホストに対応するバケットを取得（なければ作成）"""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    def buckets(self) -> Dict[str, TokenBucket]:
+        """作成済みのホスト -> バケットのマッピング（コピー）"""
+        with self._lock:
+            return dict(self._buckets)
+
+    def acquire(self, url: str) -> float:
+        """URLのホストに対してトークンを1つ取得し、待機秒数を返す"""
+        return self.bucket(urlparse(url).netloc).acquire()
+
+
+class AdaptiveRateController:
+    """
+    応答状況に応じてホストごとの許容レートを調整するAIMDコントローラー
+
+    サーバーが健全な間（応答が速い）はレートを加算的に引き上げ、
+    429/503・接続エラー・応答遅延といった負荷の兆候を検知したら乗算的に引き下げる。
+    レートは常に [min_rate, max_rate] の範囲に収める。
+    """
+
+    # 負荷の兆候とみなすHTTPステータス
+    STRESS_STATUS_CODES = (429, 503)
+
+    def __init__(self, rate_limiter: HostRateLimiter, min_rate: float = 0.2, max_rate: float = 5.0,
+                 increase: float = 0.1, decrease_factor: float = 0.5,
+                 latency_threshold: float = 5.0, cooldown: float = 2.0):
+        """
+        Args:
+            rate_limiter: レートを調整する対象のレートリミッター
+            min_rate: レートの下限（リクエスト数/秒）
+            max_rate: レートの上限（リクエスト数/秒）
+            increase: 正常応答1件ごとに加算するレート
+            decrease_factor: 負荷検知時にレートへ乗じる係数
+            latency_threshold: この秒数を超える応答を負荷の兆候とみなす
+            cooldown: 連続した負荷検知で何度も引き下げないための間隔（秒）
+        """
+        if min_rate <= 0 or max_rate < min_rate:
+            raise ValueError("0 < min_rate <= max_rate となるよう指定してください")
+        self.rate_limiter = rate_limiter
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.increase = float(increase)
+        self.decrease_factor = float(decrease_factor)
+        self.latency_threshold = float(latency_threshold)
+        self.cooldown = float(cooldown)
+        self._lock = threading.Lock()
+        self._last_decrease: Dict[str, float] = {}
+        self._stats = {'increases': 0, 'decreases': 0, 'stress_signals': 0,
+                       'min_rate_seen': None, 'max_rate_seen': None}
+
+        # 初期レートを範囲内に収める
+        self.rate_limiter.rate = self._clamp(self.rate_limiter.rate)
+
+    def _clamp(self, rate: float) -> float:
+        return max(self.min_rate, min(self.max_rate, rate))
+
+    def _apply(self, host: str, rate: float):
+        self.rate_limiter.bucket(host).set_rate(rate)
+        seen_min = self._stats['min_rate_seen']
+        seen_max = self._stats['max_rate_seen']
+        self._stats['min_rate_seen'] = rate if seen_min is None else min(seen_min, rate)
+        self._stats['max_rate_seen'] = rate if seen_max is None else max(seen_max, rate)
+
+    def on_response(self, url: str, status_code: int, latency: float):
+        """応答を受け取った時点で呼び出す（ステータスと応答時間から判定）"""
+        if status_code in self.STRESS_STATUS_CODES or latency > self.latency_threshold:
+            self.on_stress(url)
+        else:
+            self.on_success(url)
+
+    def on_success(self, url: str):
+        """正常応答: レートを加算的に引き上げ"""
+        host = urlparse(url).netloc
+        with self._lock:
+            current = self.rate_limiter.bucket(host).rate
+            rate = self._clamp(current + self.increase)
+            if rate != current:
+                self._stats['increases'] += 1
+                self._apply(host, rate)
+
+    def on_stress(self, url: str):
+        """負荷の兆候（429/503・接続エラー・遅延）: レートを乗算的に引き下げ"""
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        with self._lock:
+            self._stats['stress_signals'] += 1
+            if now - self._last_decrease.get(host, float('-inf')) < self.cooldown:
+                return
+            self._last_decrease[host] = now
+            current = self.rate_limiter.bucket(host).rate
+            rate = self._clamp(current * self.decrease_factor)
+            if rate != current:
+                self._stats['decreases'] += 1
+                self._apply(host, rate)
+
+    def stats(self) -> Dict:
+        """
+        調整状況を集計
+
+        Returns:
+            {'min_rate', 'max_rate', 'increases', 'decreases', 'stress_signals',
+             'min_rate_seen', 'max_rate_seen', 'current_rates'} の辞書
+        """
+        with self._lock:
+            current_rates = {
+                host: bucket.rate for host, bucket in self.rate_limiter.buckets().items()
+            }
+            return {
+                'min_rate': self.min_rate,
+                'max_rate': self.max_rate,
+                **self._stats,
+                'current_rates': current_rates
+            }
+
+
+class DownloadEngine:
+    """並列数を制限したスレッドプールでダウンロード処理を実行するエンジン"""
+
+    def __init__(self, max_workers: int = 1, rate_limiter: Optional[HostRateLimiter] = None):
+        """
+        Args:
+            max_workers: 同時実行するダウンロード数の上限
+            rate_limiter: 全リクエストで共有するレートリミッター
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+
+    def map(self, func: Callable, items: List) -> List:
+        """
+        itemsの各要素にfuncを並列適用し、入力順の結果リストを返す
+
+        max_workersが1の場合はスレッドを使わず逐次実行する。
+        """
+        if not items:
+            return []
+        if self.max_workers == 1 or len(items) == 1:
+            return [func(item) for item in items]
+
+        workers = min(self.max_workers, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, items))
+
+
+def stream_to_file(response, filepath: str, chunk_size: int = 64 * 1024,
+                   compression: Optional[str] = None, timer=None) -> Tuple[int, str]:
+    """
+    stream=True で取得したレスポンスを一時ファイルへ逐次書き込み、
+    fsync後にアトミックなリネームで最終パスへ配置する
+
+    途中で中断された場合も最終パスには不完全なファイルが残らないため、
+    既存ファイルによるスキップ判定を安全に行える。
+
+    Args:
+        response: stream=True で取得した requests.Response
+        filepath: 保存先パス
+        chunk_size: 1回に読み込むバイト数
+        compression: 保存時の圧縮方式（None / 'gzip' / 'zstd'）
+        timer: 受信バイト数・ディスク書き込み時間を加算する StageTimer（任意）
+
+    Returns:
+        (保存したファイルのバイト数, 内容のsha256ハッシュ) のタプル（圧縮時は圧縮後の値）
+
+    Raises:
+        IOError: Content-Length と受信バイト数が一致しない場合、または空き容量不足の場合
+    """
+    import os
+    import shutil
+
+    directory = os.path.dirname(filepath) or '.'
+
+    # 書き込み前にContent-Lengthを確認（空き容量の事前チェック）
+    content_length = response.headers.get('Content-Length')
+    expected = int(content_length) if content_length and content_length.isdigit() else None
+    if expected is not None and shutil.disk_usage(directory).free < expected:
+        raise IOError(f"空き容量不足: {expected:,} bytes 必要です")
+
+    def chunks():
+        # raw.stream はContent-Encodingを展開しつつ一定サイズずつ返すため、メモリ使用量はチャンク分のみ
+        yield from response.raw.stream(chunk_size, decode_content=True)
+
+        # 転送途中で切断された場合を検出（raw.tell は圧縮前の受信バイト数）
+        if expected is not None and response.raw.tell() != expected:
+            raise IOError(f"受信サイズ不一致: Content-Length={expected:,} 受信={response.raw.tell():,} bytes")
+        if timer is not None:
+            timer.add_bytes('received', response.raw.tell())
+
+    try:
+        return _write_atomically(compress_chunks(chunks(), compression), filepath, timer)
+    finally:
+        response.close()
+
+
+def copy_to_file(fileobj, filepath: str, chunk_size: int = 64 * 1024,
+                 compression: Optional[str] = None, timer=None) -> Tuple[int, str]:
+    """
+    ファイルオブジェクト（ZIPのメンバー等）の内容を stream_to_file と同じ手順
+    （一時ファイル → fsync → アトミックなリネーム）で保存する
+
+    Returns:
+        (保存したファイルのバイト数, 内容のsha256ハッシュ) のタプル（圧縮時は圧縮後の値）
+    """
+    chunks = iter(lambda: fileobj.read(chunk_size), b'')
+    return _write_atomically(compress_chunks(chunks, compression), filepath, timer)
+
+
+def _write_atomically(chunks, filepath: str, timer=None) -> Tuple[int, str]:
+    """
+    チャンク列を一時ファイルへ書き込み、fsync後に最終パスへリネーム（失敗時は一時ファイルを削除）
+
+    timer を指定した場合、書き込み・fsync・リネームに要した時間（チャンクの受信待ちを除く）を
+    'disk_write' に、書き込んだバイト数を 'written' に加算する。
+    """
+    import hashlib
+    import os
+    import tempfile
+
+    directory = os.path.dirname(filepath) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.part', dir=directory)
+    try:
+        written = 0
+        write_seconds = 0.0
+        digest = hashlib.sha256()
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                if chunk:
+                    started = time.perf_counter()
+                    f.write(chunk)
+                    write_seconds += time.perf_counter() - started
+                    digest.update(chunk)
+                    written += len(chunk)
+            started = time.perf_counter()
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, filepath)
+        if timer is not None:
+            timer.add('disk_write', write_seconds + time.perf_counter() - started)
+            timer.add_bytes('written', written)
+        return written, digest.hexdigest()
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .pack_store import open_pack, split_pack_path
+
+
+# マニフェストの形式（抽出処理・出力の列を変えた場合に上げ、既存の出力を作り直す）
+MANIFEST_VERSION = 2
+
+# マニフェストを置くディレクトリ名（出力ディレクトリ配下。_ で始まるためParquetのデータセットとしては読まれない）
+MANIFEST_DIR = '_manifest'
+
+
+def file_signature(path: Union[str, Path]) -> Dict:
+    """
+    保存済みファイルの変更検知用の値
+
+    通常のファイルはサイズと更新日時、アーカイブ内の仮想パスはサイズとCRC32を使う。
+    """
+    split = split_pack_path(path)
+    if split is not None and split[0].is_file():
+        archive = open_pack(split[0])
+        info = archive.getinfo(split[1])
+        return {'size': info.file_size, 'crc': info.CRC}
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def mapping_digest(tag_jp_mapping: Dict[str, str]) -> str:
+    """指標マッピングのハッシュ（日本語名が変わった場合は出力を作り直す）"""
+    payload = json.dumps(sorted(tag_jp_mapping.items()), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ExtractionManifest:
+    """
+    証券コードごとの抽出マニフェスト（output/html_summary/_manifest/{証券コード}.json）
+
+    出力ファイル（CSV / Parquet）へ出力したHTMLファイルごとに、変更検知用の値と出力した行数を
+    出力順に記録する。行はファイルの順に並ぶため、行数から既存の出力のどの範囲がどのファイルの行かがわかる。
+    マニフェストの形式・指標マッピング・出力ファイル自体（サイズと更新日時）のいずれかが
+    記録時と異なる場合は、記録を使わずに全ファイルを解析し直す。
+
+    形式:
+        {"version": 2, "mapping": 指標マッピングのハッシュ, "output": 出力ファイルの変更検知用の値,
+         "files": [{"name": ファイル名, "signature": {...}, "rows": 行数}, ...]}
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Args:
+            path: マニフェストファイルのパス
+        """
+        self.path = Path(path)
+
+    @staticmethod
+    def path_for(output_path: Union[str, Path]) -> Path:
+        """出力ファイルに対応するマニフェストのパス（例: output/html_summary/_manifest/13010.json）"""
+        output_path = Path(output_path)
+        return output_path.parent / MANIFEST_DIR / f"{output_path.stem}.json"
+
+    def load(self, output_path: Union[str, Path], digest: str) -> Optional[List[Dict]]:
+        """
+        記録済みのファイル一覧を読み込む
+
+        Args:
+            output_path: 出力ファイル（CSV / Parquet）のパス
+            digest: 現在の指標マッピングのハッシュ
+
+        Returns:
+            [{'name', 'signature', 'rows'}] のリスト（出力順、記録が使えなければNone）
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            output_signature = file_signature(output_path)
+        except (OSError, ValueError):
+            return None
+        if (data.get('version') != MANIFEST_VERSION or data.get('mapping') != digest
+                or data.get('output') != output_signature):
+            return None
+        return data.get('files', [])
+
+    def save(self, output_path: Union[str, Path], digest: str, files: List[Dict]):
+        """出力ファイルの書き込み後に記録を置き換える（一時ファイルへ書き込んでからリネーム）"""
+        data = {
+            'version': MANIFEST_VERSION,
+            'mapping': digest,
+            'output': file_signature(output_path),
+            'files': files,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.part', dir=self.path.parent)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def delete(self):
+        """記録を削除（出力ファイルを書き込まなかった場合）"""
+        if self.path.exists():
+            self.path.unlink()
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .ixbrl_reader import FACT_ATTRIBUTES, read_ixbrl_facts
+from .stored_files import read_text
+
+
+# 保存形式（取り出す値・属性を変えた場合に上げ、古い形式のエントリーは使わない）
+FORMAT_VERSION = 1
+
+# 保存する列（read_ixbrl_facts(content, attributes=True) のキー）
+COLUMNS = ('name', 'value', 'is_nil', *FACT_ATTRIBUTES)
+
+# 既定のキャッシュDBのパス（プロジェクトのルートからの相対パス。各スクリプトで共有）
+DEFAULT_DB_PATH = "data/fact_cache.sqlite3"
+
+# 既定のキャッシュサイズの上限
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# 最終使用日時を更新する間隔（参照のたびに書き込まないため）
+TOUCH_INTERVAL = 3600
+
+
+def content_digest(content: str) -> str:
+    """HTMLの内容のsha256（圧縮保存・アーカイブ格納の有無によらず同じ内容なら同じ値）"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def encode_facts(facts: List[Dict]) -> bytes:
+    """
+    値のリストを列ごとの配列にまとめてzlibで圧縮したバイト列にする
+
+    同じタグ名の接頭辞・属性値が列の中で続くため、行ごとに保存するより小さくなる。
+    """
+    columns = [[fact[column] for fact in facts] for column in COLUMNS]
+    payload = json.dumps(columns, ensure_ascii=False, separators=(',', ':'))
+    return zlib.compress(payload.encode('utf-8'), 6)
+
+
+def decode_facts(data: bytes) -> List[Dict]:
+    """encode_facts の逆変換"""
+    columns = json.loads(zlib.decompress(data).decode('utf-8'))
+    return [dict(zip(COLUMNS, values)) for values in zip(*columns)]
+
+
+class FactCache:
+    """
+    HTMLサマリーから取り出した値（ix:nonNumeric / ix:nonFraction）のキャッシュ（SQLite）
+
+    ファイルの内容のsha256をキーに、read_ixbrl_facts(content, attributes=True) の結果を
+    圧縮して保存する。html_summary_output.py・html_summary_xbrl_list_create.py・ノートブック等で
+    共有し、一度解析したファイルは内容が変わらない限り再解析しない。
+
+    サイズ（データベースの使用ページ数）が max_bytes を超えた場合は、
+    最終使用日時の古いエントリーから max_bytes の9割になるまで削除する。
+    複数プロセスから同じデータベースを開いて使える。
+    """
+
+    def __init__(self, db_path: Union[str, Path] = DEFAULT_DB_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            db_path: キャッシュDBのパス
+            max_bytes: キャッシュサイズの上限（バイト）
+        """
+        self.db_path = str(db_path)
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.stats = {'hits': 0, 'misses': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS facts (
+                    digest TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    data BLOB NOT NULL,
+                    used_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_facts_used_at ON facts(used_at)")
+            self._conn.commit()
+
+    def get(self, digest: str) -> Optional[List[Dict]]:
+        """キャッシュ済みの値を取得（なければNone）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, used_at FROM facts WHERE digest = ? AND version = ?", (digest, FORMAT_VERSION)
+            ).fetchone()
+            if row is None:
+                return None
+            data, used_at = row
+            now = time.time()
+            if now - used_at > TOUCH_INTERVAL:
+                self._conn.execute("UPDATE facts SET used_at = ? WHERE digest = ?", (now, digest))
+                self._conn.commit()
+        return decode_facts(data)
+
+    def put(self, digest: str, facts: List[Dict]):
+        """値を保存（既存は上書き）し、上限を超えていれば古いエントリーを削除"""
+        data = encode_facts(facts)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO facts (digest, version, data, used_at) VALUES (?, ?, ?, ?)",
+                (digest, FORMAT_VERSION, data, time.time())
+            )
+            self._conn.commit()
+            self._evict()
+
+    def _used_bytes(self) -> int:
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - freelist_count) * page_size
+
+    def _evict(self):
+        # 削除したページは再利用されるため、ファイルサイズは max_bytes 程度で頭打ちになる
+        if self._used_bytes() <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        while self._used_bytes() > target:
+            deleted = self._conn.execute("""
+                DELETE FROM facts WHERE digest IN (
+                    SELECT digest FROM facts ORDER BY used_at LIMIT 100
+                )
+            """).rowcount
+            self._conn.commit()
+            if not deleted:
+                break
+            self.stats['evicted'] += deleted
+
+    def facts(self, content: str) -> List[Dict]:
+        """
+        HTMLの値を取得（キャッシュになければ解析して保存）
+
+        Returns:
+            read_ixbrl_facts(content, attributes=True) と同じ形式のリスト
+        """
+        digest = content_digest(content)
+        facts = self.get(digest)
+        if facts is not None:
+            with self._lock:
+                self.stats['hits'] += 1
+            return facts
+        facts = read_ixbrl_facts(content, attributes=True)
+        self.put(digest, facts)
+        with self._lock:
+            self.stats['misses'] += 1
+        return facts
+
+    def read_facts(self, path: Union[str, Path]) -> List[Dict]:
+        """保存済みファイル（圧縮保存・アーカイブ格納を含む）の値を取得"""
+        return self.facts(read_text(path))
+
+    def clear(self):
+        """全エントリーを削除"""
+        with self._lock:
+            self._conn.execute("DELETE FROM facts")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
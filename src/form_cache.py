@@ -0,0 +1,72 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+class FormParamsCache:
+    """
+    証券コードごとの基本情報ページ遷移パラメータ（_extract_form_params の結果）を
+    有効期限付きでディスクに保存するキャッシュ
+
+    キャッシュが有効な間は検索POSTを省略し、基本情報ページへ直接POSTできる。
+    """
+
+    def __init__(self, db_path: str = "data/form_params_cache.sqlite3", ttl_seconds: float = 7 * 24 * 3600):
+        """
+        Args:
+            db_path: キャッシュDBのパス
+            ttl_seconds: キャッシュの有効期限（秒）
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS form_params (
+                    stock_code TEXT PRIMARY KEY,
+                    params TEXT NOT NULL,
+                    cached_at REAL NOT NULL
+                )
+            """)
+            self._conn.commit()
+
+    def get(self, stock_code: str) -> Optional[Dict]:
+        """有効期限内のパラメータを取得（なければNone）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT params, cached_at FROM form_params WHERE stock_code = ?", (stock_code,)
+            ).fetchone()
+        if row is None:
+            return None
+        params, cached_at = row
+        if time.time() - cached_at > self.ttl_seconds:
+            return None
+        return json.loads(params)
+
+    def put(self, stock_code: str, params: Dict):
+        """パラメータを保存（既存は上書き）"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO form_params (stock_code, params, cached_at) VALUES (?, ?, ?)",
+                (stock_code, json.dumps(params, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    def invalidate(self, stock_code: str):
+        """パラメータを削除（サーバー側で無効になった場合など）"""
+        with self._lock:
+            self._conn.execute("DELETE FROM form_params WHERE stock_code = ?", (stock_code,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,133 @@
+from typing import Dict, List, Optional
+
+import lxml.etree
+
+
+# 取り出す要素（タグ名にこの文字列を含む要素、大文字小文字は区別しない）
+FACT_KINDS = ('nonnumeric', 'nonfraction')
+
+# BeautifulSoup の get_text() が本文として扱わない文字列を含む要素（ルビ・スクリプト等）
+_NON_TEXT_TAGS = frozenset(('rt', 'rp', 'script', 'style', 'template'))
+
+# パーサーへ一度に渡す文字数
+CHUNK_SIZE = 64 * 1024
+
+# attributes=True の場合に値とあわせて返す属性（キー -> HTMLパーサーが小文字にした属性名）
+FACT_ATTRIBUTES = {
+    'sign': 'sign',
+    'context_ref': 'contextref',
+    'unit_ref': 'unitref',
+    'format': 'format',
+    'decimals': 'decimals',
+    'scale': 'scale',
+}
+
+
+def _fact_kind(tag) -> Optional[str]:
+    lowered = tag.lower()
+    for kind in FACT_KINDS:
+        if kind in lowered:
+            return kind
+    return None
+
+
+def _is_nil(attrib) -> bool:
+    """xsi:nil="true"（名前空間接頭辞は問わない）が指定されているか"""
+    return any((name.endswith(':nil') or name == 'nil') and value == 'true' for name, value in attrib.items())
+
+
+class _FactCollector:
+    """
+    lxml パーサーのターゲット（開始・終了タグと文字列を順に受け取り、木は作らない）
+
+    ix:nonNumeric / ix:nonFraction の内側の文字列だけを保持する。
+    文字列はタグ・コメントで区切られる単位ごとにstripして連結する（get_text(strip=True) 相当）。
+    """
+
+    def __init__(self, attributes: bool = False):
+        self.attributes = attributes
+        self.facts: Dict[str, List[Dict]] = {kind: [] for kind in FACT_KINDS}
+        self._stack = []       # 開いている要素ごとの取り出し中の値（対象外の要素はNone）
+        self._open = []        # 取り出し中の値（入れ子の外側から順）
+        self._non_text = 0     # 開いている _NON_TEXT_TAGS の数
+        self._pending = []     # 区切られていない文字列の断片
+
+    def _flush(self):
+        if self._pending:
+            text = ''.join(self._pending).strip()
+            self._pending = []
+            if text and not self._non_text:
+                for entry in self._open:
+                    entry['parts'].append(text)
+
+    def start(self, tag, attrib):
+        self._flush()
+        if tag in _NON_TEXT_TAGS:
+            self._non_text += 1
+        kind = _fact_kind(tag)
+        if kind is None:
+            self._stack.append(None)
+            return
+        # 文書順を保つため開始タグの時点で位置を確保し、値は終了タグで確定
+        fact = {'name': attrib.get('name', ''), 'value': '', 'is_nil': _is_nil(attrib)}
+        if self.attributes:
+            fact.update((key, attrib.get(name, '')) for key, name in FACT_ATTRIBUTES.items())
+        self.facts[kind].append(fact)
+        entry = {'fact': fact, 'sign': attrib.get('sign'), 'parts': []}
+        self._stack.append(entry)
+        self._open.append(entry)
+
+    def end(self, tag):
+        self._flush()
+        if tag in _NON_TEXT_TAGS:
+            self._non_text -= 1
+        entry = self._stack.pop() if self._stack else None
+        if entry is None:
+            return
+        self._open.pop()
+        fact = entry['fact']
+        if not fact['is_nil']:
+            value = ''.join(entry['parts'])
+            if entry['sign'] == '-' and value:
+                value = '-' + value
+            fact['value'] = value
+
+    def data(self, data):
+        if self._open:
+            self._pending.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def pi(self, target, data=None):
+        self._flush()
+
+    def close(self) -> List[Dict]:
+        self._flush()
+        return [fact for kind in FACT_KINDS for fact in self.facts[kind]]
+
+
+def read_ixbrl_facts(content: str, attributes: bool = False) -> List[Dict]:
+    """
+    インラインXBRL（決算短信サマリー等）から ix:nonNumeric / ix:nonFraction の値を取り出す
+
+    lxml のHTMLパーサーにターゲットを渡して逐次解析し、文書全体の木を作らない。
+    結果は BeautifulSoup（lxmlパーサー）で find_all(re.compile('.*nonNumeric', re.I)) →
+    find_all(re.compile('.*nonFraction', re.I)) の順に走査した場合と同じ順序・内容になる。
+
+    Args:
+        content: HTMLの文字列
+        attributes: FACT_ATTRIBUTES の属性（sign, contextRef, unitRef 等）も返すか
+
+    Returns:
+        {'name': name属性, 'value': 値, 'is_nil': nilか} のリスト
+        （nonNumeric を文書順に並べた後に nonFraction を文書順に並べる。
+         値は get_text(strip=True) 相当で、sign="-" なら先頭に '-' を付け、nil なら空文字。
+         attributes=True なら FACT_ATTRIBUTES のキーも含む（属性がなければ空文字））
+    """
+    if not content:
+        return []
+    parser = lxml.etree.HTMLParser(target=_FactCollector(attributes))
+    for offset in range(0, len(content), CHUNK_SIZE):
+        parser.feed(content[offset:offset + CHUNK_SIZE])
+    return parser.close()
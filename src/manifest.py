@@ -0,0 +1,249 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+
+def disclosure_key(doc: Dict) -> str:
+    """開示情報1件を一意に識別するキー（PDF URL、なければXBRL URL、なければ開示日+表題）"""
+    return doc.get('pdf_url') or doc.get('xbrl_url') or f"{doc.get('date', '')}|{doc.get('title', '')}"
+
+
+class DownloadManifest:
+    """
+    ダウンロード済みファイルを記録するSQLiteマニフェスト
+
+    取得元URLを主キーとして、保存先パス・サイズ・sha256・HTTPバリデーター
+    （ETag / Last-Modified）・取得日時を保持する。スキップ判定は
+    ファイルシステムではなくこのマニフェストへの一括クエリで行う。
+
+    あわせて、証券コードごとに確認済みの最新開示（開示日とその日のキー）を
+    crawl_state テーブルに保持し、差分クロールに利用する。決算短信（XBRLあり）の
+    開示日は filing_dates テーブルに蓄積し、一括ダウンロードの優先順位付けに利用する。
+    """
+
+    # SQLiteのバインド変数上限に余裕を持たせた1クエリあたりのURL数
+    LOOKUP_CHUNK_SIZE = 500
+
+    def __init__(self, db_path: str = "data/download_manifest.sqlite3"):
+        """
+        Args:
+            db_path: マニフェストDBのパス
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # ダウンロードワーカー（スレッド）から共有するため、ロックで直列化する
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS downloads (
+                    url TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    stock_code TEXT NOT NULL,
+                    local_path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    sha256 TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at TEXT NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_downloads_code_kind ON downloads (stock_code, kind)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_downloads_etag ON downloads (etag)"
+            )
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS filing_dates (
+                    stock_code TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    PRIMARY KEY (stock_code, date)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_state (
+                    stock_code TEXT PRIMARY KEY,
+                    latest_date TEXT NOT NULL,
+                    latest_keys TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            self._conn.commit()
+
+    def lookup(self, urls: Iterable[str]) -> Dict[str, Dict]:
+        """
+        複数URLの記録を一括取得
+
+        Args:
+            urls: 取得元URLのリスト
+
+        Returns:
+            URL -> 記録（辞書）のマッピング（未記録のURLは含まれない）
+        """
+        unique_urls = list(dict.fromkeys(u for u in urls if u))
+        records = {}
+        with self._lock:
+            for start in range(0, len(unique_urls), self.LOOKUP_CHUNK_SIZE):
+                chunk = unique_urls[start:start + self.LOOKUP_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT * FROM downloads WHERE url IN ({placeholders})", chunk
+                ).fetchall()
+                for row in rows:
+                    records[row['url']] = dict(row)
+        return records
+
+    def record(self, url: str, kind: str, stock_code: str, local_path: str, size: int,
+               sha256: Optional[str] = None, etag: Optional[str] = None,
+               last_modified: Optional[str] = None):
+        """ダウンロード結果を記録（同一URLは上書き）"""
+        fetched_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO downloads
+                    (url, kind, stock_code, local_path, size, sha256, etag, last_modified, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (url, kind, stock_code, local_path, size, sha256, etag, last_modified, fetched_at)
+            )
+            self._conn.commit()
+
+    def relocate(self, old_path: str, new_path: str, size: Optional[int] = None,
+                 sha256: Optional[str] = None) -> int:
+        """
+        保存先を移動したファイルの記録を更新
+
+        圧縮への変換のように内容が変わる場合は size / sha256 も指定する
+        （アーカイブへの格納のように内容が変わらない場合は保存先のみ更新）。
+
+        Returns:
+            更新した記録の件数（old_path の記録がなければ0）
+        """
+        with self._lock:
+            if size is None:
+                cursor = self._conn.execute(
+                    "UPDATE downloads SET local_path = ? WHERE local_path = ?", (new_path, old_path)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE downloads SET local_path = ?, size = ?, sha256 = ? WHERE local_path = ?",
+                    (new_path, size, sha256, old_path)
+                )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def find_by_etag(self, etag: str, size: int) -> Optional[Dict]:
+        """
+        同じETag・サイズで記録済みのファイル（sha256あり）を検索
+
+        別URLで同じ内容を取得済みかどうかを、本文を受信する前に判定するために使用する。
+        """
+        if not etag:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM downloads WHERE etag = ? AND size = ? AND sha256 IS NOT NULL LIMIT 1",
+                (etag, size)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def records_for(self, stock_code: str, kind: Optional[str] = None) -> List[Dict]:
+        """証券コード（と種類）に紐づく記録を取得"""
+        query = "SELECT * FROM downloads WHERE stock_code = ?"
+        params = [stock_code]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params).fetchall()]
+
+    def load_crawl_states(self) -> Dict[str, Dict]:
+        """
+        全証券コードのクロール状態を一括取得
+
+        Returns:
+            証券コード -> {'latest_date': 'YYYY/MM/DD', 'latest_keys': set} のマッピング
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM crawl_state").fetchall()
+        return {
+            row['stock_code']: {
+                'latest_date': row['latest_date'],
+                'latest_keys': set(json.loads(row['latest_keys']))
+            }
+            for row in rows
+        }
+
+    def update_crawl_state(self, stock_code: str, disclosures: List[Dict],
+                           previous: Optional[Dict] = None):
+        """
+        取得した開示情報のうち最新の開示日とその日のキーを記録
+
+        Args:
+            stock_code: 証券コード
+            disclosures: 今回取得した開示情報のリスト
+            previous: 前回のクロール状態（同日の既知キーを引き継ぐ）
+        """
+        dated = [doc for doc in disclosures if doc.get('date')]
+        if not dated:
+            return
+
+        latest_date = max(doc['date'] for doc in dated)
+        latest_keys = {disclosure_key(doc) for doc in dated if doc['date'] == latest_date}
+
+        if previous:
+            if previous['latest_date'] > latest_date:
+                return
+            if previous['latest_date'] == latest_date:
+                latest_keys |= previous['latest_keys']
+
+        updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO crawl_state (stock_code, latest_date, latest_keys, updated_at) VALUES (?, ?, ?, ?)",
+                (stock_code, latest_date, json.dumps(sorted(latest_keys), ensure_ascii=False), updated_at)
+            )
+            self._conn.commit()
+
+    def record_filing_dates(self, stock_code: str, disclosures: List[Dict]):
+        """XBRLのある開示（決算短信）の開示日を記録"""
+        dates = {doc['date'] for doc in disclosures if doc.get('date') and doc.get('xbrl_url')}
+        if not dates:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO filing_dates (stock_code, date) VALUES (?, ?)",
+                [(stock_code, date) for date in sorted(dates)]
+            )
+            self._conn.commit()
+
+    def load_filing_dates(self) -> Dict[str, List[str]]:
+        """
+        全証券コードの決算短信の開示日を一括取得
+
+        Returns:
+            証券コード -> 開示日（'YYYY/MM/DD'、昇順）のリスト
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stock_code, date FROM filing_dates ORDER BY stock_code, date"
+            ).fetchall()
+        filing_dates: Dict[str, List[str]] = {}
+        for row in rows:
+            filing_dates.setdefault(row['stock_code'], []).append(row['date'])
+        return filing_dates
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,320 @@
+import functools
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import zipfile
+import zlib
+from pathlib import Path
+from typing import IO, Iterable, List, Optional, Tuple, Union
+
+
+# 証券コードごとのアーカイブを置くディレクトリ名（downloads/packs/{証券コード}.zip）
+PACK_DIR_NAME = 'packs'
+
+# アーカイブに格納するダウンロード種類のディレクトリ名
+KIND_DIRS = ('xbrl', 'html_summary', 'attachments')
+
+# 既に圧縮されているため無圧縮で格納する拡張子
+_STORED_SUFFIXES = ('.zip', '.gz', '.zst')
+
+# ジャーナルの先頭（追記前の中央ディレクトリの開始位置, 追記前のファイルサイズ）
+_JOURNAL_HEADER = struct.Struct('<QQ')
+
+
+def pack_path_for(code_dir: Union[str, Path]) -> Path:
+    """
+    種類別の証券コードディレクトリに対応するアーカイブのパス
+
+    例: downloads/html_summary/13010 → downloads/packs/13010.zip
+    """
+    code_dir = Path(code_dir)
+    return code_dir.parent.parent / PACK_DIR_NAME / f"{code_dir.name}.zip"
+
+
+def split_pack_path(path: Union[str, Path]) -> Optional[Tuple[Path, str]]:
+    """
+    アーカイブ内のファイルを指す仮想パスを (アーカイブのパス, メンバー名) に分割
+
+    例: downloads/packs/13010.zip/html_summary/xxx_summary.htm
+        → (downloads/packs/13010.zip, 'html_summary/xxx_summary.htm')
+
+    Returns:
+        アーカイブ内のパスでなければNone
+    """
+    parts = Path(path).parts
+    for i, part in enumerate(parts[:-1]):
+        if part.endswith('.zip'):
+            return Path(*parts[:i + 1]), '/'.join(parts[i + 1:])
+    return None
+
+
+@functools.lru_cache(maxsize=16)
+def _open_pack_cached(path: str, mtime_ns: int) -> zipfile.ZipFile:
+    # 更新日時をキーに含め、書き換えられたアーカイブは開き直す
+    return zipfile.ZipFile(path)
+
+
+def open_pack(pack_path: Union[str, Path]) -> Optional[zipfile.ZipFile]:
+    """アーカイブを開く（索引の読み込みはアーカイブごとに1回、存在しなければNone）"""
+    try:
+        stat = os.stat(pack_path)
+    except FileNotFoundError:
+        return None
+    return _open_pack_cached(str(pack_path), stat.st_mtime_ns)
+
+
+def pack_members(code_dir: Union[str, Path]) -> List[Path]:
+    """種類別の証券コードディレクトリに対応する、アーカイブ内ファイルの仮想パス一覧"""
+    code_dir = Path(code_dir)
+    pack_path = pack_path_for(code_dir)
+    archive = open_pack(pack_path)
+    if archive is None:
+        return []
+    prefix = f"{code_dir.parent.name}/"
+    return [
+        pack_path / name for name in archive.namelist()
+        if name.startswith(prefix) and '/' not in name[len(prefix):]
+    ]
+
+
+def has_pack_members(code_dir: Union[str, Path]) -> bool:
+    return bool(pack_members(code_dir))
+
+
+def pack_codes(base_dir: Union[str, Path]) -> List[str]:
+    """種類別ディレクトリ（downloads/html_summary 等）の内容を含むアーカイブの証券コード一覧"""
+    base_dir = Path(base_dir)
+    pack_dir = base_dir.parent / PACK_DIR_NAME
+    if not pack_dir.is_dir():
+        return []
+    return [
+        pack.stem for pack in sorted(pack_dir.glob('*.zip'))
+        if has_pack_members(base_dir / pack.stem)
+    ]
+
+
+def journal_path_for(pack_path: Union[str, Path]) -> Path:
+    """追記中のアーカイブのジャーナル（例: downloads/packs/13010.zip.journal）"""
+    pack_path = Path(pack_path)
+    return pack_path.with_name(pack_path.name + '.journal')
+
+
+def recover_pack(pack_path: Union[str, Path]) -> bool:
+    """
+    追記の途中で中断したアーカイブを追記前の状態に戻す
+
+    ジャーナルには、追記で上書きされる範囲（追記前の中央ディレクトリとファイル末尾）を
+    追記の開始前に保存している。ジャーナルが残っていれば、その範囲を書き戻して
+    追記前のサイズに切り詰める。ジャーナル自体が書き込み途中の場合は、アーカイブは
+    まだ変更されていないためジャーナルを削除するだけにする。
+
+    Returns:
+        アーカイブを書き戻した場合はTrue
+    """
+    journal = journal_path_for(pack_path)
+    try:
+        with open(journal, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return False
+
+    restored = False
+    if len(data) >= _JOURNAL_HEADER.size:
+        offset, size = _JOURNAL_HEADER.unpack_from(data)
+        tail = data[_JOURNAL_HEADER.size:]
+        if offset + len(tail) == size:
+            with open(pack_path, 'r+b') as f:
+                f.seek(offset)
+                f.write(tail)
+                f.truncate(size)
+                f.flush()
+                os.fsync(f.fileno())
+            restored = True
+    journal.unlink()
+    return restored
+
+
+def _file_crc(path: Path) -> int:
+    crc = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def open_stored(path: Union[str, Path]) -> IO[bytes]:
+    """保存済みファイル（通常のファイル、またはアーカイブ内の仮想パス）をバイナリで開く"""
+    split = split_pack_path(path)
+    if split is None or not split[0].is_file():
+        return open(path, 'rb')
+    pack_path, member = split
+    archive = open_pack(pack_path)
+    if archive is None:
+        raise FileNotFoundError(str(path))
+    return archive.open(member)
+
+
+class PackWriter:
+    """
+    証券コードごとのアーカイブ（downloads/packs/{証券コード}.zip）を書き込む
+
+    企業の処理が終わるたびに、その企業のダウンロードファイル（xbrl / html_summary / attachments）を
+    アーカイブへ移し、個別のファイルとディレクトリを削除する。メンバー名は
+    {種類}/{ファイル名}（例: html_summary/2025-08-07_13010_決算短信_summary.htm）。
+
+    既存のアーカイブへは直接追記する（コストは追加するファイルと索引の大きさに比例し、
+    既存アーカイブの大きさにはよらない）。追記で上書きされる索引（中央ディレクトリ）は
+    事前にジャーナル（{証券コード}.zip.journal）へ保存し、途中で中断した場合は
+    次回の格納時に追記前の状態へ戻す（recover_pack）。追記中のアーカイブを
+    別プロセスから読み込むことは想定しない。
+
+    同じメンバー名のファイルが格納済みの場合は、内容（CRC32とサイズ）を比較し、
+    同じであれば格納済みとして扱い、異なれば新しい内容で置き換える（アーカイブを作り直す）。
+    """
+
+    def __init__(self, download_root: str = "downloads"):
+        """
+        Args:
+            download_root: ダウンロード先のルートディレクトリ
+        """
+        self.download_root = Path(download_root)
+        self._lock = threading.Lock()
+        self.stats = {'packed_files': 0, 'packed_companies': 0, 'replaced_files': 0, 'recovered_packs': 0}
+
+    def pack_company(self, stock_code: str, manifest=None, kind_dirs: Iterable[str] = KIND_DIRS) -> int:
+        """
+        1社分の個別ファイルをアーカイブへ移す
+
+        Args:
+            stock_code: 証券コード
+            manifest: 保存先を更新するマニフェスト（省略可）
+            kind_dirs: 対象の種類ディレクトリ
+
+        Returns:
+            アーカイブへ移したファイル数
+        """
+        loose = []
+        for kind_dir in kind_dirs:
+            code_dir = self.download_root / kind_dir / stock_code
+            if code_dir.is_dir():
+                loose.extend(
+                    (kind_dir, path) for path in sorted(code_dir.iterdir())
+                    if path.is_file() and not path.name.endswith('.part')
+                )
+        if not loose:
+            return 0
+
+        pack_path = self.download_root / PACK_DIR_NAME / f"{stock_code}.zip"
+        pack_path.parent.mkdir(parents=True, exist_ok=True)
+        recovered = recover_pack(pack_path)
+
+        # 格納済みのメンバーと内容を比較して振り分け
+        existing = {}
+        if pack_path.exists():
+            with zipfile.ZipFile(pack_path) as archive:
+                existing = {info.filename: (info.CRC, info.file_size) for info in archive.infolist()}
+        added, replaced = [], []
+        for kind_dir, path in loose:
+            member = f"{kind_dir}/{path.name}"
+            if member not in existing:
+                added.append((member, path))
+            elif existing[member] != (_file_crc(path), path.stat().st_size):
+                replaced.append((member, path))
+            # 同じ内容が格納済みのファイル（格納後・削除前に中断した場合等）は書き込まずに削除する
+
+        if replaced:
+            print(f"  ⚠️  アーカイブ内の {len(replaced)} ファイルを新しい内容で置き換えます")
+            self._rewrite(pack_path, added + replaced)
+        elif added and existing:
+            self._append(pack_path, added)
+        elif added:
+            self._rewrite(pack_path, added)
+
+        # アーカイブへの書き込み完了後に、マニフェストの保存先を更新して個別ファイルを削除
+        # （ここに残るファイルはすべて同じ内容でアーカイブに格納されている）
+        for kind_dir, path in loose:
+            if manifest is not None:
+                manifest.relocate(str(path), str(pack_path / kind_dir / path.name))
+            path.unlink()
+        for kind_dir in kind_dirs:
+            code_dir = self.download_root / kind_dir / stock_code
+            if code_dir.is_dir() and not any(code_dir.iterdir()):
+                code_dir.rmdir()
+
+        with self._lock:
+            self.stats['packed_files'] += len(loose)
+            self.stats['packed_companies'] += 1
+            self.stats['replaced_files'] += len(replaced)
+            self.stats['recovered_packs'] += int(recovered)
+        return len(loose)
+
+    @staticmethod
+    def _write_member(archive: zipfile.ZipFile, member: str, path: Path):
+        compress_type = zipfile.ZIP_STORED if path.name.endswith(_STORED_SUFFIXES) else zipfile.ZIP_DEFLATED
+        archive.write(path, member, compress_type=compress_type)
+
+    def _append(self, pack_path: Path, files: List[Tuple[str, Path]]):
+        """既存のアーカイブへ直接追記（上書きされる範囲をジャーナルへ保存してから書き込む）"""
+        with zipfile.ZipFile(pack_path) as archive:
+            # 追記モードでは中央ディレクトリの開始位置から新しいメンバーを書き込む
+            offset = archive.start_dir
+        size = pack_path.stat().st_size
+        with open(pack_path, 'rb') as f:
+            f.seek(offset)
+            tail = f.read()
+
+        journal = journal_path_for(pack_path)
+        with open(journal, 'wb') as f:
+            f.write(_JOURNAL_HEADER.pack(offset, size))
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+
+        try:
+            with zipfile.ZipFile(pack_path, 'a') as archive:
+                for member, path in files:
+                    self._write_member(archive, member, path)
+            with open(pack_path, 'rb') as f:
+                os.fsync(f.fileno())
+        except BaseException:
+            recover_pack(pack_path)
+            raise
+        journal.unlink()
+
+    def _rewrite(self, pack_path: Path, files: List[Tuple[str, Path]]):
+        """
+        アーカイブを作り直す（新規作成、または格納済みのメンバーを置き換える場合）
+
+        置き換えないメンバーを一時ファイルへ複製してから files を書き込み、
+        完了後にアトミックに置き換える。
+        """
+        names = {member for member, _ in files}
+        fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.part', dir=pack_path.parent)
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp_path, 'w') as archive:
+                if pack_path.exists():
+                    with zipfile.ZipFile(pack_path) as source:
+                        for info in source.infolist():
+                            if info.filename in names:
+                                continue
+                            copied = zipfile.ZipInfo(info.filename, info.date_time)
+                            copied.compress_type = info.compress_type
+                            copied.external_attr = info.external_attr
+                            with source.open(info) as src, archive.open(copied, 'w') as dst:
+                                shutil.copyfileobj(src, dst)
+                for member, path in files:
+                    self._write_member(archive, member, path)
+            with open(tmp_path, 'rb') as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_path, pack_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
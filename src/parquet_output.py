@@ -0,0 +1,114 @@
+import datetime
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet出力を使う場合のみ必要
+    pyarrow = None
+
+
+# 出力形式 → 出力ディレクトリ名（output/ 配下）と拡張子
+OUTPUT_FORMATS = {
+    'csv': ('html_summary', '.csv'),
+    'parquet': ('html_summary_parquet', '.parquet'),
+}
+
+# Parquetの圧縮方式
+PARQUET_COMPRESSION = 'zstd'
+
+# 数値として解釈する値（桁区切りのカンマを除いた後）
+_NUMBER_PATTERN = re.compile(r'-?[0-9]+(\.[0-9]+)?')
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise ImportError("Parquet出力には pyarrow パッケージが必要です（uv sync --extra parquet）")
+
+
+def validate_output_format(output_format: str) -> str:
+    """出力形式の指定を検証（'csv' / 'parquet'）"""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"不明な出力形式: {output_format}（csv / parquet）")
+    if output_format == 'parquet':
+        _require_pyarrow()
+    return output_format
+
+
+def output_path_for(base_dir: Union[str, Path], securities_code: str, output_format: str = 'csv') -> Path:
+    """
+    証券コードの出力ファイルのパス
+
+    例: output/html_summary/13010.csv, output/html_summary_parquet/13010.parquet
+    """
+    dir_name, suffix = OUTPUT_FORMATS[output_format]
+    return Path(base_dir) / dir_name / f"{securities_code}{suffix}"
+
+
+def to_number(value: str) -> Optional[float]:
+    """値を数値に変換（'683,112' → 683112.0、数値でなければNone）"""
+    text = value.replace(',', '') if value else ''
+    if not _NUMBER_PATTERN.fullmatch(text):
+        return None
+    return float(text)
+
+
+def _schema():
+    # 同じ文字列が繰り返される列は辞書エンコード（全証券コードで同じスキーマ）
+    dictionary = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+    return pyarrow.schema([
+        ('date', pyarrow.date32()),
+        ('filing_date', dictionary),
+        ('code', dictionary),
+        ('company_name', dictionary),
+        ('fiscal_year_end', dictionary),
+        ('quarterly_period', dictionary),
+        ('factor_tag', dictionary),
+        ('factor_jp', dictionary),
+        ('value', pyarrow.string()),
+        ('value_num', pyarrow.float64()),
+        ('has_value', pyarrow.bool_()),
+        ('is_nil', pyarrow.bool_()),
+        ('data_type', dictionary),
+    ])
+
+
+def write_rows(rows: List[Dict[str, Any]], path: Union[str, Path]):
+    """
+    CSVと同じ形式の行をParquetファイルに書き込む（一時ファイルへ書き込んでからリネーム）
+
+    date は日付型、value は元の表記のまま、value_num は value を数値に変換した値
+    （数値でない・nil・空の場合はnull）を持つ。
+    """
+    _require_pyarrow()
+    schema = _schema()
+    columns = {name: [row[name] for row in rows] for name in schema.names if name not in ('date', 'value_num')}
+    columns['date'] = [datetime.date.fromisoformat(row['date']) for row in rows]
+    columns['value_num'] = [to_number(row['value']) for row in rows]
+    table = pyarrow.Table.from_pydict(columns, schema=schema)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.part', dir=path.parent)
+    os.close(fd)
+    try:
+        pyarrow.parquet.write_table(table, tmp_path, compression=PARQUET_COMPRESSION)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_rows(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """write_rows で書き込んだファイルをCSVと同じ形式の行として読み込む（差分処理用）"""
+    _require_pyarrow()
+    rows = pyarrow.parquet.read_table(path).to_pylist()
+    for row in rows:
+        row['date'] = row['date'].isoformat()
+        del row['value_num']
+    return rows
@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class RetryPolicy:
+    """
+    冪等なリクエスト（GET）の再試行方針
+
+    一時的なエラー（接続エラー・タイムアウト・429/5xx）のみ再試行し、
+    待機時間は指数バックオフ + jitter とする。Retry-After ヘッダーがあればそれを優先する。
+    """
+
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    def __init__(self, max_attempts: int = 3, backoff_base: float = 1.0,
+                 backoff_max: float = 30.0, jitter: float = 0.5):
+        """
+        Args:
+            max_attempts: 最大試行回数（初回を含む。1で再試行なし）
+            backoff_base: 1回目の再試行前の待機秒数（以降は倍々に増加）
+            backoff_max: 待機秒数の上限
+            jitter: 待機秒数に加える揺らぎの割合（0.5なら ±50%）
+        """
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.jitter = float(jitter)
+
+    def should_retry_status(self, status_code: int) -> bool:
+        return status_code in self.RETRY_STATUS_CODES
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        attempt回目の試行が失敗した後の待機秒数
+
+        Args:
+            attempt: 失敗した試行の回数（1始まり）
+            retry_after: レスポンスの Retry-After ヘッダー値
+        """
+        server_delay = self._parse_retry_after(retry_after)
+        if server_delay is not None:
+            return min(server_delay, self.backoff_max)
+
+        base = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return max(0.0, base * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Retry-After（秒数またはHTTP日付）を秒数に変換"""
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class CircuitBreaker:
+    """
+    ホスト単位のサーキットブレーカー（全ワーカーで共有）
+
+    連続失敗回数がしきい値に達するとそのホストへの回路を開き、
+    reset_timeout 秒の間は全ワーカーのリクエストを待機させる。
+    経過後は試行を再開し、成功すれば閉じ、失敗すれば再び開く。
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold: 回路を開く連続失敗回数
+            reset_timeout: 回路を開いてから試行を再開するまでの秒数
+        """
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._lock = threading.Lock()
+        self._failures: Dict[str, int] = {}
+        self._opened_until: Dict[str, float] = {}
+        self.open_count = 0
+
+    def before_request(self, url: str) -> float:
+        """
+        回路が開いている間は待機する
+
+        Returns:
+            待機した秒数
+        """
+        host = urlparse(url).netloc
+        waited = 0.0
+        while True:
+            with self._lock:
+                remaining = self._opened_until.get(host, 0.0) - time.monotonic()
+            if remaining <= 0:
+                return waited
+            time.sleep(remaining)
+            waited += remaining
+
+    def record_success(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            self._failures[host] = 0
+
+    def record_failure(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.failure_threshold and self._opened_until.get(host, 0.0) <= time.monotonic():
+                self._opened_until[host] = time.monotonic() + self.reset_timeout
+                self._failures[host] = 0
+                self.open_count += 1
+                print(f"  🔌 {host} への接続を {self.reset_timeout:.0f}秒間停止します（連続 {failures} 件の失敗）")
@@ -0,0 +1,113 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+
+# ニューインデックス区分の優先度（大きいほど先に処理）
+INDEX_CATEGORY_RANKS = {
+    'TOPIX Core30': 5,
+    'TOPIX Large70': 4,
+    'TOPIX Mid400': 3,
+    'TOPIX Small 1': 2,
+    'TOPIX Small 2': 1,
+}
+
+# 決算短信の間隔（四半期）
+QUARTER_DAYS = 91
+
+# 前年同期の開示日から予測する場合の間隔
+YEAR_DAYS = 364
+
+
+def _parse_date(value: str) -> Optional[date]:
+    try:
+        return datetime.strptime(value, '%Y/%m/%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_weight(value) -> float:
+    try:
+        return float(str(value).strip().rstrip('%') or 0)
+    except ValueError:
+        return 0.0
+
+
+def expected_filing_date(filing_dates: List[str], today: date) -> Optional[date]:
+    """
+    過去の決算短信の開示日から、次の開示予定日を推定
+
+    前年同期の開示日（約1年後）と、直近の開示日から四半期ごとの推定のうち最も早い日とする。
+    today より前の候補は、遅れている場合でも3日までは予定日として扱う。
+
+    Args:
+        filing_dates: 過去の開示日（'YYYY/MM/DD'）のリスト
+        today: 基準日
+
+    Returns:
+        予定日（履歴がなければNone）
+    """
+    dates = sorted(d for d in (_parse_date(v) for v in filing_dates) if d)
+    if not dates:
+        return None
+    earliest = today - timedelta(days=3)
+    candidates = [d + timedelta(days=YEAR_DAYS * n) for d in dates for n in (1, 2)]
+    candidates = [d for d in candidates if d >= earliest]
+    quarterly = dates[-1] + timedelta(days=QUARTER_DAYS)
+    while quarterly < earliest:
+        quarterly += timedelta(days=QUARTER_DAYS)
+    # 前年同期の予定日が四半期後の推定より先にあれば、そちらを採用
+    return min(candidates + [quarterly])
+
+
+class BatchScheduler:
+    """
+    一括ダウンロードの処理順を決める
+
+    次の順に並べる（同順位はcodelistの行順）。
+
+    1. 決算短信の開示予定日が近い企業（予定日が基準日の前後 due_days 日以内）
+    2. ニューインデックス区分（Core30 → Large70 → Mid400 → Small 1 → Small 2 → その他）
+    3. TOPIXに占める個別銘柄のウエイト
+
+    開示予定日は、過去の実行でマニフェストに記録した決算短信の開示日から推定する。
+    """
+
+    def __init__(self, filing_dates: Dict[str, List[str]] = None, today: date = None, due_days: int = 7):
+        """
+        Args:
+            filing_dates: 証券コード -> 過去の決算短信の開示日（Manifest.load_filing_dates）
+            today: 基準日（省略時は今日）
+            due_days: 開示予定が近いとみなす日数
+        """
+        self.filing_dates = filing_dates or {}
+        self.today = today or date.today()
+        self.due_days = due_days
+
+    def is_due(self, stock_code: str) -> bool:
+        """開示予定日が基準日の前後 due_days 日以内か"""
+        expected = expected_filing_date(self.filing_dates.get(stock_code, []), self.today)
+        return expected is not None and abs((expected - self.today).days) <= self.due_days
+
+    def priority(self, company: Dict) -> tuple:
+        """優先度のキー（大きいほど先に処理）"""
+        return (
+            self.is_due(company['stock_code']),
+            INDEX_CATEGORY_RANKS.get((company.get('index_category') or '').strip(), 0),
+            _parse_weight(company.get('topix_weight')),
+            -company.get('row_number', 0),
+        )
+
+    def order(self, companies: List[Dict]) -> List[Dict]:
+        """優先度の高い順に並べ替えた企業リスト"""
+        return sorted(companies, key=self.priority, reverse=True)
+
+    def summary(self, companies: List[Dict]) -> Dict[str, int]:
+        """並べ替え結果の内訳（表示用）"""
+        return {
+            'due': sum(1 for company in companies if self.is_due(company['stock_code'])),
+            'indexed': sum(
+                1 for company in companies
+                if (company.get('index_category') or '').strip() in INDEX_CATEGORY_RANKS
+            ),
+            'weighted': sum(1 for company in companies if _parse_weight(company.get('topix_weight')) > 0),
+        }
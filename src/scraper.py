@@ -1,104 +1,280 @@
 import requests
+import lxml.html
 from bs4 import BeautifulSoup
 import time
 import re
+import queue
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, List
 import json
 import os
+import urllib.parse
+
+from .batch_checkpoint import BatchCheckpoint
+from .blob_store import BlobStore
+from .cassette import CassetteStore
+from .download_engine import AdaptiveRateController, DownloadEngine, HostRateLimiter, copy_to_file, stream_to_file
+from .form_cache import FormParamsCache
+from .disclosure_parser import element_text, parse_disclosures
+from .manifest import DownloadManifest
+from .pack_store import PackWriter, open_pack, split_pack_path
+from .retry import CircuitBreaker, RetryPolicy
+from .scheduler import BatchScheduler
+from .stored_files import COMPRESSION_SUFFIXES, compression_of, numbered_name, read_bytes, validate_compression
+from .timing import BYTE_LABELS, STAGE_LABELS, StageTimer, summarize_timings
+from .transport import HttpTransport
+from .xbrl_zip import XbrlZipIndex
+
+# 基本情報ページの開示情報テーブル（検索・エラーページには含まれない）
+_BASIC_INFO_TABLE_RE = re.compile(r'id=["\']?closeUp(?:KaiJi|Fili)')
 
 
 class JPXScraper:
     """東証適時開示情報サイトから企業情報を取得するスクレイパー"""
     
-    def __init__(self, debug: bool = False):
-        self.session = requests.Session()
-        self.base_url = "https://www2.jpx.co.jp/tseHpFront/"
+    def __init__(self, debug: bool = False, max_workers: int = 1, rate_limit: float = 1.0,
+                 connect_timeout: float = 10.0, read_timeout: float = 30.0,
+                 manifest_path: str = "data/download_manifest.sqlite3",
+                 form_cache_path: str = "data/form_params_cache.sqlite3",
+                 form_cache_ttl: float = 7 * 24 * 3600,
+                 adaptive_rate: bool = False, rate_min: float = 0.2, rate_max: float = 5.0,
+                 max_retries: int = 3,
+                 rate_limiter: Optional[HostRateLimiter] = None,
+                 rate_controller: Optional[AdaptiveRateController] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 cassette: Optional[CassetteStore] = None,
+                 base_url: str = "https://www2.jpx.co.jp/tseHpFront/",
+                 manifest: Optional[DownloadManifest] = None,
+                 form_params_cache: Optional[FormParamsCache] = None,
+                 dedup: bool = False,
+                 blob_store: Optional[BlobStore] = None,
+                 compression: Optional[str] = None,
+                 pack: bool = False,
+                 pack_writer: Optional[PackWriter] = None):
+        """
+        Args:
+            debug: デバッグモード（取得したHTMLを debug/ に保存）
+            max_workers: ファイルダウンロードの同時実行数
+            rate_limit: ホストごとの最大リクエスト数/秒（全ワーカー合計）
+            connect_timeout: 接続タイムアウト秒数
+            read_timeout: 読み込みタイムアウト秒数
+            manifest_path: ダウンロード済みファイルを記録するSQLiteマニフェストのパス
+            form_cache_path: 基本情報ページ遷移パラメータのキャッシュDBのパス
+            form_cache_ttl: 遷移パラメータキャッシュの有効期限（秒）
+            adaptive_rate: 応答状況に応じてレートを自動調整する（AIMD）
+            rate_min: 適応レート制御時のレート下限（リクエスト数/秒）
+            rate_max: 適応レート制御時のレート上限（リクエスト数/秒）
+            max_retries: GETリクエストの最大再試行回数（0で再試行なし）
+            rate_limiter: 他のスクレイパーと共有するレートリミッター（省略時は新規作成）
+            rate_controller: 他のスクレイパーと共有する適応レートコントローラー
+            circuit_breaker: 他のスクレイパーと共有するサーキットブレーカー（省略時は新規作成）
+            cassette: 全てのやり取りを記録するカセット（記録モード）
+            base_url: 検索ページのベースURL（ローカルの代替サーバーで再生する場合に変更）
+            manifest: 他のスクレイパーと共有するマニフェスト（省略時は新規作成）
+            form_params_cache: 他のスクレイパーと共有する遷移パラメータキャッシュ（省略時は新規作成）
+            dedup: 同じ内容のファイルを内容アドレスのストアで1つにまとめる（ファイル名はハードリンク）
+            blob_store: 他のスクレイパーと共有する内容アドレスのストア
+            compression: HTMLサマリー・添付資料を圧縮して保存する方式（None / 'gzip' / 'zstd'）
+            pack: 企業ごとのダウンロードファイルを1つのアーカイブ（downloads/packs/{証券コード}.zip）にまとめる
+            pack_writer: 他のスクレイパーと共有するアーカイブの書き込み先
+        """
+        self.base_url = base_url
         self.debug = debug
         self.last_response = None  # 最後のレスポンスを保持
+        self.last_tree = None  # 最後のレスポンスの解析結果（企業情報・開示情報の抽出で共有）
+        self._session_warmed = False  # 検索ページでのセッション確立済みか
         
-        # ヘッダー設定
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        })
+        # 並列ダウンロードエンジン（ホスト単位のトークンバケットで総リクエスト数を制御）
+        self.rate_limiter = rate_limiter or HostRateLimiter(rate=rate_limit)
+        self.download_engine = DownloadEngine(max_workers=max_workers, rate_limiter=self.rate_limiter)
+        
+        # 適応レート制御（正常時は加算的に引き上げ、429/503・接続エラー・遅延で乗算的に引き下げ）
+        if rate_controller is None and adaptive_rate:
+            rate_controller = AdaptiveRateController(self.rate_limiter, min_rate=rate_min, max_rate=rate_max)
+        self.rate_controller = rate_controller
+        
+        # 一時的なエラーの再試行（指数バックオフ + jitter）と、障害時に全ワーカーを止めるブレーカー
+        self.retry_policy = RetryPolicy(max_attempts=max_retries + 1)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        
+        # 全リクエスト共通のトランスポート（keep-aliveプールは同時実行数に合わせる）
+        self.transport = HttpTransport(
+            pool_size=max_workers,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            rate_limiter=self.rate_limiter,
+            rate_controller=self.rate_controller,
+            retry_policy=self.retry_policy,
+            circuit_breaker=self.circuit_breaker,
+            cassette=cassette
+        )
+        self.session = self.transport.session
+        
+        # 処理段階ごとの所要時間・転送量（一括ダウンロードでは企業ごとに作り直す）
+        self.stage_timer = StageTimer()
+        self.transport.timer = self.stage_timer
+        
+        # ダウンロード済みファイルの台帳（URL単位でスキップ判定）
+        self.manifest = manifest or DownloadManifest(manifest_path)
+        
+        # 証券コードごとの基本情報ページ遷移パラメータ（検索POSTの省略に使用）
+        self.form_params_cache = form_params_cache or FormParamsCache(form_cache_path, ttl_seconds=form_cache_ttl)
+        
+        # 内容アドレスのストア（重複ファイルの排除）
+        self.blob_store = blob_store or (BlobStore() if dedup else None)
+        
+        # HTMLサマリー・添付資料の圧縮保存（*.htm.gz / *.htm.zst）
+        self.compression = validate_compression(compression)
+        
+        # 企業ごとのアーカイブへの格納（小さなファイルを大量に作らない）
+        self.pack_writer = pack_writer or (PackWriter() if pack else None)
         
         if self.debug:
             os.makedirs("debug", exist_ok=True)
     
-    def search_company(self, stock_code: str) -> Optional[Dict]:
+    @property
+    def site_root(self) -> str:
+        """開示情報の相対URLを解決する基準（base_url のスキーム + ホスト）"""
+        parts = urllib.parse.urlsplit(self.base_url)
+        return f"{parts.scheme}://{parts.netloc}"
+    
+    def _begin_stage_timing(self) -> StageTimer:
+        """処理段階の計測を新しい StageTimer で始める（以降のリクエスト・保存はこちらへ加算）"""
+        self.stage_timer = StageTimer()
+        self.transport.timer = self.stage_timer
+        return self.stage_timer
+    
+    def _warm_up_session(self, force: bool = False):
+        """
+        検索ページにアクセスしてセッション（Cookie）を確立する
+
+        実行中に1回だけ行い、以降の企業では省略する。
+        """
+        if self._session_warmed and not force:
+            return
+        print(f"ステップ1: 検索ページにアクセス中...")
+        init_url = self.base_url + "JJK010010Action.do?Show"
+        with self.stage_timer.measure('session_warmup'):
+            response = self.transport.get(init_url)
+            response.raise_for_status()
+        self.stage_timer.add_bytes('pages', len(response.content))
+        self._session_warmed = True
+    
+    def _search_form_params(self, stock_code: str) -> Optional[Dict]:
+        """検索フォームを送信し、基本情報ページへの遷移パラメータを抽出"""
+        # ステップ2: 検索フォームの送信
+        print(f"ステップ2: 証券コード {stock_code} で検索中...")
+        search_url = self.base_url + "JJK010010Action.do"
+        
+        # ブログを参考にした正しいPOSTパラメータ
+        search_data = {
+            'ListShow': 'ListShow',
+            'sniMtGmnId': '',
+            'dspSsuPd': '10',
+            'dspSsuPdMapOut': '10>10件<50>50件<100>100件<200>200件<',
+            'mgrMiTxtBx': '',  # 空にする
+            'eqMgrCd': stock_code,  # ここに証券コードを入れる
+            'szkbuChkbxMapOut': '011>プライム<012>スタンダード<013>グロース<008>TOKYO PRO Market<bj1>－<be1>－<111>外国株プライム<112>外国株スタンダード<113>外国株グロース<bj2>－<be2>－<ETF>ETF<ETN>ETN<RET>不動産投資信託(REIT)<IFD>インフラファンド<999>その他<'
+        }
+        
+        # 検索・基本情報ページのPOSTは参照のみのため再試行可能
+        with self.stage_timer.measure('search_post'):
+            response = self.transport.post(search_url, data=search_data, idempotent=True)
+            response.raise_for_status()
+        self.stage_timer.add_bytes('pages', len(response.content))
+        
+        if self.debug:
+            with open(f"debug/{stock_code}_step2_search_result.html", 'w', encoding='utf-8') as f:
+                f.write(response.text)
+        
+        # 検索結果ページからフォームパラメータを抽出
+        with self.stage_timer.measure('html_parse'):
+            soup = BeautifulSoup(response.text, 'lxml')
+            return self._extract_form_params(soup, stock_code)
+    
+    def _post_basic_info(self, stock_code: str, form_params: Dict) -> str:
+        """基本情報ページ（JJK010030Action.do）へPOSTし、HTMLを返す"""
+        basic_info_url = self.base_url + "JJK010030Action.do"
+        with self.stage_timer.measure('basic_info_post'):
+            response = self.transport.post(basic_info_url, data=form_params, idempotent=True)
+            response.raise_for_status()
+        self.stage_timer.add_bytes('pages', len(response.content))
+        
+        if self.debug:
+            with open(f"debug/{stock_code}_step3_basic_info.html", 'w', encoding='utf-8') as f:
+                f.write(response.text)
+        
+        return response.text
+    
+    @staticmethod
+    def _is_basic_info_page(html: str) -> bool:
+        """
+        基本情報ページとして妥当な内容か（キャッシュしたパラメータの有効性確認用）
+
+        「会社名」等のラベルは検索・エラーページにも現れるため、開示情報テーブル
+        （closeUpKaiJi* / closeUpFili*）のidがある場合のみ基本情報ページとみなす。
+        """
+        return _BASIC_INFO_TABLE_RE.search(html) is not None
+    
+    def search_company(self, stock_code: str, extract_info: bool = True) -> Optional[Dict]:
         """
         証券コードから企業情報を検索し、基本情報ページまで遷移
         
+        セッションの確立は実行中1回のみ行い、遷移パラメータがキャッシュ済みの
+        場合は検索POSTを省略して基本情報ページへ直接POSTする（1社1リクエスト）。
+        基本情報ページは1回だけ解析し、その結果を last_tree に保持する。
+        
         Args:
             stock_code: 証券コード（例: "9984"）
+            extract_info: 企業情報を抽出する（Falseの場合はページ全体のテーブル走査を省略し、
+                          証券コードのみの企業情報を返す。開示情報だけが必要な場合に使用）
             
         Returns:
             企業情報の辞書、または取得失敗時はNone
         """
         try:
-            # ステップ1: 初期ページアクセス
-            print(f"ステップ1: 検索ページにアクセス中...")
-            init_url = self.base_url + "JJK010010Action.do?Show"
-            response = self.session.get(init_url)
-            response.raise_for_status()
-            time.sleep(1)
+            # ステップ1: セッション確立（初回のみ）
+            self._warm_up_session()
             
-            # ステップ2: 検索フォームの送信
-            print(f"ステップ2: 証券コード {stock_code} で検索中...")
-            search_url = self.base_url + "JJK010010Action.do"
+            html = None
+            form_params = self.form_params_cache.get(stock_code)
+            if form_params:
+                # キャッシュ済みパラメータで基本情報ページへ直接遷移
+                print(f"ステップ3: 基本情報ページに遷移中（キャッシュ済みパラメータ使用）...")
+                html = self._post_basic_info(stock_code, form_params)
+                if not self._is_basic_info_page(html):
+                    # セッション切れ等でパラメータが無効になった場合は検索からやり直す
+                    print("  キャッシュ済みパラメータが無効なため、検索からやり直します")
+                    self.form_params_cache.invalidate(stock_code)
+                    self._warm_up_session(force=True)
+                    html = None
             
-            # ブログを参考にした正しいPOSTパラメータ
-            search_data = {
-                'ListShow': 'ListShow',
-                'sniMtGmnId': '',
-                'dspSsuPd': '10',
-                'dspSsuPdMapOut': '10>10件<50>50件<100>100件<200>200件<',
-                'mgrMiTxtBx': '',  # 空にする
-                'eqMgrCd': stock_code,  # ここに証券コードを入れる
-                'szkbuChkbxMapOut': '011>プライム<012>スタンダード<013>グロース<008>TOKYO PRO Market<bj1>－<be1>－<111>外国株プライム<112>外国株スタンダード<113>外国株グロース<bj2>－<be2>－<ETF>ETF<ETN>ETN<RET>不動産投資信託(REIT)<IFD>インフラファンド<999>その他<'
-            }
-            
-            response = self.session.post(search_url, data=search_data)
-            response.raise_for_status()
-            
-            if self.debug:
-                with open(f"debug/{stock_code}_step2_search_result.html", 'w', encoding='utf-8') as f:
-                    f.write(response.text)
-            
-            # 検索結果ページからフォームパラメータを抽出
-            soup = BeautifulSoup(response.text, 'lxml')
-            
-            # ステップ3: 基本情報ボタンをクリック（JJK010030Action.doへの遷移）
-            print(f"ステップ3: 基本情報ページに遷移中...")
-            
-            # フォームから必要なパラメータを抽出
-            form_params = self._extract_form_params(soup, stock_code)
-            
-            if not form_params:
-                print("エラー: フォームパラメータが見つかりません")
-                return None
-            
-            # 基本情報ページへのPOSTリクエスト
-            basic_info_url = self.base_url + "JJK010030Action.do"
-            response = self.session.post(basic_info_url, data=form_params)
-            response.raise_for_status()
+            if html is None:
+                form_params = self._search_form_params(stock_code)
+                
+                # ステップ3: 基本情報ボタンをクリック（JJK010030Action.doへの遷移）
+                print(f"ステップ3: 基本情報ページに遷移中...")
+                
+                if not form_params:
+                    print("エラー: フォームパラメータが見つかりません")
+                    return None
+                
+                html = self._post_basic_info(stock_code, form_params)
+                if self._is_basic_info_page(html):
+                    self.form_params_cache.put(stock_code, form_params)
             
-            # レスポンスを保持
-            self.last_response = response.text
+            # レスポンスと解析結果を保持（開示情報の抽出で再利用）
+            self.last_response = html
+            with self.stage_timer.measure('html_parse'):
+                self.last_tree = lxml.html.fromstring(html)
             
-            if self.debug:
-                with open(f"debug/{stock_code}_step3_basic_info.html", 'w', encoding='utf-8') as f:
-                    f.write(response.text)
+            if not extract_info:
+                return self._empty_company_info(stock_code)
             
             # 基本情報ページから企業情報を抽出
-            soup = BeautifulSoup(response.text, 'lxml')
-            company_info = self._extract_company_info(soup, stock_code)
-            
-            return company_info
+            return self._extract_company_info(self.last_tree, stock_code)
             
         except requests.RequestException as e:
             print(f"HTTPエラーが発生しました: {e}")
@@ -166,18 +342,10 @@ class JPXScraper:
             traceback.print_exc()
             return None
     
-    def _extract_company_info(self, soup: BeautifulSoup, stock_code: str) -> Dict:
-        """
-        基本情報ページから企業情報を抽出
-        
-        Args:
-            soup: BeautifulSoupオブジェクト
-            stock_code: 証券コード
-            
-        Returns:
-            企業情報の辞書
-        """
-        info = {
+    @staticmethod
+    def _empty_company_info(stock_code: str) -> Dict:
+        """項目が未設定の企業情報"""
+        return {
             'stock_code': stock_code,
             'company_name': None,
             'company_name_en': None,
@@ -193,18 +361,28 @@ class JPXScraper:
             'average_age': None,
             'average_salary': None
         }
+    
+    def _extract_company_info(self, tree, stock_code: str) -> Dict:
+        """
+        基本情報ページから企業情報を抽出
         
-        # テーブルから情報を抽出
-        tables = soup.find_all('table')
+        Args:
+            tree: 基本情報ページの解析結果（lxml要素）
+            stock_code: 証券コード
+            
+        Returns:
+            企業情報の辞書
+        """
+        info = self._empty_company_info(stock_code)
         
-        for table in tables:
-            rows = table.find_all('tr')
-            for row in rows:
-                cells = row.find_all(['td', 'th'])
+        # テーブルから情報を抽出
+        for table in tree.iter('table'):
+            for row in table.iter('tr'):
+                cells = list(row.iter('td', 'th'))
                 if len(cells) >= 2:
                     # ラベルと値を取得
-                    label = cells[0].get_text(strip=True)
-                    value = cells[1].get_text(strip=True)
+                    label = element_text(cells[0])
+                    value = element_text(cells[1])
                     
                     # ラベルに基づいて情報を格納
                     if '会社名' in label and '英文' not in label:
@@ -237,8 +415,8 @@ class JPXScraper:
         # 企業名が見つからない場合は、ページタイトルやヘッダーから探す
         if not info['company_name']:
             # h1, h2, h3タグから探す
-            for heading in soup.find_all(['h1', 'h2', 'h3']):
-                text = heading.get_text(strip=True)
+            for heading in tree.iter('h1', 'h2', 'h3'):
+                text = element_text(heading)
                 if stock_code in text:
                     # 証券コードを含むヘッダーから企業名を抽出
                     company_text = text.replace(stock_code, '').strip()
@@ -257,203 +435,64 @@ class JPXScraper:
         
         return info
     
-    def fetch_disclosure_documents(self, stock_code: str) -> List[Dict]:
+    def fetch_disclosure_documents(self, stock_code: str, since: Optional[Dict] = None) -> Optional[List[Dict]]:
         """
         適時開示書類の一覧を取得（XBRL、HTMLサマリー、PDF等）
         
         Args:
             stock_code: 証券コード
+            since: 前回のクロール状態（指定時は既知の開示に到達した時点で各テーブルの走査を打ち切る）
             
         Returns:
-            開示書類のリスト
+            開示書類のリスト（since指定時は新しい開示のみ）。基本情報ページを取得できなかった場合
+            （通信エラー・アクセス制限・検索結果の異常等）はNone（「開示なし」の空リストと区別する）
         """
         try:
             # まず企業の基本情報ページを取得
             print(f"証券コード {stock_code} の適時開示情報を取得中...")
             
-            # 検索から基本情報ページまで遷移
-            company_info = self.search_company(stock_code)
+            # 検索から基本情報ページまで遷移（企業情報のテーブル走査は不要なため省略）
+            company_info = self.search_company(stock_code, extract_info=False)
             if not company_info:
                 print("基本情報ページの取得に失敗しました")
-                return []
-            
-            # 最後に取得したHTMLから開示情報を抽出
-            # （search_companyで既に基本情報ページを取得済み）
-            if self.debug:
-                html_file = f"debug/{stock_code}_step3_basic_info.html"
-                with open(html_file, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-            else:
-                # デバッグモードでない場合は再度取得が必要
-                print("適時開示情報を抽出中...")
-                return self._extract_disclosure_from_last_response(stock_code)
+                return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
-            return self._extract_disclosure_info(soup)
+            # search_companyで解析済みの基本情報ページから開示情報を抽出
+            print("適時開示情報を抽出中...")
+            return self._extract_disclosure_from_last_response(stock_code, since)
             
         except Exception as e:
             print(f"適時開示情報の取得エラー: {e}")
             import traceback
             traceback.print_exc()
-            return []
+            return None
     
-    def _extract_disclosure_from_last_response(self, stock_code: str) -> List[Dict]:
+    def _extract_disclosure_from_last_response(self, stock_code: str, since: Optional[Dict] = None) -> List[Dict]:
         """
         最後のレスポンスから適時開示情報を抽出（内部使用）
         """
+        if self.last_tree is not None:
+            return self._extract_disclosure_info(self.last_tree, since)
         if self.last_response:
-            soup = BeautifulSoup(self.last_response, 'lxml')
-            return self._extract_disclosure_info(soup)
+            return self._extract_disclosure_info(self.last_response, since)
         return []
     
-    def _extract_disclosure_info(self, soup: BeautifulSoup) -> List[Dict]:
+    def _extract_disclosure_info(self, html, since: Optional[Dict] = None) -> List[Dict]:
         """
-        HTMLから適時開示情報を抽出
+        HTMLから適時開示情報を抽出（lxmlによる解析は disclosure_parser を参照）
         
         Args:
-            soup: BeautifulSoupオブジェクト
+            html: 基本情報ページのHTML、または解析済みのlxml要素
+            since: 前回のクロール状態（各テーブルは新しい順のため、既知の行に到達したら打ち切る）
             
         Returns:
             開示情報のリスト
         """
-        import urllib.parse
-        
         disclosure_list = []
         
         try:
-            # 適時開示情報と縦覧書類を含むテーブルを取得
-            target_tables = []
-            
-            # div.pagecontents配下のテーブルを探す
-            table_elms = soup.select('div.pagecontents > table')
-            if not table_elms:
-                # 別の方法で探す
-                table_elms = soup.find_all('table')
-            
-            for table_elm in table_elms:
-                table_id = table_elm.get('id', '')
-                # closeUpKaiJi* または closeUpFili* のIDを持つテーブルを探す
-                # （openは除外）
-                if table_id and ('KaiJi' in table_id or 'Fili' in table_id) and ('open' not in table_id):
-                    target_tables.append(table_elm)
-                    if self.debug:
-                        print(f"開示情報テーブル発見: {table_id}")
-            
-            # 各テーブルから情報を抽出
-            for table_elm in target_tables:
-                # 入れ子になっているテーブル要素を探す
-                inner_table = table_elm.select_one('table')
-                if not inner_table:
-                    continue
-                
-                # tr要素を処理
-                tr_elms = inner_table.select('tr')
-                for tr_elm in tr_elms:
-                    tr_id = tr_elm.get('id')
-                    if not tr_id:
-                        continue
-                    
-                    disclosure_info = {
-                        'date': '',
-                        'title': '',
-                        'pdf_url': '',
-                        'xbrl_url': '',
-                        'html_summary_url': '',
-                        'attachments': []
-                    }
-                    
-                    # 1つ目のtd要素: 開示日
-                    date_td = tr_elm.select_one('td:nth-of-type(1)')
-                    if date_td:
-                        disclosure_info['date'] = date_td.get_text(strip=True)
-                    
-                    # 2つ目のtd要素: 表題とPDF URL
-                    title_td = tr_elm.select_one('td:nth-of-type(2)')
-                    if title_td:
-                        a_elm = title_td.select_one('a')
-                        if a_elm:
-                            disclosure_info['title'] = a_elm.get_text(strip=True)
-                            pdf_href = a_elm.get('href', '')
-                            if pdf_href:
-                                disclosure_info['pdf_url'] = urllib.parse.urljoin(
-                                    'https://www2.jpx.co.jp', pdf_href.strip()
-                                )
-                    
-                    # 3つ目のtd要素: XBRL URL
-                    xbrl_td = tr_elm.select_one('td:nth-of-type(3)')
-                    if xbrl_td:
-                        img_elm = xbrl_td.select_one('img')
-                        if img_elm:
-                            onclick = img_elm.get('onclick', '')
-                            if onclick:
-                                # ブログを参考にしたXBRL URL抽出
-                                # 例: downloadXbrl2('99840','1','/081220241105608352.zip');
-                                onclick_code_str = onclick.replace('\n', '').strip()
-                                parts = onclick_code_str.split(',')
-                                if len(parts) >= 3:
-                                    # 最後の要素がパス
-                                    xbrl_path = parts[-1].strip().replace("'", '').replace(');', '')
-                                    if xbrl_path and xbrl_path.startswith('/'):
-                                        disclosure_info['xbrl_url'] = f'https://www2.jpx.co.jp/disc{xbrl_path}'
-                                        if self.debug:
-                                            print(f"XBRL URL抽出: {disclosure_info['xbrl_url']}")
-                        
-                        # XBRLが見つからない場合、別の要素も確認
-                        if not disclosure_info['xbrl_url']:
-                            # aタグでXBRLリンクがある場合
-                            xbrl_link = xbrl_td.select_one('a')
-                            if xbrl_link:
-                                href = xbrl_link.get('href', '')
-                                if href and ('.zip' in href.lower() or 'xbrl' in href.lower()):
-                                    disclosure_info['xbrl_url'] = urllib.parse.urljoin(
-                                        'https://www2.jpx.co.jp', href
-                                    )
-                    
-                    # 4つ目のtd要素: HTMLサマリー
-                    html_td = tr_elm.select_one('td:nth-of-type(4)')
-                    if html_td:
-                        # aタグのhref属性から直接URLを取得
-                        html_link = html_td.select_one('a')
-                        if html_link:
-                            href = html_link.get('href', '')
-                            if href and '.htm' in href.lower():
-                                disclosure_info['html_summary_url'] = urllib.parse.urljoin(
-                                    'https://www2.jpx.co.jp', href
-                                )
-                                if self.debug:
-                                    print(f"HTMLサマリーURL抽出: {disclosure_info['html_summary_url']}")
-                        
-                        # href属性にない場合はimgのonclick属性も確認（後方互換性）
-                        elif not disclosure_info['html_summary_url']:
-                            img_elm = html_td.select_one('img')
-                            if img_elm:
-                                onclick = img_elm.get('onclick', '')
-                                if onclick and 'window.open' in onclick:
-                                    # URLを抽出
-                                    import re
-                                    url_match = re.search(r"window\.open\('([^']+)'", onclick)
-                                    if url_match:
-                                        disclosure_info['html_summary_url'] = urllib.parse.urljoin(
-                                            'https://www2.jpx.co.jp', url_match.group(1)
-                                        )
-                    
-                    # 5つ目のtd要素: 添付資料
-                    attach_td = tr_elm.select_one('td:nth-of-type(5)')
-                    if attach_td:
-                        attach_links = attach_td.select('a')
-                        for link in attach_links:
-                            attach_url = link.get('href', '')
-                            if attach_url:
-                                disclosure_info['attachments'].append(
-                                    urllib.parse.urljoin('https://www2.jpx.co.jp', attach_url)
-                                )
-                    
-                    # 情報が含まれている場合のみリストに追加
-                    if disclosure_info['title']:
-                        disclosure_list.append(disclosure_info)
-                        if self.debug:
-                            print(f"開示情報抽出: {disclosure_info['title'][:30]}...")
-            
+            with self.stage_timer.measure('html_parse'):
+                disclosure_list = parse_disclosures(html, since=since, site_root=self.site_root, debug=self.debug)
             print(f"合計 {len(disclosure_list)} 件の開示情報を取得しました")
             
         except Exception as e:
@@ -463,252 +502,433 @@ class JPXScraper:
         
         return disclosure_list
     
-    def download_xbrl_files(self, disclosure_docs: Optional[List[Dict]] = None, download_dir: str = "downloads/xbrl", stock_code: str = "") -> List[Dict]:
+    def _plan_downloads(self, items: List[Dict], kind: str, stock_code: str, download_dir: str,
+                        file_suffix: str, url_key: str) -> tuple:
         """
-        XBRL ファイルをダウンロード
-        
+        ダウンロード対象をマニフェストと照合し、スキップ結果と取得ジョブに振り分ける
+
         Args:
-            disclosure_docs: 開示情報のリスト（None の場合は内部で再取得）
-            download_dir: ダウンロード先ディレクトリ
-            stock_code: 証券コード（ファイル名生成用）
-            
+            items: {'title', 'date', 'url'} のリスト
+            kind: ダウンロード種類（'xbrl' / 'html' / 'attachments'）
+            stock_code: 証券コード
+            download_dir: 保存先ディレクトリ
+            file_suffix: ファイル名末尾（'_xbrl.zip' 等）
+            url_key: 結果辞書にURLを格納するキー名
+
         Returns:
-            ダウンロード結果のリスト
+            (結果リスト（未取得分はNone）, ダウンロードジョブのリスト) のタプル
         """
         import os
-        from urllib.parse import urlparse
 
-        # ダウンロード先ディレクトリを作成
-        os.makedirs(download_dir, exist_ok=True)
+        # ダウンロード済みかどうかはURL単位でマニフェストに一括問い合わせ
+        known = self.manifest.lookup(item['url'] for item in items)
 
-        download_results = []
+        download_results: List[Optional[Dict]] = [None] * len(items)
+        jobs = []
+        used_paths = {record['local_path'] for record in known.values()}
 
-        # HTML/添付と同様の体感に合わせるため、必要に応じてここで開示情報を再取得
-        if disclosure_docs is None:
-            disclosure_docs = self.fetch_disclosure_documents(stock_code)
-
-        # XBRLがある開示情報のみを処理
-        xbrl_docs = [doc for doc in disclosure_docs if doc.get('xbrl_url')]
-        
-        print(f"\n{len(xbrl_docs)}件のXBRLファイルをダウンロード中...")
+        for i, item in enumerate(items, 1):
+            url = item['url']
+            record = known.get(url)
+            existing = None
 
-        # 既存ファイルは都度チェック（per-file exists 判定）
+            # 記録済みでも保存先のファイルが消えた・サイズが記録と異なる場合は取得し直す
+            if record is not None and self._stored_size(record['local_path']) != record['size']:
+                print(f"[{i}/{len(items)}] {item['title'][:50]}...")
+                print("  → 保存済みファイルがないかサイズが記録と異なるため、取得し直します")
+                if split_pack_path(record['local_path']) is None:
+                    local_file = record['local_path']
+                    filename = os.path.basename(local_file)
+                    used_paths.add(local_file)
+                    jobs.append(self._download_job(i, items, item, kind, stock_code, local_file, filename))
+                    continue
+                # アーカイブ内のファイルは通常の保存先へ取得する（次回の格納時にアーカイブのメンバーを置き換える）
+                record = None
 
-        skipped_count = 0
-        downloaded_count = 0
-        
-        for i, doc in enumerate(xbrl_docs, 1):
-            try:
-                xbrl_url = doc['xbrl_url']
-                
+            if record is None:
                 # ファイル名を生成（わかりやすい形式）
                 # 日付を yyyy-mm-dd 形式に変換
-                date_formatted = doc['date'].replace('/', '-')
-                
+                date_formatted = item['date'].replace('/', '-')
+
                 # 表題からファイル名に使えない文字を除去
-                safe_title = "".join(c for c in doc['title'] if c not in '<>:"/\\|?*').strip()
-                
-                # 新しいファイル名形式: 開示日_証券コード_表題_xbrl.zip
-                filename = f"{date_formatted}_{stock_code}_{safe_title}_xbrl.zip"
-                filepath = os.path.join(download_dir, filename)
-                
-                # 既に同名ファイルが存在する場合はスキップ（0バイト等の不完全ファイルは除く）
-                # 進捗見出しとURLを表示（HTML/添付と同等の粒度）
-                print(f"[{i}/{len(xbrl_docs)}] {doc['title'][:50]}...")
-                print(f"  URL: {xbrl_url}")
-
-                # 同名の既存ファイルがあり、かつサイズ>0ならスキップ（スキップ時はsleepしない）
-                if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
-                    print("  → スキップ: 同名ファイルが既に存在します")
-                    download_result = {
-                        'title': doc['title'],
-                        'date': doc['date'],
-                        'xbrl_url': xbrl_url,
-                        'local_file': filepath,
-                        'file_size': os.path.getsize(filepath),
-                        'status': 'skipped'
-                    }
-                    download_results.append(download_result)
-                    skipped_count += 1
+                safe_title = "".join(c for c in item['title'] if c not in '<>:"/\\|?*').strip()
+
+                # ファイル名形式: 開示日_証券コード_表題{_種類}.拡張子
+                filename = f"{date_formatted}_{stock_code}_{safe_title}{file_suffix}"
+                local_file = os.path.join(download_dir, filename)
+
+                # マニフェスト導入前に保存されたファイルは、取得時にサイズがContent-Lengthと一致すれば
+                # 本文を受信せずに登録して再利用する（途中で切れたファイルは取得し直す）
+                if local_file not in used_paths and os.path.exists(local_file) and os.path.getsize(local_file) > 0:
+                    existing = self._existing_file(local_file)
                 else:
-                    print(f"  ダウンロード中...")
-                    # XBRLファイルをダウンロード
-                    response = self.session.get(xbrl_url)
+                    # 同一表題の別URL（複数添付資料など）は連番を付けて上書きを防ぐ
+                    # （圧縮保存時も ..._summary_2.htm.gz のように拡張子の前に付ける）
+                    base_name = filename
+                    n = 2
+                    while local_file in used_paths:
+                        filename = numbered_name(base_name, n)
+                        local_file = os.path.join(download_dir, filename)
+                        n += 1
+
+            if record is not None:
+                print(f"[{i}/{len(items)}] {item['title'][:50]}...")
+                print("  → スキップ: ダウンロード済みです")
+                download_results[i - 1] = {
+                    'title': item['title'],
+                    'date': item['date'],
+                    url_key: url,
+                    'local_file': record['local_path'],
+                    'file_size': record['size'],
+                    'status': 'skipped'
+                }
+                used_paths.add(record['local_path'])
+                continue
+
+            used_paths.add(local_file)
+            jobs.append(self._download_job(i, items, item, kind, stock_code, local_file, filename, existing))
+
+        return download_results, jobs
+
+    @staticmethod
+    def _download_job(index: int, items: List[Dict], item: Dict, kind: str, stock_code: str,
+                      local_file: str, filename: str, existing: Optional[Dict] = None) -> Dict:
+        """ダウンロードジョブ（existing: 検証して再利用する既存ファイルの {'size', 'content_size'}）"""
+        return {
+            'index': index,
+            'total': len(items),
+            'doc': item,
+            'url': item['url'],
+            'kind': kind,
+            'stock_code': stock_code,
+            'local_file': local_file,
+            'filename': filename,
+            'existing': existing
+        }
+
+    @staticmethod
+    def _stored_size(local_path: str) -> Optional[int]:
+        """保存済みファイル（アーカイブ内の仮想パスを含む）のバイト数（存在しなければNone）"""
+        split = split_pack_path(local_path)
+        if split is not None:
+            archive = open_pack(split[0])
+            if archive is None:
+                return None
+            try:
+                return archive.getinfo(split[1]).file_size
+            except KeyError:
+                return None
+        try:
+            return os.path.getsize(local_path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _existing_file(local_file: str) -> Optional[Dict]:
+        """既存ファイルの保存サイズと内容のサイズ（圧縮保存時は展開後、読めなければNone）"""
+        size = os.path.getsize(local_file)
+        if compression_of(local_file) is None:
+            return {'size': size, 'content_size': size}
+        try:
+            return {'size': size, 'content_size': len(read_bytes(local_file))}
+        except Exception:
+            return None
+
+    def _run_downloads(self, jobs: List[Dict], url_key: str, **request_kwargs) -> List[Dict]:
+        """
+        ダウンロードジョブをダウンロードエンジンで並列実行
+
+        Args:
+            jobs: _plan_downloads が返すジョブのリスト
+            url_key: 結果辞書にURLを格納するキー名（'xbrl_url' 等）
+            request_kwargs: requests に渡す追加引数
+
+        Returns:
+            jobsと同じ順序のダウンロード結果リスト
+        """
+        def download_one(job: Dict) -> Dict:
+            doc = job['doc']
+            url = job['url']
+            print(f"[{job['index']}/{job['total']}] {doc['title'][:50]}...\n  URL: {url}\n  ダウンロード中...")
+            try:
+                # エラー応答でも接続をプールへ返すため、必ずレスポンスを閉じる
+                with self.transport.get(url, stream=True, **request_kwargs) as response:
                     response.raise_for_status()
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
 
-                    # ファイルに保存
-                    with open(filepath, 'wb') as f:
-                        f.write(response.content)
+                    # 既存ファイルの内容のサイズがContent-Lengthと一致すれば、本文を受信せずに登録して再利用
+                    existing = job.get('existing')
+                    if existing and self._matches_content_length(existing['content_size'], response.headers):
+                        self.manifest.record(
+                            url, job['kind'], job['stock_code'], job['local_file'], existing['size'],
+                            etag=etag, last_modified=last_modified
+                        )
+                        print("  → スキップ: ダウンロード済みです（サイズがContent-Lengthと一致）")
+                        return {
+                            'title': doc['title'],
+                            'date': doc['date'],
+                            url_key: url,
+                            'local_file': job['local_file'],
+                            'file_size': existing['size'],
+                            'status': 'skipped'
+                        }
 
-                    download_result = {
-                        'title': doc['title'],
-                        'date': doc['date'],
-                        'xbrl_url': xbrl_url,
-                        'local_file': filepath,
-                        'file_size': len(response.content),
-                        'status': 'success'
-                    }
-                    
-                    download_results.append(download_result)
-                    
-                    print(f"  → 完了: {filename} ({len(response.content):,} bytes)")
-                    downloaded_count += 1
-                
-                # サーバーへの負荷を考慮して待機
-                # 注意: スキップ時は待機しない。ダウンロード成功時のみ待機する。
-                # そのため、待機はダウンロード成功ブロック（else）内で実施する。
-                    
+                    # 同じETag・サイズの内容を別URLで取得済みなら、本文を受信せずにハードリンクを作成
+                    linked = self._link_known_content(job, etag, response.headers.get('Content-Length'))
+                    if linked:
+                        file_size, sha256 = linked['size'], linked['sha256']
+                    else:
+                        # 一時ファイルへストリーミング保存し、完了後にアトミックにリネーム
+                        file_size, sha256 = stream_to_file(
+                            response, job['local_file'], compression=compression_of(job['local_file']),
+                            timer=self.stage_timer
+                        )
+                        if self.blob_store and self.blob_store.adopt(job['local_file'], sha256):
+                            print(f"  → 同一内容のファイルと共有（ハードリンク）")
+
+                # 保存完了後にマニフェストへ記録（次回以降のスキップ判定に使用）
+                self.manifest.record(
+                    url, job['kind'], job['stock_code'], job['local_file'], file_size,
+                    sha256=sha256, etag=etag, last_modified=last_modified
+                )
+
+                if linked:
+                    print(f"  → 完了（取得済みの同一内容からハードリンク）: {job['filename']} ({file_size:,} bytes)")
+                else:
+                    print(f"  → 完了: {job['filename']} ({file_size:,} bytes)")
+                return {
+                    'title': doc['title'],
+                    'date': doc['date'],
+                    url_key: url,
+                    'local_file': job['local_file'],
+                    'file_size': file_size,
+                    'status': 'success'
+                }
             except Exception as e:
-                error_result = {
+                print(f"  → エラー: {job['filename']}: {e}")
+                return {
                     'title': doc['title'],
                     'date': doc['date'],
-                    'xbrl_url': doc.get('xbrl_url', ''),
+                    url_key: url,
                     'local_file': None,
                     'file_size': 0,
                     'status': 'error',
                     'error': str(e)
                 }
-                download_results.append(error_result)
-                print(f"  → エラー: {e}")
-        
+
+        return self.download_engine.map(download_one, jobs)
+
+    @staticmethod
+    def _matches_content_length(content_size: int, headers) -> bool:
+        """内容のサイズが応答のContent-Lengthと一致するか（転送時に圧縮された応答では判定しない）"""
+        content_length = headers.get('Content-Length')
+        if headers.get('Content-Encoding', 'identity') != 'identity':
+            return False
+        return bool(content_length and content_length.isdigit()) and int(content_length) == content_size
+
+    def _link_known_content(self, job: Dict, etag: Optional[str], content_length: Optional[str]) -> Optional[Dict]:
+        """
+        ETag・サイズが一致する取得済みファイルがあれば、その実体へのハードリンクとして保存
+
+        Returns:
+            リンク元のマニフェスト記録（リンクしなかった場合はNone）
+        """
+        if not self.blob_store or not etag or not (content_length and content_length.isdigit()):
+            return None
+        known = self.manifest.find_by_etag(etag, int(content_length))
+        # 圧縮方式が異なる保存形式の実体にはリンクしない
+        if known and compression_of(known['local_path']) != compression_of(job['local_file']):
+            return None
+        if known and self.blob_store.link(known['sha256'], job['local_file']):
+            return known
+        return None
+
+    def _download_items(self, items: List[Dict], kind: str, stock_code: str, download_dir: str,
+                        file_suffix: str, url_key: str, xbrl_results: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        マニフェストでスキップ判定を行い、未取得分のみ並列ダウンロード
+
+        Args:
+            xbrl_results: download_xbrl_files の結果（指定時は各開示のXBRL ZIPから取り出し、
+                          ZIPに含まれないファイルのみHTTPで取得）
+
+        Returns:
+            itemsと同じ順序のダウンロード結果リスト
+        """
+        import os
+
+        os.makedirs(download_dir, exist_ok=True)
+
+        download_results, jobs = self._plan_downloads(
+            items, kind, stock_code, download_dir, file_suffix, url_key
+        )
+
+        if xbrl_results:
+            extracted, jobs = self._extract_from_xbrl_zips(jobs, url_key, xbrl_results)
+            for index, result in extracted.items():
+                download_results[index - 1] = result
+
+        # 未取得ファイルのみダウンロードエンジンで並列取得（待機はレートリミッターが担う）
+        for job, result in zip(jobs, self._run_downloads(jobs, url_key)):
+            download_results[job['index'] - 1] = result
+
+        return download_results
+
+    def _extract_from_xbrl_zips(self, jobs: List[Dict], url_key: str, xbrl_results: List[Dict]) -> tuple:
+        """
+        ダウンロード済みのXBRL ZIPに含まれるファイルをHTTPで取得せずにZIPから保存
+
+        Args:
+            jobs: _plan_downloads が返すジョブのリスト（doc に 'xbrl_url' を含む）
+            url_key: 結果辞書にURLを格納するキー名
+            xbrl_results: download_xbrl_files の結果
+
+        Returns:
+            ({ジョブのindex: 結果}, ZIPから取り出せなかったジョブのリスト) のタプル
+        """
+        zip_index = XbrlZipIndex({
+            r['xbrl_url']: r['local_file'] for r in xbrl_results if r.get('local_file')
+        })
+        extracted = {}
+        remaining = []
+        try:
+            for job in jobs:
+                doc = job['doc']
+                member = zip_index.open_member(doc.get('xbrl_url', ''), job['url'])
+                if member is None:
+                    remaining.append(job)
+                    continue
+
+                with member:
+                    file_size, sha256 = copy_to_file(
+                        member, job['local_file'], compression=compression_of(job['local_file']),
+                        timer=self.stage_timer
+                    )
+                if self.blob_store:
+                    self.blob_store.adopt(job['local_file'], sha256)
+                self.manifest.record(
+                    job['url'], job['kind'], job['stock_code'], job['local_file'], file_size, sha256=sha256
+                )
+                print(f"[{job['index']}/{job['total']}] {doc['title'][:50]}...")
+                print(f"  → XBRL ZIPから取得: {job['filename']} ({file_size:,} bytes)")
+                extracted[job['index']] = {
+                    'title': doc['title'],
+                    'date': doc['date'],
+                    url_key: job['url'],
+                    'local_file': job['local_file'],
+                    'file_size': file_size,
+                    'status': 'success',
+                    'source': 'xbrl_zip'
+                }
+        finally:
+            zip_index.close()
+
+        if remaining and extracted:
+            print(f"  ℹ️  XBRL ZIPに含まれない {len(remaining)} 件はHTTPで取得します")
+        return extracted, remaining
+
+    def _stored_suffix(self) -> str:
+        """HTMLファイルの保存時に付ける圧縮拡張子（非圧縮なら空文字）"""
+        return COMPRESSION_SUFFIXES[self.compression] if self.compression else ''
+
+    def download_xbrl_files(self, disclosure_docs: Optional[List[Dict]] = None, download_dir: str = "downloads/xbrl", stock_code: str = "") -> List[Dict]:
+        """
+        XBRL ファイルをダウンロード
+
+        Args:
+            disclosure_docs: 開示情報のリスト（None の場合は内部で再取得）
+            download_dir: ダウンロード先ディレクトリ
+            stock_code: 証券コード（ファイル名生成用）
+
+        Returns:
+            ダウンロード結果のリスト
+        """
+        # HTML/添付と同様の体感に合わせるため、必要に応じてここで開示情報を再取得
+        if disclosure_docs is None:
+            disclosure_docs = self.fetch_disclosure_documents(stock_code) or []
+
+        # XBRLがある開示情報のみを処理
+        xbrl_docs = [
+            {'title': doc['title'], 'date': doc['date'], 'url': doc['xbrl_url']}
+            for doc in disclosure_docs if doc.get('xbrl_url')
+        ]
+
+        print(f"\n{len(xbrl_docs)}件のXBRLファイルをダウンロード中...")
+
+        # 新しいファイル名形式: 開示日_証券コード_表題_xbrl.zip
+        download_results = self._download_items(
+            xbrl_docs, 'xbrl', stock_code, download_dir, '_xbrl.zip', 'xbrl_url'
+        )
+
         # HTML/添付と同等のサマリーログ表記に戻す
         success_count = sum(1 for r in download_results if r['status'] == 'success')
         print(f"\nダウンロード完了: 成功 {success_count} / {len(download_results)} 件")
 
         return download_results
-    
-    def download_html_summaries(self, stock_code: str, disclosure_info: Optional[List[Dict]] = None) -> List[Dict]:
+
+    def download_html_summaries(self, stock_code: str, disclosure_info: Optional[List[Dict]] = None,
+                                xbrl_results: Optional[List[Dict]] = None) -> List[Dict]:
         """
         HTMLサマリーファイルをダウンロード
-        
+
         Args:
             stock_code: 証券コード
-            
+            xbrl_results: download_xbrl_files の結果（指定時はXBRL ZIP内のサマリーを優先して使用）
+
         Returns:
             ダウンロード結果のリスト
         """
         import os
-        import time
-        import requests
-        from urllib.parse import urlparse
-        
+
         # 適時開示情報を取得（渡されていない場合のみ取得）
         if disclosure_info is None:
-            disclosure_info = self.fetch_disclosure_documents(stock_code)
-        
+            disclosure_info = self.fetch_disclosure_documents(stock_code) or []
+
         # HTMLサマリーURLが存在するもののみフィルタ
-        html_docs = [doc for doc in disclosure_info if doc.get('html_summary_url')]
-        
+        html_docs = [
+            {'title': doc['title'], 'date': doc['date'], 'url': doc['html_summary_url'],
+             'xbrl_url': doc.get('xbrl_url', '')}
+            for doc in disclosure_info if doc.get('html_summary_url')
+        ]
+
         if not html_docs:
             print("HTMLサマリーファイルが見つかりませんでした。")
             return []
-        
-        # ダウンロードディレクトリを作成
+
         download_dir = os.path.join('downloads', 'html_summary', stock_code)
-        os.makedirs(download_dir, exist_ok=True)
-        
+
         print(f"\nHTMLサマリーダウンロード開始: {len(html_docs)} 件")
         print(f"保存先: {download_dir}")
-        
-        download_results = []
-        
-        for i, doc in enumerate(html_docs, 1):
-            try:
-                html_url = doc['html_summary_url']
-                print(f"[{i}/{len(html_docs)}] {doc['title'][:50]}...")
-                print(f"  URL: {html_url}")
-                
-                # ファイル名を生成（わかりやすい形式）
-                # 日付を yyyy-mm-dd 形式に変換
-                date_formatted = doc['date'].replace('/', '-')
-                
-                # 表題からファイル名に使えない文字を除去
-                safe_title = "".join(c for c in doc['title'] if c not in '<>:"/\\|?*').strip()
-                
-                # 新しいファイル名形式: 開示日_証券コード_表題_summary.htm
-                filename = f"{date_formatted}_{stock_code}_{safe_title}_summary.htm"
-                
-                local_file = os.path.join(download_dir, filename)
-                
-                # 既に存在する場合はスキップ
-                if os.path.exists(local_file):
-                    print(f"  → スキップ: ファイルが既に存在します")
-                    download_result = {
-                        'title': doc['title'],
-                        'date': doc['date'],
-                        'html_summary_url': html_url,
-                        'local_file': local_file,
-                        'file_size': os.path.getsize(local_file),
-                        'status': 'skipped'
-                    }
-                    download_results.append(download_result)
-                    continue
-                
-                # ダウンロード実行
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-                
-                response = requests.get(html_url, headers=headers, timeout=30)
-                response.raise_for_status()
-                
-                # ファイル保存
-                with open(local_file, 'wb') as f:
-                    f.write(response.content)
-                
-                download_result = {
-                    'title': doc['title'],
-                    'date': doc['date'],
-                    'html_summary_url': html_url,
-                    'local_file': local_file,
-                    'file_size': len(response.content),
-                    'status': 'success'
-                }
-                
-                download_results.append(download_result)
-                
-                print(f"  → 完了: {filename} ({len(response.content):,} bytes)")
-                
-                # サーバーへの負荷を考慮して待機
-                if i < len(html_docs):
-                    time.sleep(1)
-                    
-            except Exception as e:
-                error_result = {
-                    'title': doc['title'],
-                    'date': doc['date'],
-                    'html_summary_url': doc.get('html_summary_url', ''),
-                    'local_file': None,
-                    'file_size': 0,
-                    'status': 'error',
-                    'error': str(e)
-                }
-                download_results.append(error_result)
-                print(f"  → エラー: {e}")
-        
+
+        # 新しいファイル名形式: 開示日_証券コード_表題_summary.htm（圧縮保存時は .htm.gz / .htm.zst）
+        download_results = self._download_items(
+            html_docs, 'html', stock_code, download_dir, '_summary.htm' + self._stored_suffix(),
+            'html_summary_url', xbrl_results
+        )
+
         print(f"\nHTMLサマリーダウンロード完了: 成功 {sum(1 for r in download_results if r['status'] == 'success')} / {len(download_results)} 件")
-        
+
         return download_results
-    
-    def download_attachments(self, stock_code: str, disclosure_info: Optional[List[Dict]] = None) -> List[Dict]:
+
+    def download_attachments(self, stock_code: str, disclosure_info: Optional[List[Dict]] = None,
+                             xbrl_results: Optional[List[Dict]] = None) -> List[Dict]:
         """
         添付資料ファイルをダウンロード
-        
+
         Args:
             stock_code: 証券コード
-            
+            xbrl_results: download_xbrl_files の結果（指定時はXBRL ZIP内の添付資料を優先して使用）
+
         Returns:
             ダウンロード結果のリスト
         """
         import os
-        import time
-        import requests
-        from urllib.parse import urlparse
-        
+
         # 適時開示情報を取得（渡されていない場合のみ取得）
         if disclosure_info is None:
-            disclosure_info = self.fetch_disclosure_documents(stock_code)
-        
+            disclosure_info = self.fetch_disclosure_documents(stock_code) or []
+
         # 添付資料URLが存在するもののみフィルタ
         attachment_docs = []
         for doc in disclosure_info:
@@ -717,121 +937,56 @@ class JPXScraper:
                     attachment_docs.append({
                         'title': doc['title'],
                         'date': doc['date'],
-                        'attachment_url': attach_url
+                        'url': attach_url,
+                        'xbrl_url': doc.get('xbrl_url', '')
                     })
-        
+
         if not attachment_docs:
             print("添付資料ファイルが見つかりませんでした。")
             return []
-        
-        # ダウンロードディレクトリを作成
+
         download_dir = os.path.join('downloads', 'attachments', stock_code)
-        os.makedirs(download_dir, exist_ok=True)
-        
+
         print(f"\n添付資料ダウンロード開始: {len(attachment_docs)} 件")
         print(f"保存先: {download_dir}")
-        
-        download_results = []
-        
-        for i, doc in enumerate(attachment_docs, 1):
-            try:
-                attach_url = doc['attachment_url']
-                print(f"[{i}/{len(attachment_docs)}] {doc['title'][:50]}...")
-                print(f"  URL: {attach_url}")
-                
-                # ファイル名を生成（わかりやすい形式）
-                # 日付を yyyy-mm-dd 形式に変換
-                date_formatted = doc['date'].replace('/', '-')
-                
-                # 表題からファイル名に使えない文字を除去
-                safe_title = "".join(c for c in doc['title'] if c not in '<>:"/\\|?*').strip()
-                
-                # 新しいファイル名形式: 開示日_証券コード_表題_attachments.htm
-                filename = f"{date_formatted}_{stock_code}_{safe_title}_attachments.htm"
-                
-                local_file = os.path.join(download_dir, filename)
-                
-                # 既に存在する場合はスキップ
-                if os.path.exists(local_file):
-                    print(f"  → スキップ: ファイルが既に存在します")
-                    download_result = {
-                        'title': doc['title'],
-                        'date': doc['date'],
-                        'attachment_url': attach_url,
-                        'local_file': local_file,
-                        'file_size': os.path.getsize(local_file),
-                        'status': 'skipped'
-                    }
-                    download_results.append(download_result)
-                    continue
-                
-                # ダウンロード実行
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-                
-                response = requests.get(attach_url, headers=headers, timeout=30)
-                response.raise_for_status()
-                
-                # ファイル保存
-                with open(local_file, 'wb') as f:
-                    f.write(response.content)
-                
-                download_result = {
-                    'title': doc['title'],
-                    'date': doc['date'],
-                    'attachment_url': attach_url,
-                    'local_file': local_file,
-                    'file_size': len(response.content),
-                    'status': 'success'
-                }
-                
-                download_results.append(download_result)
-                
-                print(f"  → 完了: {filename} ({len(response.content):,} bytes)")
-                
-                # サーバーへの負荷を考慮して待機
-                if i < len(attachment_docs):
-                    time.sleep(1)
-                    
-            except Exception as e:
-                error_result = {
-                    'title': doc['title'],
-                    'date': doc['date'],
-                    'attachment_url': doc.get('attachment_url', ''),
-                    'local_file': None,
-                    'file_size': 0,
-                    'status': 'error',
-                    'error': str(e)
-                }
-                download_results.append(error_result)
-                print(f"  → エラー: {e}")
-        
+
+        # 新しいファイル名形式: 開示日_証券コード_表題_attachments.htm（圧縮保存時は .htm.gz / .htm.zst）
+        download_results = self._download_items(
+            attachment_docs, 'attachments', stock_code, download_dir, '_attachments.htm' + self._stored_suffix(),
+            'attachment_url', xbrl_results
+        )
+
         print(f"\n添付資料ダウンロード完了: 成功 {sum(1 for r in download_results if r['status'] == 'success')} / {len(download_results)} 件")
-        
+
         return download_results
-    
+
     def download_all_files_batch(self, codelist_csv: str = "codelist.csv", download_types: list = None,
-                                 resume_from: int = 0, max_companies: int = None,
+                                 resume_from: int | str = 0, max_companies: int = None,
                                  delay_seconds: int = 3, delay_min: float | None = None,
-                                 delay_max: float | None = None) -> Dict:
+                                 delay_max: float | None = None, incremental: bool = False,
+                                 company_workers: int = 1, from_zip: bool = False,
+                                 order: str = 'file') -> Dict:
         """
         codelist.csvから全銘柄のデータを一括ダウンロード
         
         Args:
             codelist_csv: 銘柄リストCSVファイルパス
             download_types: ダウンロード種類 ['xbrl', 'html', 'attachments'] (Noneで全種類)
-            resume_from: 再開する行番号（0から開始）
+            resume_from: 再開する行番号（0から開始）。'auto' の場合はチェックポイントから完了済み企業をスキップして再開
             max_companies: 最大処理企業数（Noneで全企業）
             delay_seconds: 企業間の待機秒数
+            incremental: 差分クロール（前回以降の新しい開示がある企業のみダウンロード）
+            company_workers: 並列に処理する企業数（ワーカーごとに独立したセッションを使用）
+            from_zip: XBRLも取得する場合、HTMLサマリー・添付資料をXBRL ZIPから取り出す
+                      （ZIPに含まれないファイルのみHTTPで取得）
+            order: 処理順 'file'（codelistの行順）または 'priority'（開示予定が近い企業、
+                   ニューインデックス区分・TOPIXウエイトの大きい企業を優先）
             
         Returns:
             処理結果サマリー
         """
         import csv
-        import time
         from datetime import datetime
-        import os
         
         if download_types is None:
             download_types = ['xbrl', 'html', 'attachments']
@@ -839,12 +994,35 @@ class JPXScraper:
         print(f"🚀 codelist.csvから全銘柄一括ダウンロード開始")
         print(f"📋 対象ファイル: {codelist_csv}")
         print(f"📥 ダウンロード種類: {', '.join(download_types)}")
-        # 待機時間の表示（範囲指定があればそれを優先）
-        if delay_min is not None and delay_max is not None:
+        # 待機時間の表示（適応レート制御時は企業間待機を行わない。範囲指定があればそれを優先）
+        if self.rate_controller is not None:
+            print(f"⏱️  企業間待機: なし（適応レート制御 {self.rate_controller.min_rate}～{self.rate_controller.max_rate}件/秒）")
+        elif delay_min is not None and delay_max is not None:
             print(f"⏱️  企業間待機時間: {delay_min}～{delay_max}秒（範囲指定）")
         else:
             print(f"⏱️  企業間待機時間: {delay_seconds}秒")
-        print(f"🔄 再開位置: {resume_from}行目から")
+        print(f"🔀 並列企業数: {company_workers} / 同時ダウンロード数: {self.download_engine.max_workers} / レート上限: {self.rate_limiter.rate}件/秒")
+        # チェックポイント（企業ごとの処理結果を逐次追記するログ）
+        checkpoint = BatchCheckpoint(BatchCheckpoint.path_for(codelist_csv))
+        auto_resume = resume_from == 'auto'
+        if auto_resume:
+            completed_rows = checkpoint.completed_rows()
+            resume_from = 0
+            print(f"🔄 再開位置: 自動（チェックポイントの完了済み {len(completed_rows)} 社をスキップ）")
+        else:
+            completed_rows = {}
+            print(f"🔄 再開位置: {resume_from}行目から")
+        if incremental:
+            print(f"🆕 差分クロール: 前回以降の新しい開示のみ処理")
+        if order not in ('file', 'priority'):
+            raise ValueError(f"不明な処理順: {order}（file / priority）")
+        from_zip = from_zip and 'xbrl' in download_types
+        if from_zip:
+            print(f"🗜️  HTMLサマリー・添付資料: XBRL ZIPから取得（ZIPにない場合のみHTTP）")
+        if self.compression:
+            print(f"💾 HTMLサマリー・添付資料: {self.compression} 圧縮で保存（*.htm{self._stored_suffix()}）")
+        if self.pack_writer:
+            print(f"📦 保存形式: 企業ごとのアーカイブ（{self.pack_writer.download_root}/packs/{{証券コード}}.zip）")
         print("-" * 60)
         
         # CSVファイルの読み込み
@@ -853,12 +1031,13 @@ class JPXScraper:
             with open(codelist_csv, 'r', encoding='utf-8-sig') as f:
                 reader = csv.DictReader(f)
                 for i, row in enumerate(reader):
-                    if i >= resume_from:
-                        if max_companies and len(companies) >= max_companies:
+                    if i >= resume_from and (i + 1) not in completed_rows:
+                        # 優先順では全企業を並べ替えてから上位 max_companies 社に絞る
+                        if order == 'file' and max_companies and len(companies) >= max_companies:
                             break
                         companies.append({
                             'row_number': i + 1,  # ヘッダー行を考慮
-                            'stock_code': row['code'],
+                            'stock_code': self._codelist_stock_code(row),
                             'company_name': row['銘柄名'],
                             'industry': row['業種'],
                             'topix_weight': row['TOPIXに占める個別銘柄のウエイト'],
@@ -871,145 +1050,123 @@ class JPXScraper:
             print(f"❌ CSVファイル読み込みエラー: {e}")
             return {'status': 'error', 'message': str(e)}
         
+        if order == 'priority':
+            scheduler = BatchScheduler(self.manifest.load_filing_dates())
+            companies = scheduler.order(companies)
+            if max_companies:
+                companies = companies[:max_companies]
+            breakdown = scheduler.summary(companies)
+            print(f"🎯 処理順: 優先度順（開示予定が近い企業 {breakdown['due']} 社 → "
+                  f"ニューインデックス区分・TOPIXウエイト順、区分あり {breakdown['indexed']} 社）")
+            if not breakdown['due'] and not breakdown['indexed'] and not breakdown['weighted']:
+                print("⚠️ 開示予定・ニューインデックス区分・TOPIXウエイトのいずれもないため、行順のまま処理します"
+                      "（区分・ウエイトのある codelist_newindex.csv を指定してください）")
+        
         print(f"📊 処理対象企業数: {len(companies)} 社")
         
-        # 結果記録用
-        batch_results = {
-            'start_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'total_companies': len(companies),
-            'processed_companies': 0,
-            'successful_companies': 0,
-            'failed_companies': 0,
-            'download_types': download_types,
-            'results': [],
-            'failed_companies_list': [],
-            'statistics': {}
-        }
+        # 通常実行では新しいログを開始し、自動再開では既存のログに追記
+        if not auto_resume:
+            checkpoint.reset()
+        checkpoint.record_start(codelist_csv, download_types)
+        print(f"📝 チェックポイント: {checkpoint.path}")
         
-        # 処理開始
-        for i, company in enumerate(companies, 1):
-            stock_code = company['stock_code']
-            company_name = company['company_name']
-            row_number = company['row_number']
-            
-            print(f"\n[{i}/{len(companies)}] 処理中: {company_name} ({stock_code}) - 行番号: {row_number}")
-            
-            company_result = {
-                'row_number': row_number,
-                'stock_code': stock_code,
-                'company_name': company_name,
-                'industry': company['industry'],
-                'downloads': {},
-                'total_files': 0,
-                'success_files': 0,
-                'status': 'processing'
-            }
-            
-            try:
-                # 適時開示情報を取得
-                disclosure_info = self.fetch_disclosure_documents(stock_code)
+        # 証券コードごとの確認済み最新開示（差分クロールの基準）を一括読み込み
+        crawl_states = self.manifest.load_crawl_states()
+        
+        # 処理待ちキュー（各ワーカーが独立したセッションで順に取り出す）
+        work_queue = queue.Queue()
+        merge_lock = threading.Lock()
+        progress_state = {'done': 0, 'total': 0}
+        retry_queue = []
+        run_timer = StageTimer()  # 企業に属さない待機（企業間待機）の計測
+        
+        def worker_loop(worker: 'JPXScraper'):
+            while True:
+                try:
+                    i, company = work_queue.get_nowait()
+                except queue.Empty:
+                    return
                 
-                if not disclosure_info:
-                    print(f"  ⚠️  適時開示情報が見つかりません")
-                    company_result['status'] = 'no_disclosure_data'
-                    batch_results['results'].append(company_result)
-                    batch_results['failed_companies_list'].append({
-                        'stock_code': stock_code,
-                        'company_name': company_name,
-                        'reason': 'no_disclosure_data'
-                    })
-                    continue
+                total = progress_state['total']
+                print(f"\n[{i}/{total}] 処理中: {company['company_name']} ({company['stock_code']}) - 行番号: {company['row_number']}")
                 
-                print(f"  📋 適時開示情報: {len(disclosure_info)} 件取得")
+                # 処理段階ごとの所要時間・転送量を企業別結果に記録
+                timer = worker._begin_stage_timing()
+                with timer.measure('total'):
+                    company_result = worker._process_company(
+                        company, download_types, crawl_states.get(company['stock_code']), incremental, from_zip
+                    )
+                company_result['timings'] = timer.snapshot()
                 
-                # 各種ファイルのダウンロード
-                for download_type in download_types:
-                    try:
-                        if download_type == 'xbrl':
-                            # バッチで取得済みの開示情報を再利用（重複fetchを避けて安定化）
-                            results = self.download_xbrl_files(disclosure_info, f"downloads/xbrl/{stock_code}", stock_code)
-                        elif download_type == 'html':
-                            results = self.download_html_summaries(stock_code, disclosure_info=disclosure_info)
-                        elif download_type == 'attachments':
-                            results = self.download_attachments(stock_code, disclosure_info=disclosure_info)
-                        else:
-                            continue
-                        
-                        # 結果集計
-                        total_files = len(results)
-                        success_files = sum(1 for r in results if r['status'] == 'success')
-                        
-                        company_result['downloads'][download_type] = {
-                            'total': total_files,
-                            'success': success_files,
-                            'failed': total_files - success_files
-                        }
-                        
-                        company_result['total_files'] += total_files
-                        company_result['success_files'] += success_files
-                        
-                        print(f"    📥 {download_type.upper()}: {success_files}/{total_files} 件成功")
-                        
-                    except Exception as download_error:
-                        print(f"    ❌ {download_type.upper()}ダウンロードエラー: {download_error}")
-                        company_result['downloads'][download_type] = {
-                            'total': 0,
-                            'success': 0,
-                            'failed': 0,
-                            'error': str(download_error)
-                        }
+                # 完了した企業は即座にチェックポイントへ追記（クラッシュしても失われない）
+                checkpoint.record_company(company_result)
                 
-                # 企業の処理結果を判定
-                if company_result['success_files'] > 0:
-                    company_result['status'] = 'success'
-                    batch_results['successful_companies'] += 1
-                    print(f"  ✅ 成功: 合計 {company_result['success_files']}/{company_result['total_files']} ファイル")
-                else:
-                    company_result['status'] = 'failed'
-                    batch_results['failed_companies'] += 1
-                    batch_results['failed_companies_list'].append({
-                        'stock_code': stock_code,
-                        'company_name': company_name,
-                        'reason': 'no_successful_downloads'
-                    })
-                    print(f"  ❌ 失敗: ダウンロード成功ファイルなし")
+                with merge_lock:
+                    # 開示情報・ファイルを一時的なエラーで取得できなかった企業はバッチ終了時に再処理
+                    if company_result['status'] == 'error' or company_result.get('has_errors'):
+                        retry_queue.append(company)
+                    # 進捗表示
+                    progress_state['done'] += 1
+                    done = progress_state['done']
+                    progress = (done / total) * 100
+                    print(f"  📊 進捗: {progress:.1f}% ({done}/{total})")
                 
-            except Exception as e:
-                print(f"  ❌ 企業処理エラー: {e}")
-                company_result['status'] = 'error'
-                company_result['error'] = str(e)
-                batch_results['failed_companies'] += 1
-                batch_results['failed_companies_list'].append({
-                    'stock_code': stock_code,
-                    'company_name': company_name,
-                    'reason': f'processing_error: {str(e)}'
-                })
-            
-            batch_results['results'].append(company_result)
-            batch_results['processed_companies'] += 1
-            
-            # 進捗表示
-            progress = (i / len(companies)) * 100
-            print(f"  📊 進捗: {progress:.1f}% ({i}/{len(companies)})")
-            
-            # 待機（最後の企業以外）
-            if i < len(companies):
-                # 範囲指定があれば一様乱数でjitter、なければ固定
-                actual_sleep = None
-                if delay_min is not None and delay_max is not None:
-                    import random
-                    # 下限・上限の順序は呼び出し側で正規化済みだが、念のため防御
-                    lo = min(delay_min, delay_max)
-                    hi = max(delay_min, delay_max)
-                    actual_sleep = random.uniform(lo, hi)
-                else:
-                    actual_sleep = delay_seconds
-                print(f"  ⏳ {actual_sleep:.1f}秒待機中...")
-                time.sleep(actual_sleep)
+                # 待機（キューが空になった後、および適応レート制御時は待機しない）
+                if not work_queue.empty() and self.rate_controller is None:
+                    with run_timer.measure('company_delay'):
+                        self._sleep_between_companies(delay_seconds, delay_min, delay_max)
+        
+        # ワーカーが1つの場合は自身のセッションで逐次処理
+        if company_workers <= 1:
+            workers = [self]
+        else:
+            workers = [self._spawn_worker() for _ in range(company_workers)]
+        
+        def run_pass(targets: List[Dict]):
+            for i, company in enumerate(targets, 1):
+                work_queue.put((i, company))
+            progress_state.update(done=0, total=len(targets))
+            if len(workers) == 1:
+                worker_loop(workers[0])
+            else:
+                with ThreadPoolExecutor(max_workers=len(workers)) as executor:
+                    list(executor.map(worker_loop, workers))
+        
+        # 処理開始
+        run_pass(companies)
+        
+        # 開示情報の取得に失敗した企業・失敗したファイルがある企業を最後にまとめて再処理
+        # （取得済みファイルはマニフェストでスキップ）
+        if retry_queue:
+            retry_targets = sorted(retry_queue, key=lambda c: c['row_number'])
+            retry_queue.clear()
+            print(f"\n🔁 開示情報・ファイルを取得できなかった {len(retry_targets)} 社を再処理します")
+            if self.rate_controller is None:
+                with run_timer.measure('company_delay'):
+                    self._sleep_between_companies(delay_seconds, delay_min, delay_max)
+            run_pass(retry_targets)
+        
+        # 最終レポートはチェックポイントから組み立てる（再開前の完了済み企業も含む）
+        batch_results = self._batch_results_from_checkpoint(
+            checkpoint, len(completed_rows) + len(companies), incremental, download_types
+        )
         
         # 処理完了
         batch_results['end_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         batch_results['status'] = 'completed'
+        batch_results['connection_stats'] = self._merge_connection_stats(workers)
+        if self.rate_controller is not None:
+            batch_results['rate_control'] = self.rate_controller.stats()
+        if self.blob_store is not None:
+            batch_results['dedup'] = self.blob_store.snapshot()
+        if self.pack_writer is not None:
+            batch_results['pack'] = self.pack_writer.snapshot()
+        batch_results['timings'] = summarize_timings(
+            [r['timings'] for r in batch_results['results'] if r.get('timings')], run_timer
+        )
+        for worker in workers:
+            if worker is not self:
+                worker.transport.close()
         
         # 統計情報の生成
         batch_results['statistics'] = self._generate_batch_statistics(batch_results)
@@ -1022,6 +1179,269 @@ class JPXScraper:
         
         return batch_results
     
+    def _spawn_worker(self) -> 'JPXScraper':
+        """
+        独立したセッションを持つワーカー用スクレイパーを生成
+
+        レートリミッター・マニフェスト・遷移パラメータキャッシュは共有し、
+        全ワーカー合計のリクエスト数/秒を同じ上限で制御する。
+        """
+        connect_timeout, read_timeout = self.transport.timeout
+        worker = JPXScraper(
+            debug=self.debug,
+            max_workers=self.download_engine.max_workers,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            rate_limiter=self.rate_limiter,
+            max_retries=self.retry_policy.max_attempts - 1,
+            rate_controller=self.rate_controller,
+            circuit_breaker=self.circuit_breaker,
+            cassette=self.transport.adapter.cassette,
+            base_url=self.base_url,
+            manifest=self.manifest,
+            form_params_cache=self.form_params_cache,
+            blob_store=self.blob_store,
+            compression=self.compression,
+            pack_writer=self.pack_writer
+        )
+        return worker
+    
+    @staticmethod
+    def _codelist_stock_code(row: Dict) -> str:
+        """codelistの行の証券コード（code 列がなければ コード 列の末尾に0を付けた5桁）"""
+        code = (row.get('code') or '').strip()
+        if code:
+            return code
+        return f"{(row.get('コード') or '').strip()}0"
+
+    @staticmethod
+    def _merge_connection_stats(workers: List['JPXScraper']) -> Dict:
+        """全ワーカーのコネクション利用状況を合算"""
+        merged = {'requests': 0, 'new_connections': 0, 'reused_connections': 0, 'retries': 0}
+        for worker in workers:
+            for key, value in worker.transport.connection_stats().items():
+                merged[key] = merged.get(key, 0) + value
+        merged['circuit_breaker_opens'] = workers[0].circuit_breaker.open_count
+        return merged
+    
+    @staticmethod
+    def _sleep_between_companies(delay_seconds: float, delay_min: Optional[float], delay_max: Optional[float]):
+        """企業間の待機（範囲指定があれば一様乱数でjitter、なければ固定）"""
+        if delay_min is not None and delay_max is not None:
+            # 下限・上限の順序は呼び出し側で正規化済みだが、念のため防御
+            lo = min(delay_min, delay_max)
+            hi = max(delay_min, delay_max)
+            actual_sleep = random.uniform(lo, hi)
+        else:
+            actual_sleep = delay_seconds
+        print(f"  ⏳ {actual_sleep:.1f}秒待機中...")
+        time.sleep(actual_sleep)
+    
+    def _process_company(self, company: Dict, download_types: List[str],
+                         previous_state: Optional[Dict], incremental: bool, from_zip: bool = False) -> Dict:
+        """
+        1社分の開示情報取得とファイルダウンロードを実行
+        
+        Args:
+            company: codelist.csvから読み込んだ企業情報
+            download_types: ダウンロード種類のリスト
+            previous_state: 前回のクロール状態
+            incremental: 差分クロールを行うか
+            from_zip: HTMLサマリー・添付資料をXBRL ZIPから取り出すか
+            
+        Returns:
+            企業ごとの処理結果
+        """
+        stock_code = company['stock_code']
+        
+        company_result = {
+            'row_number': company['row_number'],
+            'stock_code': stock_code,
+            'company_name': company['company_name'],
+            'industry': company['industry'],
+            'downloads': {},
+            'total_files': 0,
+            'success_files': 0,
+            'status': 'processing'
+        }
+        
+        since = previous_state if incremental else None
+        
+        try:
+            # 適時開示情報を取得（差分クロール時は既知の開示に到達した時点で打ち切り）
+            disclosure_info = self.fetch_disclosure_documents(stock_code, since=since)
+            
+            if disclosure_info is None:
+                # 取得失敗を「新着なし」「開示なし」として扱わない（再処理・再開の対象にする）
+                print(f"  ❌ 適時開示情報を取得できませんでした")
+                company_result['status'] = 'error'
+                company_result['error'] = '適時開示情報の取得に失敗しました'
+                return company_result
+            
+            if not disclosure_info and since:
+                # 新しい開示がない企業はダウンロード処理自体を行わない
+                print(f"  ✅ 新しい開示情報なし（前回確認済み: {since['latest_date']}）")
+                company_result['status'] = 'up_to_date'
+                return company_result
+            
+            if not disclosure_info:
+                print(f"  ⚠️  適時開示情報が見つかりません")
+                company_result['status'] = 'no_disclosure_data'
+                return company_result
+            
+            print(f"  📋 適時開示情報: {len(disclosure_info)} 件取得")
+            
+            # 各種ファイルのダウンロード（ZIPから取り出す場合はXBRLを先に取得）
+            has_errors = False
+            xbrl_results = None
+            if from_zip:
+                download_types = sorted(download_types, key=lambda t: t != 'xbrl')
+            for download_type in download_types:
+                try:
+                    if download_type == 'xbrl':
+                        # バッチで取得済みの開示情報を再利用（重複fetchを避けて安定化）
+                        with self.stage_timer.measure('download_xbrl'):
+                            results = self.download_xbrl_files(disclosure_info, f"downloads/xbrl/{stock_code}", stock_code)
+                        xbrl_results = results if from_zip else None
+                    elif download_type == 'html':
+                        with self.stage_timer.measure('download_html'):
+                            results = self.download_html_summaries(stock_code, disclosure_info=disclosure_info,
+                                                                   xbrl_results=xbrl_results)
+                    elif download_type == 'attachments':
+                        with self.stage_timer.measure('download_attachments'):
+                            results = self.download_attachments(stock_code, disclosure_info=disclosure_info,
+                                                                xbrl_results=xbrl_results)
+                    else:
+                        continue
+                    
+                    # 結果集計
+                    total_files = len(results)
+                    success_files = sum(1 for r in results if r['status'] == 'success')
+                    
+                    company_result['downloads'][download_type] = {
+                        'total': total_files,
+                        'success': success_files,
+                        'failed': total_files - success_files
+                    }
+                    
+                    company_result['total_files'] += total_files
+                    company_result['success_files'] += success_files
+                    has_errors = has_errors or any(r['status'] == 'error' for r in results)
+                    
+                    print(f"    📥 {download_type.upper()}: {success_files}/{total_files} 件成功")
+                    
+                except Exception as download_error:
+                    has_errors = True
+                    print(f"    ❌ {download_type.upper()}ダウンロードエラー: {download_error}")
+                    company_result['downloads'][download_type] = {
+                        'total': 0,
+                        'success': 0,
+                        'failed': 0,
+                        'error': str(download_error)
+                    }
+            
+            company_result['has_errors'] = has_errors
+            
+            # 決算短信の開示日を記録（次回以降の処理順の決定に使用）
+            self.manifest.record_filing_dates(stock_code, disclosure_info)
+            
+            # エラーなく取得できた場合のみクロール状態を進める（失敗分は次回再取得）
+            if not has_errors:
+                self.manifest.update_crawl_state(stock_code, disclosure_info, previous_state)
+            
+            # 取得したファイルを企業ごとのアーカイブへ移す
+            if self.pack_writer:
+                with self.stage_timer.measure('pack'):
+                    packed = self.pack_writer.pack_company(stock_code, self.manifest)
+                if packed:
+                    print(f"  📦 アーカイブへ格納: {packed} ファイル")
+            
+            # 企業の処理結果を判定
+            if company_result['success_files'] > 0:
+                company_result['status'] = 'success'
+                print(f"  ✅ 成功: 合計 {company_result['success_files']}/{company_result['total_files']} ファイル")
+            elif not has_errors:
+                # 全ファイルが取得済み、または対象のファイルがない（再実行・再開時）は完了として扱う
+                company_result['status'] = 'no_new_files'
+                print(f"  ✅ 新しいファイルなし（取得済み {company_result['total_files']} ファイル）")
+            else:
+                company_result['status'] = 'failed'
+                print(f"  ❌ 失敗: ダウンロード成功ファイルなし")
+            
+        except Exception as e:
+            print(f"  ❌ 企業処理エラー: {e}")
+            company_result['status'] = 'error'
+            company_result['error'] = str(e)
+        
+        return company_result
+    
+    @staticmethod
+    def _new_batch_results(start_time: str, total_companies: int, incremental: bool,
+                           download_types: List[str]) -> Dict:
+        """集計前のバッチ結果を生成"""
+        return {
+            'start_time': start_time,
+            'total_companies': total_companies,
+            'processed_companies': 0,
+            'successful_companies': 0,
+            'failed_companies': 0,
+            'up_to_date_companies': 0,
+            'no_new_files_companies': 0,
+            'incremental': incremental,
+            'download_types': download_types,
+            'results': [],
+            'failed_companies_list': [],
+            'statistics': {}
+        }
+    
+    def _batch_results_from_checkpoint(self, checkpoint: BatchCheckpoint, total_companies: int,
+                                       incremental: bool, download_types: List[str]) -> Dict:
+        """
+        チェックポイントに記録された企業別結果からバッチ結果を組み立て
+        
+        同じ企業が複数回記録されている場合（再開時の再処理）は最後の結果を採用し、
+        企業別結果はCSVの行順に並べる。
+        """
+        from datetime import datetime
+        
+        start_time = checkpoint.start_time() or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        batch_results = self._new_batch_results(start_time, total_companies, incremental, download_types)
+        
+        company_results = checkpoint.company_results()
+        for row_number in sorted(company_results):
+            self._record_company_result(batch_results, company_results[row_number])
+        
+        return batch_results
+    
+    @staticmethod
+    def _record_company_result(batch_results: Dict, company_result: Dict):
+        """1社分の処理結果をバッチ結果に集計"""
+        status = company_result['status']
+        failed_entry = {
+            'stock_code': company_result['stock_code'],
+            'company_name': company_result['company_name']
+        }
+        
+        if status == 'success':
+            batch_results['successful_companies'] += 1
+        elif status == 'up_to_date':
+            batch_results['up_to_date_companies'] += 1
+        elif status == 'no_new_files':
+            batch_results['no_new_files_companies'] += 1
+        elif status == 'no_disclosure_data':
+            batch_results['failed_companies_list'].append({**failed_entry, 'reason': 'no_disclosure_data'})
+        elif status == 'failed':
+            batch_results['failed_companies'] += 1
+            batch_results['failed_companies_list'].append({**failed_entry, 'reason': 'no_successful_downloads'})
+        elif status == 'error':
+            batch_results['failed_companies'] += 1
+            batch_results['failed_companies_list'].append(
+                {**failed_entry, 'reason': f"processing_error: {company_result.get('error', '')}"}
+            )
+        
+        batch_results['results'].append(company_result)
+        batch_results['processed_companies'] += 1
+    
     def _generate_batch_statistics(self, batch_results: Dict) -> Dict:
         """バッチ処理の統計情報を生成"""
         stats = {
@@ -1082,9 +1502,54 @@ class JPXScraper:
         print(f"🏢 処理企業数: {batch_results['processed_companies']} 社")
         print(f"✅ 成功企業数: {batch_results['successful_companies']} 社")
         print(f"❌ 失敗企業数: {batch_results['failed_companies']} 社")
+        if batch_results.get('incremental'):
+            print(f"🆕 新着なし企業数: {batch_results.get('up_to_date_companies', 0)} 社")
+        if batch_results.get('no_new_files_companies'):
+            print(f"📂 新しいファイルなし企業数（全ファイル取得済み）: {batch_results['no_new_files_companies']} 社")
         print(f"📊 成功率: {batch_results['statistics']['success_rate']:.1f}%")
         print(f"📁 総ダウンロードファイル数: {batch_results['statistics']['total_files_downloaded']} 件")
         
+        # コネクション再利用状況
+        conn = batch_results.get('connection_stats')
+        if conn:
+            print(f"🔌 リクエスト数: {conn['requests']} 件（新規接続 {conn['new_connections']} / 接続再利用 {conn['reused_connections']}）")
+            if conn.get('retries') or conn.get('circuit_breaker_opens'):
+                print(f"🔁 再試行: {conn.get('retries', 0)} 件 / 接続停止（サーキットブレーカー）: {conn.get('circuit_breaker_opens', 0)} 回")
+        
+        # 適応レート制御の調整状況
+        rate_control = batch_results.get('rate_control')
+        if rate_control:
+            rates = ", ".join(f"{host}: {rate:.2f}" for host, rate in rate_control['current_rates'].items())
+            print(f"📈 適応レート制御: 引き上げ {rate_control['increases']} 回 / 引き下げ {rate_control['decreases']} 回"
+                  f"（負荷検知 {rate_control['stress_signals']} 件、最終レート {rates} 件/秒）")
+        
+        # 重複排除の状況
+        dedup = batch_results.get('dedup')
+        if dedup:
+            print(f"🔗 重複排除: 新規 {dedup['stored']} 件 / 同一内容 {dedup['deduplicated']} 件"
+                  f"（ダウンロード省略 {dedup['linked_without_download']} 件）、"
+                  f"削減 {dedup['deduplicated_bytes']:,} bytes")
+        
+        # アーカイブへの格納状況
+        pack = batch_results.get('pack')
+        if pack:
+            print(f"📦 アーカイブ格納: {pack['packed_companies']} 社 / {pack['packed_files']} ファイル")
+        
+        # 処理段階ごとの所要時間
+        timings = batch_results.get('timings')
+        if timings and timings['stages']:
+            print(f"\n⏱️  処理段階別の所要時間（{timings['companies']} 社、企業あたりの p50 / p95 / 最大）:")
+            for stage, stats in timings['stages'].items():
+                label = STAGE_LABELS.get(stage, stage)
+                if 'p50' in stats:
+                    print(f"  {label}: 合計 {stats['total']:.1f}秒 / p50 {stats['p50']:.2f}秒 / "
+                          f"p95 {stats['p95']:.2f}秒 / 最大 {stats['max']:.2f}秒")
+                else:
+                    print(f"  {label}: 合計 {stats['total']:.1f}秒（{stats['count']} 回）")
+            for kind, stats in timings['bytes'].items():
+                print(f"  📦 {BYTE_LABELS.get(kind, kind)}: 合計 {stats['total']:,} bytes / "
+                      f"p50 {stats['p50']:,} / p95 {stats['p95']:,} bytes")
+        
         # ダウンロード種類別統計
         print(f"\n📥 ダウンロード種類別統計:")
         for download_type, stats in batch_results['statistics']['download_type_stats'].items():
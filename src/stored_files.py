@@ -0,0 +1,152 @@
+import fnmatch
+import gzip
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Union
+
+from .pack_store import open_stored, pack_codes, pack_members
+
+try:
+    import zstandard
+except ImportError:  # zstd圧縮を使う場合のみ必要
+    zstandard = None
+
+
+# 圧縮方式 → 保存時に付ける拡張子
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+# zstd の圧縮レベル（HTMLでは gzip -9 と同等以上の圧縮率で展開が速い）
+ZSTD_LEVEL = 10
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ImportError("zstd圧縮には zstandard パッケージが必要です（uv sync --extra zstd）")
+
+
+def validate_compression(method: Optional[str]) -> Optional[str]:
+    """圧縮方式の指定を検証（None / 'gzip' / 'zstd'）"""
+    if method in (None, '', 'none'):
+        return None
+    if method not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"不明な圧縮方式: {method}（gzip / zstd）")
+    if method == 'zstd':
+        _require_zstandard()
+    return method
+
+
+def compression_of(path: Union[str, Path]) -> Optional[str]:
+    """ファイル名の拡張子から圧縮方式を判定（非圧縮ならNone）"""
+    name = str(path)
+    for method, suffix in COMPRESSION_SUFFIXES.items():
+        if name.endswith(suffix):
+            return method
+    return None
+
+
+def logical_name(path: Union[str, Path]) -> str:
+    """圧縮拡張子を除いたファイル名（例: 2025-08-07_99840_決算短信_summary.htm.gz → ..._summary.htm）"""
+    name = Path(path).name
+    method = compression_of(name)
+    return name[:-len(COMPRESSION_SUFFIXES[method])] if method else name
+
+
+def logical_stem(path: Union[str, Path]) -> str:
+    """圧縮拡張子と元の拡張子を除いたファイル名（出力ファイル名の生成用）"""
+    return Path(logical_name(path)).stem
+
+
+def numbered_name(filename: str, n: int) -> str:
+    """
+    同名ファイルを避けるための連番付きファイル名（連番は圧縮拡張子・元の拡張子の前に付ける）
+
+    例: ..._summary.htm.gz → ..._summary_2.htm.gz（list_files の *.htm.gz に一致するまま）
+    """
+    name = logical_name(filename)
+    compressed = filename[len(name):]
+    path = Path(name)
+    return f"{path.stem}_{n}{path.suffix}{compressed}"
+
+
+def list_files(directory: Union[str, Path], pattern: str = "*.htm") -> List[Path]:
+    """
+    pattern に一致するファイルを、圧縮して保存されたもの（*.htm.gz / *.htm.zst）も含めて列挙
+
+    証券コードごとのアーカイブ（downloads/packs/{証券コード}.zip）に格納されたファイルも
+    仮想パス（downloads/packs/13010.zip/html_summary/xxx.htm）として含める。
+    同じファイルが複数の形式で存在する場合は、個別ファイル・非圧縮のものを優先する。
+    """
+    directory = Path(directory)
+    patterns = [pattern + suffix for suffix in ('', *COMPRESSION_SUFFIXES.values())]
+    files = {}
+    for file_pattern in patterns:
+        for path in directory.glob(file_pattern):
+            files.setdefault(logical_name(path), path)
+    members = pack_members(directory)
+    for file_pattern in patterns:
+        for path in members:
+            if fnmatch.fnmatchcase(path.name, file_pattern):
+                files.setdefault(logical_name(path), path)
+    return list(files.values())
+
+
+def list_codes(base_dir: Union[str, Path]) -> List[str]:
+    """種類別ディレクトリ（downloads/html_summary 等）配下の証券コード一覧（アーカイブ格納分を含む）"""
+    base_dir = Path(base_dir)
+    codes = {d.name for d in base_dir.iterdir() if d.is_dir()} if base_dir.is_dir() else set()
+    codes.update(pack_codes(base_dir))
+    return sorted(codes)
+
+
+def has_code(base_dir: Union[str, Path], code: str) -> bool:
+    """証券コードのファイルが存在するか（個別ディレクトリまたはアーカイブ）"""
+    code_dir = Path(base_dir) / code
+    return code_dir.is_dir() or bool(pack_members(code_dir))
+
+
+def read_bytes(path: Union[str, Path]) -> bytes:
+    """ファイルを読み込み、圧縮されていれば展開して返す"""
+    method = compression_of(path)
+    with open_stored(path) as f:
+        if method == 'gzip':
+            return gzip.decompress(f.read())
+        if method == 'zstd':
+            # ストリーミング圧縮したフレームは展開後のサイズを持たないため stream_reader で展開
+            _require_zstandard()
+            with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+                return reader.read()
+        return f.read()
+
+
+def read_text(path: Union[str, Path], encoding: str = 'utf-8') -> str:
+    """ファイルをテキストとして読み込む（圧縮されていれば展開）"""
+    return read_bytes(path).decode(encoding)
+
+
+def compress_chunks(chunks: Iterable[bytes], method: Optional[str]) -> Iterator[bytes]:
+    """
+    チャンク列を逐次圧縮（method が None ならそのまま返す）
+
+    gzip はヘッダーの更新日時を0に固定し、同じ内容から常に同じバイト列を生成する
+    （sha256による重複排除が圧縮後も有効になる）。
+    """
+    if method is None:
+        yield from chunks
+        return
+
+    if method == 'gzip':
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+        return
+
+    _require_zstandard()
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,160 @@
+import contextlib
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+# 計測する処理段階（表示順）と表示名
+STAGE_LABELS = {
+    'total': '企業あたり合計',
+    'session_warmup': 'セッション確立',
+    'search_post': '検索POST',
+    'basic_info_post': '基本情報POST',
+    'html_parse': 'HTML解析',
+    'download_xbrl': 'XBRL取得',
+    'download_html': 'HTMLサマリー取得',
+    'download_attachments': '添付資料取得',
+    'disk_write': 'ディスク書き込み',
+    'pack': 'アーカイブ格納',
+    'rate_limit_wait': 'レートリミッター待機',
+    'retry_backoff': '再試行の待機',
+    'company_delay': '企業間待機',
+}
+
+# 転送量の種類と表示名
+BYTE_LABELS = {
+    'pages': '検索・基本情報ページ',
+    'received': 'ファイル受信',
+    'written': 'ディスク書き込み',
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """最近傍順位法によるパーセンタイル（values が空なら0）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class StageTimer:
+    """
+    処理段階ごとの所要時間と転送量を集計する（スレッドセーフ）
+
+    一括ダウンロードでは企業ごとに1つ作成し、スクレイパー・トランスポート・
+    ダウンロードエンジンの各スレッドから同じインスタンスへ加算する。
+    並列ダウンロード中の段階（ディスク書き込み・待機）は全スレッドの合計になる。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.bytes: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float, count: int = 1):
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + count
+
+    def add_bytes(self, kind: str, amount: int):
+        if amount:
+            with self._lock:
+                self.bytes[kind] = self.bytes.get(kind, 0) + amount
+
+    @contextlib.contextmanager
+    def measure(self, stage: str):
+        """with ブロックの経過時間を stage に加算"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def snapshot(self) -> Dict:
+        """
+        集計結果（チェックポイント・レポートに保存する形式）
+
+        Returns:
+            {'seconds': {段階: 秒}, 'counts': {段階: 回数}, 'bytes': {種類: バイト数}}
+        """
+        with self._lock:
+            return {
+                'seconds': {stage: round(seconds, 4) for stage, seconds in self.seconds.items()},
+                'counts': dict(self.counts),
+                'bytes': dict(self.bytes),
+            }
+
+
+def _ordered(keys: Iterable[str], labels: Dict[str, str]) -> List[str]:
+    keys = set(keys)
+    return [key for key in labels if key in keys] + sorted(keys - set(labels))
+
+
+def summarize_timings(company_timings: List[Dict], run_timer: Optional[StageTimer] = None) -> Dict:
+    """
+    企業ごとの計測結果を実行全体で集計
+
+    Args:
+        company_timings: 企業ごとの StageTimer.snapshot() のリスト
+        run_timer: 企業に属さない段階（企業間待機）の計測結果
+
+    Returns:
+        {'companies': 企業数,
+         'stages': {段階: {'total', 'count', 'mean', 'p50', 'p95', 'max'}},
+         'bytes': {種類: {'total', 'p50', 'p95', 'max'}}}
+        （p50/p95/max は企業あたりの値、企業間待機は1回あたりの値）
+    """
+    stage_values: Dict[str, List[float]] = {}
+    stage_counts: Dict[str, int] = {}
+    byte_values: Dict[str, List[int]] = {}
+    for timings in company_timings:
+        for stage, seconds in timings.get('seconds', {}).items():
+            stage_values.setdefault(stage, []).append(seconds)
+        for stage, count in timings.get('counts', {}).items():
+            stage_counts[stage] = stage_counts.get(stage, 0) + count
+        for kind, amount in timings.get('bytes', {}).items():
+            byte_values.setdefault(kind, []).append(amount)
+
+    # 企業の処理中に計測した段階は、その段階がなかった企業を0秒として扱う
+    companies = len(company_timings)
+    for values in list(stage_values.values()) + list(byte_values.values()):
+        values.extend([0] * (companies - len(values)))
+
+    stages = {}
+    for stage in _ordered(stage_values, STAGE_LABELS):
+        values = stage_values[stage]
+        stages[stage] = {
+            'total': round(sum(values), 3),
+            'count': stage_counts.get(stage, 0),
+            'mean': round(sum(values) / len(values), 4),
+            'p50': round(percentile(values, 50), 4),
+            'p95': round(percentile(values, 95), 4),
+            'max': round(max(values), 4),
+        }
+
+    if run_timer is not None:
+        run = run_timer.snapshot()
+        for stage, seconds in run['seconds'].items():
+            count = run['counts'].get(stage, 0)
+            stages[stage] = {
+                'total': round(seconds, 3),
+                'count': count,
+                'mean': round(seconds / count, 4) if count else 0.0,
+            }
+
+    return {
+        'companies': companies,
+        'stages': stages,
+        'bytes': {
+            kind: {
+                'total': sum(byte_values[kind]),
+                'p50': percentile(byte_values[kind], 50),
+                'p95': percentile(byte_values[kind], 95),
+                'max': max(byte_values[kind]),
+            }
+            for kind in _ordered(byte_values, BYTE_LABELS)
+        },
+    }
@@ -0,0 +1,215 @@
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .cassette import CassetteStore
+from .download_engine import AdaptiveRateController, HostRateLimiter
+from .retry import CircuitBreaker, RetryPolicy
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """
+    ソケット接続（TCP/TLSハンドシェイク）の発生回数を数えるHTTPAdapter
+
+    cassette を指定すると、送受信したやり取りを全て記録する。
+    """
+
+    def __init__(self, *args, cassette: Optional[CassetteStore] = None, **kwargs):
+        self.connect_count = 0
+        self.cassette = cassette
+        self._count_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if self.cassette is not None:
+            self.cassette.record_response(request, response)
+        return response
+
+    def _on_connect(self):
+        with self._count_lock:
+            self.connect_count += 1
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        on_connect = self._on_connect
+
+        # 切断後の再接続も数えるため、コネクション生成ではなく connect() 呼び出しを数える
+        class _HTTPConnection(HTTPConnection):
+            def connect(self):
+                on_connect()
+                super().connect()
+
+        class _HTTPSConnection(HTTPSConnection):
+            def connect(self):
+                on_connect()
+                super().connect()
+
+        class _HTTPConnectionPool(HTTPConnectionPool):
+            ConnectionCls = _HTTPConnection
+
+        class _HTTPSConnectionPool(HTTPSConnectionPool):
+            ConnectionCls = _HTTPSConnection
+
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _HTTPConnectionPool,
+            'https': _HTTPSConnectionPool
+        }
+
+
+class HttpTransport:
+    """
+    スクレイパーの全HTTPリクエストが通過する共通トランスポート層
+
+    - keep-aliveのコネクションプール（サイズは同時実行数に合わせる）
+    - 接続/読み込みのデフォルトタイムアウト
+    - ホスト単位のレートリミッター（適応レート制御が有効なら応答状況を通知）
+    - GETの指数バックオフ付き再試行と、ホスト単位のサーキットブレーカー
+    - 新規接続数と接続再利用数のカウンター
+    - timer を設定すると、レートリミッターの待機時間と再試行の待機時間を StageTimer へ加算
+    """
+
+    DEFAULT_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1'
+    }
+
+    def __init__(self, pool_size: int = 1, connect_timeout: float = 10.0, read_timeout: float = 30.0,
+                 rate_limiter: Optional[HostRateLimiter] = None,
+                 rate_controller: Optional[AdaptiveRateController] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 cassette: Optional[CassetteStore] = None):
+        """
+        Args:
+            pool_size: ホストごとに保持するkeep-alive接続数（同時実行数と同じ値を推奨）
+            connect_timeout: 接続タイムアウト秒数
+            read_timeout: 読み込みタイムアウト秒数
+            rate_limiter: 全リクエストで共有するレートリミッター
+            rate_controller: 応答時間・ステータスからレートを調整するコントローラー（任意）
+            retry_policy: GETの再試行方針（省略時は再試行しない）
+            circuit_breaker: 全リクエストで共有するサーキットブレーカー（任意）
+            cassette: 全てのやり取りを記録するカセット（記録モード、任意）
+        """
+        self.pool_size = max(1, int(pool_size))
+        self.timeout = (connect_timeout, read_timeout)
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.rate_controller = rate_controller
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self._lock = threading.Lock()
+        self._request_count = 0
+        self._retry_count = 0
+        self.timer = None  # 待機時間を加算する StageTimer（一括ダウンロード時に企業ごとに設定）
+
+        self.session = requests.Session()
+        self.session.headers.update(self.DEFAULT_HEADERS)
+
+        # プールが埋まっている場合は新規接続を作らずに空きを待つ（接続の使い捨てを防ぐ）
+        self.adapter = CountingHTTPAdapter(
+            pool_connections=4, pool_maxsize=self.pool_size, pool_block=True, cassette=cassette
+        )
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        レートリミッターを通過させた上でリクエストを送信（タイムアウト未指定時はデフォルト値）
+
+        冪等なリクエスト（GET、または idempotent=True を指定したPOST）のみ、
+        接続エラー・タイムアウト・429/5xx を再試行方針に従って再試行する。
+        再試行回数を使い切った場合は最後のレスポンス（または例外）をそのまま返す。
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        idempotent = kwargs.pop('idempotent', method == 'GET')
+        max_attempts = self.retry_policy.max_attempts if (self.retry_policy and idempotent) else 1
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = self._send(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= max_attempts:
+                    raise
+                delay = self.retry_policy.delay(attempt)
+                reason = e.__class__.__name__
+            else:
+                if attempt >= max_attempts or not self.retry_policy.should_retry_status(response.status_code):
+                    return response
+                delay = self.retry_policy.delay(attempt, response.headers.get('Retry-After'))
+                reason = f"HTTP {response.status_code}"
+                response.close()
+
+            with self._lock:
+                self._retry_count += 1
+            print(f"  🔁 再試行 {attempt}/{max_attempts - 1}: {reason}（{delay:.1f}秒後）")
+            if self.timer is not None:
+                self.timer.add('retry_backoff', delay)
+            time.sleep(delay)
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """1回分の送信（サーキットブレーカー・レートリミッター・適応レート制御を経由）"""
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request(url)
+        waited = self.rate_limiter.acquire(url)
+        if self.timer is not None and waited:
+            self.timer.add('rate_limit_wait', waited)
+        with self._lock:
+            self._request_count += 1
+
+        # 応答ヘッダー受信までの時間とステータスをコントローラー・ブレーカーへ通知
+        started = time.monotonic()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if self.rate_controller is not None:
+                self.rate_controller.on_stress(url)
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_failure(url)
+            raise
+
+        if self.rate_controller is not None:
+            self.rate_controller.on_response(url, response.status_code, time.monotonic() - started)
+        if self.circuit_breaker is not None:
+            if response.status_code == 429 or response.status_code >= 500:
+                self.circuit_breaker.record_failure(url)
+            else:
+                self.circuit_breaker.record_success(url)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def connection_stats(self) -> Dict:
+        """
+        コネクションの利用状況を集計
+
+        Returns:
+            {'requests', 'new_connections', 'reused_connections', 'retries'} の辞書
+        """
+        with self._lock:
+            request_count = self._request_count
+            retry_count = self._retry_count
+        new_connections = self.adapter.connect_count
+        return {
+            'requests': request_count,
+            'new_connections': new_connections,
+            'reused_connections': max(0, request_count - new_connections),
+            'retries': retry_count
+        }
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,83 @@
+import posixpath
+import zipfile
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from .pack_store import open_stored
+
+
+def document_id(xbrl_url: str) -> str:
+    """
+    XBRL ZIPのURLから開示の文書番号を取り出す
+
+    例: https://www2.jpx.co.jp/disc/99840/081220250805531214.zip → 081220250805531214
+    """
+    return posixpath.splitext(posixpath.basename(urlsplit(xbrl_url).path))[0]
+
+
+def member_basename(url: str, doc_id: str) -> str:
+    """
+    HTMLサマリー・添付資料のURLに対応するZIP内メンバーのファイル名
+
+    開示サイト上のファイル名は「文書番号_ZIP内のファイル名」の形式
+    （例: 081220250805531214_qualitative.htm → XBRLData/Attachment/qualitative.htm）。
+    """
+    basename = posixpath.basename(urlsplit(url).path)
+    prefix = f"{doc_id}_"
+    return basename[len(prefix):] if doc_id and basename.startswith(prefix) else basename
+
+
+class XbrlZipIndex:
+    """ダウンロード済みXBRL ZIPのメンバーをファイル名で引く索引（ZIPは必要になった時点で開く）"""
+
+    def __init__(self, zip_paths: Dict[str, str]):
+        """
+        Args:
+            zip_paths: XBRL ZIPのURL → ローカルパス
+        """
+        self.zip_paths = zip_paths
+        self._archives: Dict[str, Optional[zipfile.ZipFile]] = {}
+        self._members: Dict[str, Dict[str, zipfile.ZipInfo]] = {}
+        self._handles = []
+
+    def _open(self, xbrl_url: str) -> Optional[zipfile.ZipFile]:
+        if xbrl_url not in self._archives:
+            archive = None
+            path = self.zip_paths.get(xbrl_url)
+            if path:
+                try:
+                    # 企業ごとのアーカイブに格納済みのZIPも開ける
+                    handle = open_stored(path)
+                    self._handles.append(handle)
+                    archive = zipfile.ZipFile(handle)
+                except (OSError, KeyError, zipfile.BadZipFile):
+                    archive = None
+            self._archives[xbrl_url] = archive
+            self._members[xbrl_url] = {
+                posixpath.basename(info.filename): info
+                for info in (archive.infolist() if archive else []) if not info.is_dir()
+            }
+        return self._archives[xbrl_url]
+
+    def open_member(self, xbrl_url: str, url: str):
+        """
+        url に対応するメンバーを開く
+
+        Returns:
+            メンバーの読み込み用ファイルオブジェクト（ZIPがない・メンバーがない場合はNone）
+        """
+        archive = self._open(xbrl_url)
+        if archive is None:
+            return None
+        info = self._members[xbrl_url].get(member_basename(url, document_id(xbrl_url)))
+        return archive.open(info) if info else None
+
+    def close(self):
+        for archive in self._archives.values():
+            if archive:
+                archive.close()
+        for handle in self._handles:
+            handle.close()
+        self._archives.clear()
+        self._members.clear()
+        self._handles.clear()